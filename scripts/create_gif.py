@@ -1,36 +1,73 @@
+import argparse
 import os
+import sys
 from pathlib import Path
 
-from PIL import Image
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from batometer.clipBuilder import (  # noqa: E402
+    CLIP_DECODE_WORKERS,
+    GIF_PALETTE_FRAMES,
+    iter_frames,
+    write_gif,
+)
 
 
-def create_gif(image_folder, output_path, duration=60, loop=0):
-    # Get a list of all image files in the directory
-    images = [
-        img for img in os.listdir(image_folder) if img.endswith((".png", ".jpg", ".jpeg", ".bmp", ".gif"))
-    ]
+def create_gif(
+    image_folder,
+    output_path,
+    duration=60,
+    loop=0,
+    scale=1.0,
+    split=None,
+    workers=CLIP_DECODE_WORKERS,
+    palette_frames=GIF_PALETTE_FRAMES,
+):
+    """
+    Streams frames into a GIF, holding only a small window of them in memory.
 
-    # Sort images to maintain the order
-    images.sort(key=lambda f: int("".join(filter(str.isdigit, f))))
-
-    # Load the images
-    frames = [Image.open(os.path.join(image_folder, image)).convert("RGB") for image in images]
+    `image_folder` can be a folder of numbered images, a sharded dataset export or a video file
+    (e.g. the annotated video). Frames are decoded on `workers` threads, downscaled by `scale` and
+    mapped onto one palette shared by the whole GIF.
+    """
+    frames = iter_frames(image_folder, scale=scale, split=split, workers=workers)
+    count = write_gif(
+        frames, output_path, duration=duration, loop=loop, palette_frames=palette_frames, workers=workers
+    )
+    print(f"GIF of {count} frames created successfully and saved to {output_path}")
 
-    print("Opened frames")
 
-    # Save as GIF
-    frames[0].save(
-        output_path,
-        save_all=True,
-        append_images=frames[1:],
-        duration=duration,  # Duration between frames in milliseconds
-        loop=loop,  # 0 means loop forever
+def parse_args(default_duration):
+    parser = argparse.ArgumentParser(description="Stream frames into an animated GIF")
+    parser.add_argument(
+        "source",
+        nargs="?",
+        default=os.path.join(Path(__file__).parent.parent, ".temp"),
+        help="Folder of numbered images, sharded dataset export or video file",
     )
-
-    print(f"GIF created successfully and saved to {output_path}")
+    parser.add_argument("output_path", nargs="?", default="output.gif")
+    parser.add_argument("--duration", type=int, default=default_duration, help="Milliseconds per frame")
+    parser.add_argument("--loop", type=int, default=0, help="Number of loops; 0 loops forever")
+    parser.add_argument("--scale", type=float, default=1.0, help="Output size relative to the frames")
+    parser.add_argument("--split", default=None, help="Only use this split of a sharded export")
+    parser.add_argument("--workers", type=int, default=CLIP_DECODE_WORKERS)
+    parser.add_argument(
+        "--palette-frames",
+        type=int,
+        default=GIF_PALETTE_FRAMES,
+        help="Leading frames the shared palette is built from",
+    )
+    return parser.parse_args()
 
 
-# Example usage
-image_folder = os.path.join(Path(__file__).parent.parent, ".temp")
-output_path = "output.gif"  # Replace with your desired output file path
-create_gif(image_folder, output_path)
+if __name__ == "__main__":
+    args = parse_args(default_duration=60)
+    create_gif(
+        args.source,
+        args.output_path,
+        args.duration,
+        args.loop,
+        args.scale,
+        args.split,
+        args.workers,
+        args.palette_frames,
+    )
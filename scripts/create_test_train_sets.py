@@ -1,22 +1,28 @@
+import argparse
 import os
 import shutil
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from batometer.datasetExport import ShardWriter, parse_split_policy  # noqa: E402
+
+
 def split_dataset(
-    input_folder='/Users/tom/Code/Bat-O-Meter/src/frame_txt_outputs',
-    dest_folder='/Users/tom/Code/Bat-O-Meter/src/yolo/train',
+    input_folder="/Users/tom/Code/Bat-O-Meter/src/frame_txt_outputs",
+    dest_folder="/Users/tom/Code/Bat-O-Meter/src/yolo/train",
     split_ratio=0.2,
 ):
     # Ensure destination folder exists
     os.makedirs(dest_folder, exist_ok=True)
 
     # Get all txt files and corresponding png files
-    txt_files = sorted([f for f in os.listdir(input_folder) if f.endswith('.txt')])
-    png_files = sorted([f for f in os.listdir(input_folder) if f.endswith('.png')])
+    txt_files = sorted([f for f in os.listdir(input_folder) if f.endswith(".txt")])
+    png_files = sorted([f for f in os.listdir(input_folder) if f.endswith(".png")])
 
     # Ensure matching txt and png files
-    frame_numbers = sorted([f.split('_')[1].split('.')[0] for f in txt_files])
-    png_frame_numbers = sorted([f.split('_')[1].split('.')[0] for f in png_files])
+    frame_numbers = sorted([f.split("_")[1].split(".")[0] for f in txt_files])
+    png_frame_numbers = sorted([f.split("_")[1].split(".")[0] for f in png_files])
     assert frame_numbers == png_frame_numbers, "Mismatch between txt and png files"
 
     # Calculate the number of files to move
@@ -26,39 +32,110 @@ def split_dataset(
         file_name = f"frame_{i}"
 
         # Move txt and png files
-        shutil.move(os.path.join(input_folder, f"{file_name}.txt"), os.path.join(dest_folder, f"{file_name}.txt"))
-        shutil.move(os.path.join(input_folder, f"{file_name}.png"), os.path.join(dest_folder, f"{file_name}.png"))
+        shutil.move(
+            os.path.join(input_folder, f"{file_name}.txt"), os.path.join(dest_folder, f"{file_name}.txt")
+        )
+        shutil.move(
+            os.path.join(input_folder, f"{file_name}.png"), os.path.join(dest_folder, f"{file_name}.png")
+        )
 
     print(f"Moved {num_files_to_move} txt and png files to {dest_folder}")
-    
-    
+
+
 def do():
     # Adjust this to your actual dataset root
     DATASET_DIR = Path("/Users/tom/Code/Bat-O-Meter/src/yolo")
 
     # Source folders
     source_folders = {
-        'train': DATASET_DIR / 'train',
-        'val': DATASET_DIR / 'test',  # assuming "test" is used for validation
+        "train": DATASET_DIR / "train",
+        "val": DATASET_DIR / "test",  # assuming "test" is used for validation
     }
 
     # Destination folders
-    for split in ['train', 'val']:
-        (DATASET_DIR / 'images' / split).mkdir(parents=True, exist_ok=True)
-        (DATASET_DIR / 'labels' / split).mkdir(parents=True, exist_ok=True)
+    for split in ["train", "val"]:
+        (DATASET_DIR / "images" / split).mkdir(parents=True, exist_ok=True)
+        (DATASET_DIR / "labels" / split).mkdir(parents=True, exist_ok=True)
 
     # Move files
     for split, folder in source_folders.items():
         for file in folder.glob("*"):
-            if file.suffix == '.png':
-                dest = DATASET_DIR / 'images' / split / file.name
-            elif file.suffix == '.txt':
-                dest = DATASET_DIR / 'labels' / split / file.name
+            if file.suffix == ".png":
+                dest = DATASET_DIR / "images" / split / file.name
+            elif file.suffix == ".txt":
+                dest = DATASET_DIR / "labels" / split / file.name
             else:
                 continue  # skip anything not .png or .txt
             shutil.copy2(file, dest)  # use .move if you want to delete originals
 
     print("✅ Dataset reorganized successfully!")
 
-if __name__ == '__main__':
-    do()
\ No newline at end of file
+
+def _frame_pairs(input_folder):
+    """Returns (frame number, png path, txt path) for every frame with both files, in frame order."""
+    folder = Path(input_folder)
+    frames = sorted(int(f.stem.split("_")[1]) for f in folder.glob("frame_*.txt"))
+    pairs = [(n, folder / f"frame_{n}.png", folder / f"frame_{n}.txt") for n in frames]
+    missing = [str(png) for _, png, _ in pairs if not png.exists()]
+    assert not missing, f"Missing png files: {missing[:5]}"
+    return pairs
+
+
+def write_split_index(input_folder, output_folder=None, split_ratio=0.2):
+    """
+    Splits a folder of frame_N.png/frame_N.txt pairs by writing train.txt and val.txt image lists.
+
+    The first `split_ratio` of the frames go to val, as with `split_dataset`, but nothing is moved or
+    copied; YOLO dataset configs can point `train:` and `val:` at the list files directly.
+    """
+    pairs = _frame_pairs(input_folder)
+    output = Path(output_folder or input_folder)
+    os.makedirs(output, exist_ok=True)
+    num_val = int(len(pairs) * split_ratio)
+    for split, split_pairs in (("val", pairs[:num_val]), ("train", pairs[num_val:])):
+        with open(output / f"{split}.txt", "w") as index_file:
+            index_file.writelines(f"{png.resolve()}\n" for _, png, _ in split_pairs)
+    print(f"Indexed {len(pairs) - num_val} train and {num_val} val frames in {output}")
+
+
+def pack_shards(input_folder, output_folder, shard_size=1000, split="ratio:0.2"):
+    """
+    Packs a folder of frame_N.png/frame_N.txt pairs into tar shards with an index, without re-encoding.
+
+    Read the result back with `batometer.datasetExport.iter_shard_samples`.
+    """
+    split_of = parse_split_policy(split)
+    shards = ShardWriter(output_folder, shard_size)
+    pairs = _frame_pairs(input_folder)
+    for sequence, (frame_num, png, txt) in enumerate(pairs):
+        split_name = split_of(frame_num)
+        shards.add(sequence, frame_num, split_name, png.name, png.read_bytes(), txt.name, txt.read_bytes())
+    shards.close()
+    print(f"Packed {len(pairs)} frames into {output_folder}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Split or pack per-frame training data")
+    commands = parser.add_subparsers(dest="command")
+    index_parser = commands.add_parser(
+        "index", help="Write train.txt/val.txt image lists instead of moving files"
+    )
+    index_parser.add_argument("input_folder")
+    index_parser.add_argument("--output-folder", default=None)
+    index_parser.add_argument("--split-ratio", type=float, default=0.2)
+    pack_parser = commands.add_parser("pack", help="Pack frames into tar shards with an index")
+    pack_parser.add_argument("input_folder")
+    pack_parser.add_argument("output_folder")
+    pack_parser.add_argument("--shard-size", type=int, default=1000)
+    pack_parser.add_argument(
+        "--split", default="ratio:0.2", help="none, before:FRAME or ratio:R[:BLOCK_FRAMES]"
+    )
+    commands.add_parser("reorganise", help="Copy train/test folders into the YOLO images/labels layout")
+    args = parser.parse_args()
+    match args.command:
+        case "index":
+            write_split_index(args.input_folder, args.output_folder, args.split_ratio)
+        case "pack":
+            pack_shards(args.input_folder, args.output_folder, args.shard_size, args.split)
+        case _:
+            do()
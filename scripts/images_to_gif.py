@@ -1,36 +1,14 @@
-import os
-from pathlib import Path
-
-from PIL import Image
-
-
-def create_gif(image_folder, output_path, duration=500, loop=0):
-    # Get a list of all image files in the directory
-    images = [
-        img for img in os.listdir(image_folder) if img.endswith((".png", ".jpg", ".jpeg", ".bmp", ".gif"))
-    ]
-
-    # Sort images to maintain the order
-    images.sort(key=lambda f: int("".join(filter(str.isdigit, f))))
-
-    # Load the images
-    frames = [Image.open(os.path.join(image_folder, image)) for image in images]
-
-    print("Opened frames")
-
-    # Save as GIF
-    frames[0].save(
-        output_path,
-        save_all=True,
-        append_images=frames[1:],
-        duration=duration,  # Duration between frames in milliseconds
-        loop=loop,  # 0 means loop forever
+from create_gif import create_gif, parse_args
+
+if __name__ == "__main__":
+    args = parse_args(default_duration=500)
+    create_gif(
+        args.source,
+        args.output_path,
+        args.duration,
+        args.loop,
+        args.scale,
+        args.split,
+        args.workers,
+        args.palette_frames,
     )
-
-    print(f"GIF created successfully and saved to {output_path}")
-
-
-# Example usage
-image_folder = os.path.join(Path(__file__).parent.parent, ".temp")  # Replace with your image folder path
-output_path = "output.gif"  # Replace with your desired output file path
-create_gif(image_folder, output_path)
@@ -1,35 +1,29 @@
-import os
-
-import cv2
-
-
-def images_to_mp4(folder_path, output_video_path, fps):
-    # Get all image files from the folder
-    image_files = [f for f in os.listdir(folder_path) if f.endswith((".png", ".jpg", ".jpeg"))]
-
-    # Sort files if needed (e.g., by name)
-    image_files.sort(key=lambda f: int("".join(filter(str.isdigit, f))))
-
-    # Check if there are any images
-    if not image_files:
-        print("No images found in the specified folder.")
-        exit()
-
-    # Read the first image to get dimensions
-    first_image_path = os.path.join(folder_path, image_files[0])
-    frame = cv2.imread(first_image_path)
-    height, width, layers = frame.shape
-
-    # Initialize the video writer
-    fourcc = cv2.VideoWriter.fourcc(*"mp4v")  # Codec for MP4
-    video_writer = cv2.VideoWriter(output_video_path, fourcc, fps, (width, height))
-
-    # Add each image to the video
-    for image_file in image_files:
-        image_path = os.path.join(folder_path, image_file)
-        frame = cv2.imread(image_path)
-        video_writer.write(frame)
-
-    # Release the video writer
-    video_writer.release()
-    print(f"Video saved as {output_video_path}")
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+from batometer.clipBuilder import CLIP_DECODE_WORKERS, iter_frames, write_mp4  # noqa: E402
+
+
+def images_to_mp4(folder_path, output_video_path, fps, scale=1.0, split=None, workers=CLIP_DECODE_WORKERS):
+    """
+    Streams a folder of numbered images (or a sharded dataset export) into an MP4.
+
+    Frames are decoded ahead on `workers` threads, only a small window at a time.
+    """
+    frames = iter_frames(folder_path, scale=scale, split=split, workers=workers)
+    count = write_mp4(frames, output_video_path, fps)
+    print(f"Video of {count} frames saved as {output_video_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream numbered images into an MP4")
+    parser.add_argument("folder_path", help="Folder of numbered images or sharded dataset export")
+    parser.add_argument("output_video_path")
+    parser.add_argument("--fps", type=float, default=30)
+    parser.add_argument("--scale", type=float, default=1.0, help="Output size relative to the frames")
+    parser.add_argument("--split", default=None, help="Only use this split of a sharded export")
+    parser.add_argument("--workers", type=int, default=CLIP_DECODE_WORKERS)
+    args = parser.parse_args()
+    images_to_mp4(args.folder_path, args.output_video_path, args.fps, args.scale, args.split, args.workers)
@@ -0,0 +1,184 @@
+import csv
+import logging
+import os
+from typing import Iterable, Optional
+
+import numpy as np
+
+from .analysis import get_direction
+from .constants import BATOMETER
+from .detectionObject import IdentifiedObject
+from .objectTracker import ObjectTracker
+from .trackAnalytics import BAT_SPEED, CONFIRMED_TRACK_POINTS, END_POINTS
+
+logger = logging.getLogger(f"{BATOMETER}.ActivitySummary")
+
+ACTIVITY_BIN_SECONDS = 60.0
+ACTIVITY_DIRECTIONS = ["right", "left", "down", "up"]
+ACTIVITY_COLUMNS = [
+    "bin",
+    "start_seconds",
+    "end_seconds",
+    "frames",
+    "detections",
+    "new_tracks",
+    "matched",  # Detections continuing a track
+    "max_live_tracks",
+    "confirmed_tracks",  # Tracks reaching more than CONFIRMED_TRACK_POINTS detections
+    "finished_tracks",  # Confirmed tracks that ended; the columns below describe these
+    *ACTIVITY_DIRECTIONS,
+    "mean_bat_likelihood",
+]
+
+
+def _direction_and_likelihood(obj: IdentifiedObject) -> tuple[str, float]:
+    # Same rules as trackAnalytics.track_features, for one finished track
+    points = obj.history_points().astype(np.float64)
+    incoming, outgoing = points[:END_POINTS].mean(axis=0), points[-END_POINTS:].mean(axis=0)
+    direction = get_direction(tuple(incoming), tuple(outgoing))
+    mean_step = np.hypot(*np.diff(points, axis=0).T).mean()
+    return direction, min(1.0, mean_step / BAT_SPEED)
+
+
+class ActivitySummaryWriter:
+    """
+    Aggregates tracking results into time bins as tracking runs, appending one CSV row per bin as soon
+    as the bin closes, so a run that is killed still leaves every finished bin on disk and the file can
+    be tailed during the run.
+
+    Each frame only the `ObjectTracker.update` results are read: new tracks are the matched objects with
+    a single position, confirmed tracks those just reaching more than `CONFIRMED_TRACK_POINTS` positions,
+    and finished tracks those just dropped for missing more than `max_missed_frames` frames. Only the
+    counters of the open bin are kept, so memory does not grow with the video length.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        tracker: ObjectTracker,
+        fps: float,
+        bin_seconds: float = ACTIVITY_BIN_SECONDS,
+        resume: Optional[dict] = None,
+    ) -> None:
+        """
+        Args:
+            path (str): Output CSV file.
+            tracker (ObjectTracker): The tracker whose results are summarised.
+            fps (float): Frames per second of the video, used to convert bins to times.
+            bin_seconds (float): Duration of each bin in seconds.
+            resume (Optional[dict]): State from `checkpoint`; rows written after it are removed.
+        """
+        self.path = path
+        self.tracker = tracker
+        self.fps = fps if fps and fps > 0 else 1.0
+        self.bin_seconds = bin_seconds
+        self.bin_frames = max(1, int(round(bin_seconds * self.fps)))
+        self.bins_written = resume["bin"] if resume else 0
+        self._current_bin = self.bins_written
+        self._bin = dict(resume["counters"]) if resume else self._empty_bin()
+        if resume:
+            self._file = open(path, "r+", newline="")
+            self._file.truncate(resume["offset"])
+            self._file.seek(resume["offset"])
+        else:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._file = open(path, "w", newline="")
+        self._writer = csv.writer(self._file, lineterminator="\n")
+        if not resume:
+            self._writer.writerow(ACTIVITY_COLUMNS)
+            self._file.flush()
+        logger.info(f"Writing activity summary to {path} ({self.bin_frames} frames per bin)")
+
+    def update(
+        self,
+        frame_num: int,
+        num_detections: int,
+        tracked: Iterable[IdentifiedObject],
+        predicted: Iterable[IdentifiedObject],
+    ) -> None:
+        """
+        Adds a frame's tracking results to its bin, closing the bin if it has ended.
+
+        Args:
+            frame_num (int): 1-based number of the frame just tracked.
+            num_detections (int): Detections passed to `ObjectTracker.update`, counted before the call as
+                it removes the matched ones.
+            tracked (Iterable[IdentifiedObject]): Objects matched or started in the frame.
+            predicted (Iterable[IdentifiedObject]): Live objects not matched in the frame.
+        """
+        frame_bin = (frame_num - 1) // self.bin_frames
+        # Frames may be skipped (e.g. dropped live frames); close any bins that ended unseen
+        while self._current_bin < frame_bin:
+            self._close_bin()
+        counters = self._bin
+        counters["frames"] += 1
+        counters["detections"] += num_detections
+        num_tracked = 0
+        for obj in tracked:
+            num_tracked += 1
+            num_points = len(obj.history_points())
+            if num_points == 1:
+                counters["new_tracks"] += 1
+            else:
+                counters["matched"] += 1
+                if num_points == CONFIRMED_TRACK_POINTS + 1:
+                    counters["confirmed_tracks"] += 1
+        num_predicted = 0
+        for obj in predicted:
+            num_predicted += 1
+            # Dropped by the tracker at its next update
+            if obj.missed_tracks == self.tracker.max_missed_frames + 1:
+                self._finish_track(obj)
+        counters["max_live_tracks"] = max(counters["max_live_tracks"], num_tracked + num_predicted)
+        if frame_num % self.bin_frames == 0:
+            self._close_bin()
+
+    def checkpoint(self) -> dict:
+        """
+        Returns:
+            dict: State to pass as `resume` to continue after the frames summarised so far.
+        """
+        return {"bin": self._current_bin, "counters": dict(self._bin), "offset": self._file.tell()}
+
+    def close(self) -> None:
+        """
+        Counts the tracks still live as finished and writes the final partial bin. If the video ended
+        with a bin, the tracks still live get a bin of their own.
+        """
+        for obj in self.tracker.current_potential_objects:
+            if obj.missed_tracks <= self.tracker.max_missed_frames:
+                self._finish_track(obj)
+        if self._bin["frames"] or self._bin["finished_tracks"]:
+            self._close_bin()
+        self._file.close()
+        logger.info(f"Saved {self.bins_written} activity bins to {self.path}")
+
+    def _finish_track(self, obj: IdentifiedObject) -> None:
+        if len(obj.history_points()) <= CONFIRMED_TRACK_POINTS:
+            return
+        direction, likelihood = _direction_and_likelihood(obj)
+        self._bin["finished_tracks"] += 1
+        self._bin[direction] += 1
+        self._bin["likelihood_sum"] += likelihood
+
+    def _close_bin(self) -> None:
+        counters = self._bin
+        start = self._current_bin * self.bin_frames / self.fps
+        end = (self._current_bin + 1) * self.bin_frames / self.fps
+        finished = counters["finished_tracks"]
+        mean_likelihood = counters["likelihood_sum"] / finished if finished else 0.0
+        self._writer.writerow(
+            [self._current_bin, f"{start:.3f}", f"{end:.3f}"]
+            + [counters[column] for column in ACTIVITY_COLUMNS[3:-1]]
+            + [f"{mean_likelihood:.4f}"]
+        )
+        self._file.flush()
+        self._bin = self._empty_bin()
+        self._current_bin += 1
+        self.bins_written = self._current_bin
+
+    @staticmethod
+    def _empty_bin() -> dict:
+        counters = {column: 0 for column in ACTIVITY_COLUMNS[3:-1]}
+        counters["likelihood_sum"] = 0.0
+        return counters
@@ -0,0 +1,94 @@
+import csv
+import logging
+from typing import Optional
+
+import numpy as np
+
+from .constants import BATOMETER
+from .objectTracker import ObjectTracker
+from .trackAnalytics import CONFIRMED_TRACK_POINTS, save_track_features, track_features
+
+logger = logging.getLogger(f"{BATOMETER}.analysis")
+
+BAT_ANALYSIS_PATH = "bat_analysis.csv"
+
+
+def get_direction(start: tuple[float, float], end: tuple[float, float]) -> str:
+    """
+    Maps the movement from start to end onto its dominant direction.
+
+    Args:
+        start (tuple[float, float]): Starting (x, y) position.
+        end (tuple[float, float]): Ending (x, y) position.
+
+    Returns:
+        str: One of "left", "right", "up" or "down".
+    """
+    dx = end[0] - start[0]
+    dy = end[1] - start[1]
+
+    if abs(dx) > abs(dy):
+        if dx > 0:
+            return "right"
+        else:
+            return "left"
+    else:
+        if dy > 0:
+            return "down"
+        else:
+            return "up"
+
+
+def summarise_tracks(tracker: ObjectTracker, features: Optional[dict[str, np.ndarray]] = None) -> list[dict]:
+    """
+    Summarises the direction and bat likelihood of every track longer than 10 detections.
+
+    Args:
+        tracker (ObjectTracker): The tracker after processing a video.
+        features (Optional[dict[str, np.ndarray]]): The tracker's `track_features`, if already computed.
+
+    Returns:
+        list[dict]: One row per track with its id, incoming/outgoing direction and bat likelihood.
+    """
+    if features is None:
+        features = track_features(tracker.all_objects)
+    confirmed = features["points"] > CONFIRMED_TRACK_POINTS
+    return [
+        {
+            "Object ID": obj_id,
+            "Incoming Direction": incoming,
+            "Outgoing Direction": outgoing,
+            "Likelihood of Bat": likelihood,
+        }
+        for obj_id, incoming, outgoing, likelihood in zip(
+            features["id"][confirmed].tolist(),
+            features["incoming_direction"][confirmed].tolist(),
+            features["outgoing_direction"][confirmed].tolist(),
+            features["bat_likelihood"][confirmed].tolist(),
+        )
+    ]
+
+
+def save_bat_analysis(
+    tracker: ObjectTracker, output_path: str = BAT_ANALYSIS_PATH, features_path: Optional[str] = None
+) -> None:
+    """
+    Writes the track summary to a CSV file, if any track qualifies.
+
+    Args:
+        tracker (ObjectTracker): The tracker after processing a video.
+        output_path (str): Path of the CSV file.
+        features_path (Optional[str]): Where to also write the feature table of every track (None to skip).
+    """
+    features = track_features(tracker.all_objects)
+    if features_path:
+        save_track_features(features, features_path)
+        logger.info(f"Track features of {len(features['id'])} tracks saved to {features_path}")
+    excel_data = summarise_tracks(tracker, features)
+    if excel_data:
+        # csv rather than pandas keeps pandas out of the import of every batometer entry point
+        with open(output_path, "w", newline="") as csv_file:
+            writer = csv.DictWriter(csv_file, fieldnames=list(excel_data[0]), lineterminator="\n")
+            writer.writeheader()
+            writer.writerows(excel_data)
+        logger.info(f"Saved track analysis to {output_path}")
@@ -0,0 +1,128 @@
+import logging
+import queue
+import threading
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from .constants import BATOMETER
+
+logger = logging.getLogger(f"{BATOMETER}.AnnotatedVideo")
+
+ANNOTATED_VIDEO_QUEUE_SIZE = 16  # Frames waiting for the encoder before `write` blocks
+ANNOTATED_VIDEO_FOURCC = "mp4v"
+
+
+class AnnotatedVideoWriter:
+    """
+    Encodes annotated frames to a video file on a dedicated encoder thread.
+
+    `write` only queues the frames; composing the side-by-side view, downscaling and encoding happen on
+    the encoder thread. The queue is bounded, so if encoding falls behind, `write` blocks rather than
+    memory growing. Downscaling and a frame stride reduce the encoding cost.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        fps: float,
+        scale: float = 1.0,
+        stride: int = 1,
+        side_by_side: bool = False,
+        queue_size: int = ANNOTATED_VIDEO_QUEUE_SIZE,
+        fourcc: str = ANNOTATED_VIDEO_FOURCC,
+    ) -> None:
+        """
+        Args:
+            path (str): Output video path, e.g. `annotated.mp4`.
+            fps (float): Frame rate of the source; the output plays at `fps / stride`, so in real time.
+            scale (float): Output size relative to the frames.
+            stride (int): Only every `stride`-th frame is written.
+            side_by_side (bool): Whether to place the foreground mask to the right of each frame.
+            queue_size (int): Frames queued for the encoder before `write` blocks.
+            fourcc (str): Codec of the output video.
+        """
+        self.path = path
+        self.fps = fps / stride
+        self.scale = scale
+        self.stride = stride
+        self.side_by_side = side_by_side
+        self.fourcc = fourcc
+        self.frames_written = 0
+        self._frames_seen = 0
+        self._video: Optional[cv2.VideoWriter] = None
+        self._error: Optional[BaseException] = None
+        self._queue: queue.Queue = queue.Queue(queue_size)
+        self._thread = threading.Thread(target=self._encode_loop, name="batometer-encode", daemon=True)
+        self._thread.start()
+
+    def write(self, frame: "cv2.typing.MatLike", mask: Optional["cv2.typing.MatLike"] = None) -> None:
+        """
+        Queues a frame for encoding, skipping frames according to the stride.
+
+        Args:
+            frame ("cv2.typing.MatLike"): The annotated BGR frame; it must not be modified afterwards.
+            mask (Optional["cv2.typing.MatLike"]): Foreground mask shown beside the frame with `side_by_side`.
+
+        Raises:
+            Exception: Any error from the encoder thread.
+        """
+        if self._error is not None:
+            raise self._error
+        self._frames_seen += 1
+        if (self._frames_seen - 1) % self.stride:
+            return
+        self._queue.put((frame, mask))
+
+    def _compose(
+        self, frame: "cv2.typing.MatLike", mask: Optional["cv2.typing.MatLike"]
+    ) -> "cv2.typing.MatLike":
+        if self.side_by_side and mask is not None:
+            frame = np.hstack((frame, cv2.cvtColor(mask, cv2.COLOR_GRAY2BGR) if mask.ndim == 2 else mask))
+        if self.scale != 1.0:
+            frame = cv2.resize(frame, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        return frame
+
+    def _encode_loop(self) -> None:
+        while True:
+            queued = self._queue.get()
+            if queued is None:
+                return
+            if self._error is not None:
+                continue  # Keep draining so `write` never blocks forever
+            try:
+                frame = self._compose(*queued)
+                if self._video is None:
+                    height, width = frame.shape[:2]
+                    self._video = cv2.VideoWriter(
+                        self.path, cv2.VideoWriter.fourcc(*self.fourcc), self.fps, (width, height)
+                    )
+                    if not self._video.isOpened():
+                        raise OSError(f"Failed to open {self.path} for writing")
+                self._video.write(frame)
+                self.frames_written += 1
+            except Exception as e:
+                logger.exception("Annotated video encoding failed")
+                self._error = e
+
+    def close(self) -> None:
+        """
+        Encodes the queued frames and finishes the video file.
+
+        Raises:
+            Exception: Any error from the encoder thread.
+        """
+        self._queue.put(None)
+        self._thread.join()
+        if self._video is not None:
+            self._video.release()
+        if self._error is not None:
+            raise self._error
+        logger.info(f"Saved {self.frames_written} annotated frames to {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
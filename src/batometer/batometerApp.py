@@ -1,23 +1,47 @@
 import os
+from collections import deque
+from typing import Optional
 
 import cv2
-import pandas as pd
 import logging 
 
-from .frameCache import FrameCacheEntry
+from .activitySummary import ACTIVITY_BIN_SECONDS, ActivitySummaryWriter
+from .analysis import save_bat_analysis
+from .annotatedVideo import AnnotatedVideoWriter
+from .cascadeDetector import CASCADE_MIN_SCORE
+from .checkpoint import (
+    CHECKPOINT_SECONDS,
+    CHECKPOINT_WARMUP_FRAMES,
+    Checkpoint,
+    load_checkpoint,
+    restore_tracking,
+    resume_video,
+    save_checkpoint,
+    tracking_state,
+)
+from .datasetExport import DatasetExporter, ExportConfig, yolo_labels
+from .detectionCache import DetectionCacheWriter, video_fingerprint
+from .detectors import create_detector
+from .frameCache import LIVE_FRAME_CACHE_MB, FrameCacheEntry
+from .gateCounter import GATE_BIN_SECONDS, GateCounter, load_gates
 from .heatmap import Heatmap
+from .hud import PipelineHud
 from .inputHandler import InputHandler
-from .objectfinder import ObjectFinder
 from .objectTracker import ObjectTracker
-from .videoManager import VideoManager
+from .onnxDetector import ONNX_BATCH_SIZE, ONNX_INPUT_SIZE, ONNX_MAX_LATENCY, ONNX_SCORE_THRESHOLD
+from .pipeline import PIPELINE_DETECT_WORKERS, PIPELINE_QUEUE_SIZE, FramePipeline, PipelineFrame
+from .profiler import StageProfiler
+from .resultsLog import ResultsLogWriter
+from .temporalHeatmap import TemporalHeatmapWriter
+from .trackStitching import STITCH_MAX_GAP, stitch_tracks
+from .videoManager import LiveVideoManager, VideoManager
 from .constants import BATOMETER
 from .window import (
     ImageTransformer,
     OverlayMode,
-    draw_detection_rectangle,
+    draw_gates,
     draw_overlay_text,
-    draw_predicted_object,
-    draw_tracked_object,
+    draw_tracking,
     resize_window_to_screen,
 )
 
@@ -26,195 +50,397 @@ FORMAT = "%(asctime)s %(levelname)-8s %(message)s"
 logging.basicConfig(level=logging.INFO, format=FORMAT)
 logger = logging.getLogger(BATOMETER)
 
+# Pipeline overlay written to the annotated video for each overlay mode; NONE writes the tracked frame
+OVERLAY_NAMES = {
+    OverlayMode.TRACKS: "tracks_overlay",
+    OverlayMode.FLOW: "flow_overlay",
+    OverlayMode.HEATMAP: "heatmap_overlay",
+}
+
 
 class BatometerApp:
-    def __init__(self, video_path):
+    def __init__(
+        self,
+        video_path,
+        heatmap_cube_path: Optional[str] = None,
+        heatmap_cube_bin_seconds: float = 60.0,
+        heatmap_cube_source: str = "pixel",
+        results_log_path: Optional[str] = None,
+        track_features_path: Optional[str] = None,
+        gates_path: Optional[str] = None,
+        gate_counts_path: Optional[str] = None,
+        gate_bin_seconds: float = GATE_BIN_SECONDS,
+        activity_summary_path: Optional[str] = None,
+        activity_bin_seconds: float = ACTIVITY_BIN_SECONDS,
+        stitch: bool = False,
+        stitch_max_gap: int = STITCH_MAX_GAP,
+        detection_cache_dir: Optional[str] = None,
+        profile: bool = False,
+        profile_csv_path: Optional[str] = None,
+        hud: bool = False,
+        live: bool = False,
+        frame_cache_mb: Optional[float] = None,
+        detect_workers: int = PIPELINE_DETECT_WORKERS,
+        queue_size: int = PIPELINE_QUEUE_SIZE,
+        dataset_export: Optional[ExportConfig] = None,
+        annotated_video_path: Optional[str] = None,
+        annotated_video_overlay: OverlayMode = OverlayMode.NONE,
+        annotated_video_objects: bool = False,
+        annotated_video_scale: float = 1.0,
+        annotated_video_stride: int = 1,
+        checkpoint_path: Optional[str] = None,
+        checkpoint_seconds: float = CHECKPOINT_SECONDS,
+        resume: bool = False,
+        resume_warmup_frames: Optional[int] = CHECKPOINT_WARMUP_FRAMES,
+        detector: str = "mog2",
+        detector_model_path: Optional[str] = None,
+        detector_input_size: int = ONNX_INPUT_SIZE,
+        detector_batch_size: int = ONNX_BATCH_SIZE,
+        detector_max_latency: float = ONNX_MAX_LATENCY,
+        detector_score_threshold: float = ONNX_SCORE_THRESHOLD,
+        min_detection_score: Optional[float] = None,
+        merge_gap: Optional[int] = None,
+        merge_iou: Optional[float] = None,
+    ):
+        if live and detection_cache_dir and not os.path.isfile(video_path):
+            raise ValueError("Detection caching needs a video file, not a camera or stream")
+        if live and checkpoint_path:
+            raise ValueError("Checkpoints need a video file, not a camera or stream")
+        if resume and not checkpoint_path:
+            raise ValueError("Resuming needs the checkpoint path")
         self.video_path = video_path
-        self.objectFinder = ObjectFinder()
+        self.live = live
+        self.detect_workers = detect_workers
+        if live:
+            # Every buffered frame adds latency, and a batch would wait for frames arriving at the source rate
+            queue_size = detector_batch_size = 1
+        self.queue_size = queue_size
+        self.dataset_export = dataset_export
+        self.annotated_video_path = annotated_video_path
+        self.annotated_video_overlay = annotated_video_overlay
+        self.annotated_video_objects = annotated_video_objects
+        self.annotated_video_scale = annotated_video_scale
+        self.annotated_video_stride = annotated_video_stride
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_seconds = checkpoint_seconds
+        self.resume = resume
+        self.resume_warmup_frames = resume_warmup_frames
+        self.heatmap_cube_path = heatmap_cube_path
+        self.heatmap_cube_bin_seconds = heatmap_cube_bin_seconds
+        self.heatmap_cube_source = heatmap_cube_source
+        self.results_log_path = results_log_path
+        self.track_features_path = track_features_path
+        self.gates = load_gates(gates_path) if gates_path else []
+        self.gate_counts_path = gate_counts_path
+        self.gate_bin_seconds = gate_bin_seconds
+        self.activity_summary_path = activity_summary_path
+        self.activity_bin_seconds = activity_bin_seconds
+        self.stitch = stitch
+        self.stitch_max_gap = stitch_max_gap
+        self.detection_cache_dir = detection_cache_dir
+        if min_detection_score is None:
+            min_detection_score = CASCADE_MIN_SCORE if detector == "cascade" else 0.0
+        self.min_detection_score = min_detection_score
+        # The HUD shows per-stage times, so it needs the profiler recording
+        self.profiler = StageProfiler(enabled=profile or hud, csv_path=profile_csv_path)
+        # Pipeline stages run on their own threads and report their times with each frame
+        self.detector = create_detector(
+            detector,
+            detector_model_path,
+            input_size=detector_input_size,
+            batch_size=detector_batch_size,
+            max_latency=detector_max_latency,
+            score_threshold=detector_score_threshold,
+            merge_gap=merge_gap,
+            merge_iou=merge_iou,
+            profiler=self.profiler,
+        )
         self.img_transformer = ImageTransformer()
-        self.input_handler = InputHandler()
-        self.frame_cache: list[FrameCacheEntry] = []
+        self.input_handler = InputHandler(show_hud=hud)
+        self.frame_cache: deque[FrameCacheEntry] = deque()
+        self.frame_cache_bytes = 0
+        # A live source never ends, so its cache is always bounded; a video file is cached whole by default
+        if frame_cache_mb is None and live:
+            frame_cache_mb = LIVE_FRAME_CACHE_MB
+        self.frame_cache_max_bytes = frame_cache_mb * 2**20 if frame_cache_mb is not None else None
         self.window_name = "Batometer"
 
     def run(self):
+        profiler = self.profiler
         cv2.namedWindow(self.window_name, cv2.WINDOW_NORMAL)
-        with VideoManager(self.video_path) as video_manager:
+        video_source = LiveVideoManager(self.video_path) if self.live else VideoManager(self.video_path)
+        with video_source as video_manager:
             heatmap = Heatmap(video_manager.width, video_manager.height)
-            tracker = ObjectTracker(video_manager.width, video_manager.height)
+            tracker = ObjectTracker(
+                video_manager.width,
+                video_manager.height,
+                min_score=self.min_detection_score,
+                profiler=profiler,
+            )
             logger.info(f"Width: {video_manager.width} Height: {video_manager.height}")
-
-            while video_manager.has_more_frames():
-                if self.input_handler.is_autoplay:
-                    frame = video_manager.read_frame()
-                    original_frame = frame.copy()
-
-                    # Identify objects
-                    detections, objects_frame = self.objectFinder.update(frame)
-                    tracked_detections, predicted_objs = tracker.update(detections)
-                    heatmap.update(tracked_detections)
-
-                    # Draw tracks on frame
-                    for detection in detections:
-                        draw_detection_rectangle(frame, detection)
-                    for obj in predicted_objs:
-                        draw_predicted_object(frame, obj)
-                    for obj in tracked_detections:
-                        draw_tracked_object(frame, obj)
-
-                    # Create overlays
-                    tracker_overlay = tracker.create_overlay(frame)
-                    heatmap_overlay = tracker.create_heatmap_overlay(original_frame)
-                    flow_overlay = heatmap.create_flow_overlay(frame)
-
-                    # Add to cache
-                    self.frame_cache.append(
-                        FrameCacheEntry(
-                            frame.copy(),
-                            objects_frame.copy(),
-                            tracker_overlay.copy(),
-                            flow_overlay.copy(),
-                            heatmap_overlay.copy(),
-                            video_manager.frame_num,
-                            video_manager.frame_time,
-                            detections,
-                            tracked_detections,
-                        )
-                    )
-                    self.input_handler.current_paused_frame_idx = video_manager.frame_num - 1
-                    
-                    
-                    # Generate YOLO training data
-                    txt_data = []
-                    for obj in tracked_detections:
-                        if len(obj.history) > 10:
-                            txt_data.append(f"0 {obj.point.x / video_manager.width} {obj.point.y / video_manager.width} {obj.width / video_manager.width} {obj.height / video_manager.width}")
-
-                    val_output_folder = "/Users/tom/Code/Bat-O-Meter/src/yolo/labels"
-                    png_output_folder = "/Users/tom/Code/Bat-O-Meter/src/yolo/images"
-                    if video_manager.frame_num < 554:
-                        val_output_folder += "/val"
-                        png_output_folder += "/val"
-                        os.makedirs(val_output_folder, exist_ok=True)
-                        os.makedirs(png_output_folder, exist_ok=True)
-                    else:
-                        val_output_folder += "/train"
-                        png_output_folder += "/train"
-                        os.makedirs(val_output_folder, exist_ok=True)
-                        os.makedirs(png_output_folder, exist_ok=True)
-                        
-                    png_output_path = os.path.join(png_output_folder, f"frame_{video_manager.frame_num}.png")
-                    val_output_folder = os.path.join(val_output_folder, f"frame_{video_manager.frame_num}.txt")
-
-                    with open(val_output_folder, "w") as txt_file:
-                        txt_file.write("\n".join(txt_data))
-                    cv2.imwrite(png_output_path, original_frame)
-
-                else:
-                    frame_cache_entry = self.frame_cache[self.input_handler.current_paused_frame_idx]
-                    frame = frame_cache_entry.video_frame
-                    objects_frame = frame_cache_entry.objects_frame  # Ensure objects_frame is defined
-
-                frame = draw_overlay_text(
-                    frame, self.input_handler.is_autoplay, self.input_handler.current_paused_frame_idx, video_manager.max_frames
+            hud = PipelineHud(video_manager.fps, profiler)
+            checkpoint = None
+            if self.resume:
+                detector_params = self.detector.params()
+                checkpoint = load_checkpoint(self.checkpoint_path, self.video_path, detector_params)
+                restore_tracking(checkpoint.tracking, tracker, heatmap)
+            resumed_outputs = checkpoint.outputs if checkpoint is not None else {}
+            cube_writer = self._create_heatmap_cube_writer(
+                video_manager, tracker, heatmap, resumed_outputs.get("heatmap_cube")
+            )
+            results_log = None
+            if self.results_log_path:
+                results_log = ResultsLogWriter(
+                    self.results_log_path, resume=resumed_outputs.get("results_log")
                 )
-                match self.input_handler.overlay_mode:
-                    case OverlayMode.TRACKS:
-                        video_overlay_frame = self.frame_cache[
-                            self.input_handler.current_paused_frame_idx
-                        ].tracks_frame
-                    case OverlayMode.FLOW:
-                        video_overlay_frame = self.frame_cache[
-                            self.input_handler.current_paused_frame_idx
-                        ].flow_frame
-                    case OverlayMode.HEATMAP:
-                        video_overlay_frame = self.frame_cache[
-                            self.input_handler.current_paused_frame_idx
-                        ].heatmap_frame
-                    case _:
-                        video_overlay_frame = frame
-
-                if not self.input_handler.show_objects:
-                    display_frame = video_overlay_frame
-                else:
-                    display_frame = self.img_transformer.images_side_by_side(
-                        video_overlay_frame, objects_frame, "Frame", "Objects"
+            gate_counter = None
+            if self.gates:
+                gate_counter = GateCounter(
+                    self.gates,
+                    video_manager.fps,
+                    bin_seconds=self.gate_bin_seconds,
+                    output_path=self.gate_counts_path,
+                    resume=resumed_outputs.get("gate_counter"),
+                )
+            activity_summary = None
+            if self.activity_summary_path:
+                activity_summary = ActivitySummaryWriter(
+                    self.activity_summary_path,
+                    tracker,
+                    video_manager.fps,
+                    bin_seconds=self.activity_bin_seconds,
+                    resume=resumed_outputs.get("activity_summary"),
+                )
+            detection_cache = None
+            if self.detection_cache_dir:
+                detection_cache = DetectionCacheWriter(
+                    self.detection_cache_dir,
+                    self.video_path,
+                    self.detector.params(),
+                    video_manager.width,
+                    video_manager.height,
+                    video_manager.fps,
+                    resumed_outputs.get("detection_cache"),
+                )
+            exporter = None
+            if self.dataset_export:
+                exporter = DatasetExporter(self.dataset_export, resumed_outputs.get("dataset_export"))
+            annotated_video = None
+            if self.annotated_video_path:
+                annotated_video_path = self.annotated_video_path
+                if checkpoint is not None:
+                    # An encoded video cannot be appended to, so a resumed run starts a new segment
+                    root, extension = os.path.splitext(annotated_video_path)
+                    annotated_video_path = f"{root}_from_{checkpoint.frame_num + 1}{extension}"
+                annotated_video = AnnotatedVideoWriter(
+                    annotated_video_path,
+                    video_manager.fps,
+                    scale=self.annotated_video_scale,
+                    stride=self.annotated_video_stride,
+                    side_by_side=self.annotated_video_objects,
+                )
+            annotated_overlay = OVERLAY_NAMES.get(self.annotated_video_overlay)
+            if checkpoint is not None:
+                # The warm-up frames are not part of the run, so their detector timings are dropped
+                with profiler.collect({}):
+                    resume_video(
+                        video_manager, self.detector, checkpoint.frame_num, self.resume_warmup_frames
                     )
-                cv2.imshow(self.window_name, display_frame)
-
-                # Only set window size once, after window creation and first frame
-                if self.input_handler.current_paused_frame_idx == 0:
-                    display_frame_height, display_frame_width = display_frame.shape[:2]
-                    resize_window_to_screen(self.window_name, display_frame_width, display_frame_height)
-
-                key = cv2.waitKey(0 if not self.input_handler.is_autoplay else 30)
-                action = self.input_handler.handle_key(key, len(self.frame_cache))
-                if action == "exit":
-                    break
-
-        # Define a helper function to map directions
-        def get_direction(start, end):
-            dx = end[0] - start[0]
-            dy = end[1] - start[1]
-
-            if abs(dx) > abs(dy):
-                if dx > 0:
-                    return "right"
-                else:
-                    return "left"
-            else:
-                if dy > 0:
-                    return "down"
-                else:
-                    return "up"
-
-        excel_data = []
-        for obj in tracker.all_objects:
-            if len(obj.history) > 10:
-                # Filter out None values from history
-                valid_history = [point for point in obj.history if point is not None]
-
-                if len(valid_history) > 10:
-                    # Calculate average position of the first 20 frames
-                    first_20 = valid_history[:20]
-                    avg_incoming_x = sum(point.x for point in first_20) / len(first_20)
-                    avg_incoming_y = sum(point.y for point in first_20) / len(first_20)
-
-                    # Calculate average position of the last 20 frames
-                    last_20 = valid_history[-20:]
-                    avg_outgoing_x = sum(point.x for point in last_20) / len(last_20)
-                    avg_outgoing_y = sum(point.y for point in last_20) / len(last_20)
-
-                    # Translate directions to descriptive terms
-                    incoming_desc = get_direction(
-                        (avg_incoming_x, avg_incoming_y), (avg_outgoing_x, avg_outgoing_y)
+            checkpoint_frames = max(1, round(self.checkpoint_seconds * video_manager.fps))
+            fingerprint = video_fingerprint(self.video_path) if self.checkpoint_path else ""
+            original_frame = None
+
+            def track(item: PipelineFrame) -> None:
+                # Runs on the track thread, in frame order
+                # The tracker removes matched detections from the set it is given
+                item.raw_detections = set(item.detections)
+                num_detections = len(item.raw_detections)
+                item.tracked, item.predicted = tracker.update(item.detections)
+                heatmap.update(item.tracked)
+                if results_log is not None:
+                    results_log.append_frame(item.frame_num, item.tracked, item.predicted)
+                if cube_writer is not None:
+                    cube_writer.update(item.frame_num, self._heatmap_cube_grid(tracker, heatmap))
+                draw_tracking(item.frame, item.detections, item.tracked, item.predicted)
+                if activity_summary is not None:
+                    activity_summary.update(item.frame_num, num_detections, item.tracked, item.predicted)
+                if gate_counter is not None:
+                    gate_counter.update(item.frame_num, item.tracked)
+                    draw_gates(item.frame, gate_counter.gates, gate_counter.totals())
+                item.live_tracks = len(tracker.current_potential_objects)
+                if exporter is not None:
+                    # Labels are taken now, while the tracks describe this frame
+                    item.labels = yolo_labels(item.tracked, video_manager.width, video_manager.height)
+                if self.checkpoint_path and item.frame_num % checkpoint_frames == 0:
+                    # Tracking state is taken now; the write stage adds its outputs when it reaches this frame
+                    item.checkpoint = Checkpoint(
+                        item.frame_num,
+                        fingerprint,
+                        self.detector.params(),
+                        tracking_state(tracker, heatmap),
                     )
-                    outgoing_desc = get_direction(
-                        (avg_outgoing_x, avg_outgoing_y), (avg_incoming_x, avg_incoming_y)
+                    if results_log is not None:
+                        item.checkpoint.outputs["results_log"] = results_log.checkpoint()
+                    if cube_writer is not None:
+                        item.checkpoint.outputs["heatmap_cube"] = cube_writer.checkpoint()
+                    if gate_counter is not None:
+                        item.checkpoint.outputs["gate_counter"] = gate_counter.checkpoint()
+                    if activity_summary is not None:
+                        item.checkpoint.outputs["activity_summary"] = activity_summary.checkpoint()
+
+            def write(item: PipelineFrame) -> None:
+                # Runs on the write thread
+                if detection_cache is not None:
+                    detection_cache.append(item.frame_num, item.raw_detections)
+                if exporter is not None:
+                    exporter.export(item.frame_num, item.original_frame, item.labels)
+                if annotated_video is not None:
+                    annotated_frame = item.overlays[annotated_overlay] if annotated_overlay else item.frame
+                    annotated_video.write(annotated_frame, item.objects_frame)
+                if item.checkpoint is not None:
+                    if detection_cache is not None:
+                        item.checkpoint.outputs["detection_cache"] = detection_cache.checkpoint()
+                    if exporter is not None:
+                        item.checkpoint.outputs["dataset_export"] = exporter.checkpoint()
+                    save_checkpoint(self.checkpoint_path, item.checkpoint)
+
+            # Overlays read the tracker state, so they run while the track stage waits for them
+            renderers = {
+                "tracks_overlay": lambda item: tracker.create_overlay(item.frame),
+                "heatmap_overlay": lambda item: tracker.create_heatmap_overlay(item.original_frame),
+                "flow_overlay": lambda item: heatmap.create_flow_overlay(item.frame),
+            }
+            pipeline = FramePipeline(
+                video_manager,
+                self.detector,
+                track,
+                renderers,
+                (
+                    write
+                    if self.checkpoint_path
+                    or any(output is not None for output in (detection_cache, exporter, annotated_video))
+                    else None
+                ),
+                detect_workers=self.detect_workers,
+                queue_size=self.queue_size,
+                profiler=profiler,
+                drop_stale=self.live,
+            )
+            window_sized = False
+
+            with pipeline:
+                while True:
+                    last_frame_num = None
+                    if self.input_handler.is_autoplay:
+                        # Take every finished frame, so the display rate does not throttle processing
+                        items = pipeline.get_available()
+                        if not items:
+                            break
+                        for item in items:
+                            self.frame_cache.append(
+                                FrameCacheEntry(
+                                    item.frame,
+                                    item.objects_frame,
+                                    item.overlays["tracks_overlay"],
+                                    item.overlays["flow_overlay"],
+                                    item.overlays["heatmap_overlay"],
+                                    item.frame_num,
+                                    item.frame_time,
+                                    item.detections,
+                                    item.tracked,
+                                )
+                            )
+                            self.frame_cache_bytes += self.frame_cache[-1].nbytes()
+                            self._trim_frame_cache()
+                            hud.frame_processed(
+                                item.live_tracks,
+                                self.frame_cache_bytes,
+                                video_manager.dropped_frames + pipeline.dropped_frames,
+                            )
+                            if last_frame_num is not None:
+                                profiler.end_frame(last_frame_num)
+                            for name, (wall, cpu) in item.timings.items():
+                                profiler.record(name, wall, cpu)
+                            last_frame_num = item.frame_num
+                        original_frame = items[-1].original_frame
+                        # Index by cache position, as live sources skip frame numbers when dropping frames
+                        self.input_handler.current_paused_frame_idx = len(self.frame_cache) - 1
+                        frame_cache_entry = self.frame_cache[-1]
+                    else:
+                        hud.idle()
+                        frame_cache_entry = self.frame_cache[self.input_handler.current_paused_frame_idx]
+                    # Keep the status bar out of the cache, whose frames may still be queued for encoding
+                    frame = frame_cache_entry.video_frame.copy()
+                    objects_frame = frame_cache_entry.objects_frame
+
+                    frame = draw_overlay_text(
+                        frame,
+                        self.input_handler.is_autoplay,
+                        self.input_handler.current_paused_frame_idx,
+                        video_manager.max_frames,
                     )
+                    if self.input_handler.show_hud:
+                        frame = hud.draw(frame)
+                    match self.input_handler.overlay_mode:
+                        case OverlayMode.TRACKS:
+                            video_overlay_frame = self.frame_cache[
+                                self.input_handler.current_paused_frame_idx
+                            ].tracks_frame
+                        case OverlayMode.FLOW:
+                            video_overlay_frame = self.frame_cache[
+                                self.input_handler.current_paused_frame_idx
+                            ].flow_frame
+                        case OverlayMode.HEATMAP:
+                            video_overlay_frame = self.frame_cache[
+                                self.input_handler.current_paused_frame_idx
+                            ].heatmap_frame
+                        case _:
+                            video_overlay_frame = frame
 
-                    # Calculate likelihood of being a bat based on movement
-                    movement_pattern = [
-                        (
-                            valid_history[i + 1].x - valid_history[i].x,
-                            valid_history[i + 1].y - valid_history[i].y,
+                    if not self.input_handler.show_objects:
+                        display_frame = video_overlay_frame
+                    else:
+                        display_frame = self.img_transformer.images_side_by_side(
+                            video_overlay_frame, objects_frame, "Frame", "Objects"
                         )
-                        for i in range(len(valid_history) - 1)
-                    ]
-                    likelihood_bat = tracker.calculate_bat_likelihood(movement_pattern)
-
-                    # Store data for Excel
-                    obj_data = {
-                        "Object ID": obj.id,
-                        "Incoming Direction": incoming_desc,
-                        "Outgoing Direction": outgoing_desc,
-                        "Likelihood of Bat": likelihood_bat,
-                    }
-                    excel_data.append(obj_data)
-        if excel_data:
-            df = pd.DataFrame(excel_data)
-            output_path = "bat_analysis.csv"
-            df.to_csv(output_path, index=False)
-            print(f"Excel spreadsheet saved to {output_path}")
+                    with profiler.stage("display"):
+                        cv2.imshow(self.window_name, display_frame)
+
+                        # Only set window size once, after window creation and first frame
+                        if not window_sized:
+                            display_frame_height, display_frame_width = display_frame.shape[:2]
+                            resize_window_to_screen(
+                                self.window_name, display_frame_width, display_frame_height
+                            )
+                            window_sized = True
+
+                        key = cv2.waitKey(0 if not self.input_handler.is_autoplay else 1 if self.live else 30)
+                    if last_frame_num is not None:
+                        profiler.end_frame(last_frame_num)
+                    action = self.input_handler.handle_key(key, len(self.frame_cache))
+                    if action == "exit":
+                        break
+
+            if cube_writer is not None:
+                cube_writer.close()
+            if results_log is not None:
+                results_log.close()
+            if gate_counter is not None:
+                gate_counter.close()
+            if activity_summary is not None:
+                activity_summary.close()
+            if detection_cache is not None:
+                detection_cache.close(original_frame, complete=pipeline.completed)
+            if exporter is not None:
+                exporter.close()
+            if annotated_video is not None:
+                annotated_video.close()
+            profiler.close()
+            self.detector.close()
+
+        if self.stitch:
+            tracker.all_objects = set(stitch_tracks(tracker.all_objects, max_gap=self.stitch_max_gap))
+        save_bat_analysis(tracker, features_path=self.track_features_path)
 
         # Save
         heatmap_output_path = "heatmap.png"
@@ -223,3 +449,43 @@ class BatometerApp:
         )
 
         cv2.destroyAllWindows()
+
+    def _trim_frame_cache(self) -> None:
+        # Drops the oldest frames beyond the budget, keeping the paused position on the same frame
+        if self.frame_cache_max_bytes is None:
+            return
+        input_handler = self.input_handler
+        while self.frame_cache_bytes > self.frame_cache_max_bytes and len(self.frame_cache) > 1:
+            self.frame_cache_bytes -= self.frame_cache.popleft().nbytes()
+            input_handler.current_paused_frame_idx = max(0, input_handler.current_paused_frame_idx - 1)
+
+    def _create_heatmap_cube_writer(
+        self,
+        video_manager: VideoManager,
+        tracker: ObjectTracker,
+        heatmap: Heatmap,
+        resume: Optional[dict] = None,
+    ) -> Optional[TemporalHeatmapWriter]:
+        if not self.heatmap_cube_path:
+            return None
+        grid = self._heatmap_cube_grid(tracker, heatmap)
+        scale = tracker.pixel_heatmap.scale if self.heatmap_cube_source == "pixel" else 1 / heatmap.grid_size
+        return TemporalHeatmapWriter(
+            self.heatmap_cube_path,
+            grid.shape,
+            video_manager.fps,
+            bin_seconds=self.heatmap_cube_bin_seconds,
+            expected_frames=video_manager.max_frames,
+            source=self.heatmap_cube_source,
+            scale=scale,
+            resume=resume,
+        )
+
+    def _heatmap_cube_grid(self, tracker: ObjectTracker, heatmap: Heatmap):
+        match self.heatmap_cube_source:
+            case "pixel":
+                return tracker.pixel_heatmap.accumulator
+            case "flow":
+                return heatmap.direction_count_grid
+            case _:
+                raise ValueError(f"Unknown heatmap cube source: {self.heatmap_cube_source}")
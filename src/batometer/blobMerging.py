@@ -0,0 +1,116 @@
+from typing import Iterable, Optional
+
+import numpy as np
+
+from .detectionObject import Detection, Point
+
+MERGE_MAX_GAP = 8  # Pixels between the boxes of wings split apart by the morphological opening
+
+
+def _find(parent: list[int], node: int) -> int:
+    while parent[node] != node:
+        parent[node] = parent[parent[node]]  # Path halving
+        node = parent[node]
+    return node
+
+
+def merge_detections(
+    detections: Iterable[Detection], max_gap: Optional[int] = MERGE_MAX_GAP, min_iou: Optional[float] = None
+) -> set[Detection]:
+    """
+    Merges the boxes of blobs that are likely one object, e.g. the wings of a bat split into separate
+    contours, into one detection covering them all.
+
+    Two boxes are joined when at most `max_gap` pixels separate them (0 for touching or overlapping
+    boxes), or when their intersection over union reaches `min_iou`; joins are transitive, so a chain of
+    close blobs becomes one detection. Rather than comparing every pair, each box is put into the cells
+    of a uniform grid its gap-expanded box covers, and only boxes sharing a cell are compared, so the
+    cost grows with the number of blobs and not its square. Joined boxes are grouped with a union-find.
+
+    Args:
+        detections (Iterable[Detection]): Detections of one frame.
+        max_gap (Optional[int]): Largest gap in pixels between boxes of one object (None to merge by
+            overlap only).
+        min_iou (Optional[float]): Intersection over union at which overlapping boxes are merged (None to
+            merge by gap only).
+
+    Returns:
+        set[Detection]: One detection per group, with the bounding box of its members and their highest
+            score. Detections not joined to any other are returned unchanged.
+    """
+    detections = list(detections)
+    if len(detections) < 2 or (max_gap is None and min_iou is None):
+        return set(detections)
+    boxes = np.array(
+        [(det.point.x, det.point.y, det.width, det.height) for det in detections], dtype=np.int64
+    )
+    x1, y1 = boxes[:, 0], boxes[:, 1]
+    x2, y2 = x1 + boxes[:, 2], y1 + boxes[:, 3]
+    # Overlap-only merging needs boxes to share pixels, so their cells only need to cover the boxes
+    reach = max_gap if max_gap is not None else 0
+    cell_size = max(1, int(np.median(np.maximum(boxes[:, 2], boxes[:, 3]))) + reach)
+
+    # Each box is listed once in every cell its box, grown by half the gap on each side, covers
+    low_x, low_y = (x1 - reach / 2) // cell_size, (y1 - reach / 2) // cell_size
+    high_x, high_y = (x2 + reach / 2) // cell_size, (y2 + reach / 2) // cell_size
+    span_x = (high_x - low_x + 1).astype(np.int64)
+    num_cells = span_x * (high_y - low_y + 1).astype(np.int64)
+    entry_box = np.repeat(np.arange(len(boxes)), num_cells)
+    entry_rank = np.arange(len(entry_box)) - np.repeat(np.cumsum(num_cells) - num_cells, num_cells)
+    cell_x = (low_x[entry_box] + entry_rank % span_x[entry_box]).astype(np.int64)
+    cell_y = (low_y[entry_box] + entry_rank // span_x[entry_box]).astype(np.int64)
+    cell_keys = (cell_y - cell_y.min()) * (cell_x.max() - cell_x.min() + 1) + (cell_x - cell_x.min())
+    order = np.argsort(cell_keys, kind="stable")
+    cell_keys, entry_box = cell_keys[order], entry_box[order]
+
+    # Pair every entry with the later entries of its cell
+    group_end = np.searchsorted(cell_keys, cell_keys, side="right")
+    partners = group_end - np.arange(len(cell_keys)) - 1
+    first = np.repeat(np.arange(len(cell_keys)), partners)
+    second = first + 1 + np.arange(len(first)) - np.repeat(np.cumsum(partners) - partners, partners)
+    a, b = entry_box[first], entry_box[second]
+    pairs = np.unique(np.minimum(a, b) * len(boxes) + np.maximum(a, b))
+    a, b = pairs // len(boxes), pairs % len(boxes)
+
+    gap_x = np.maximum(x1[a], x1[b]) - np.minimum(x2[a], x2[b])
+    gap_y = np.maximum(y1[a], y1[b]) - np.minimum(y2[a], y2[b])
+    joined = np.zeros(len(a), dtype=bool)
+    if max_gap is not None:
+        joined |= np.maximum(gap_x, gap_y) <= max_gap
+    if min_iou is not None:
+        intersection = np.maximum(-gap_x, 0) * np.maximum(-gap_y, 0)
+        areas = boxes[:, 2] * boxes[:, 3]
+        union = areas[a] + areas[b] - intersection
+        joined |= (intersection > 0) & (intersection >= min_iou * union)
+
+    parent = list(range(len(boxes)))
+    for box_a, box_b in zip(a[joined].tolist(), b[joined].tolist()):
+        root_a, root_b = _find(parent, box_a), _find(parent, box_b)
+        if root_a != root_b:
+            parent[max(root_a, root_b)] = min(root_a, root_b)
+    roots = np.array([_find(parent, box) for box in range(len(boxes))])
+
+    groups, group = np.unique(roots, return_inverse=True)
+    merged_x1 = np.full(len(groups), np.iinfo(np.int64).max)
+    merged_y1 = np.full(len(groups), np.iinfo(np.int64).max)
+    merged_x2 = np.full(len(groups), np.iinfo(np.int64).min)
+    merged_y2 = np.full(len(groups), np.iinfo(np.int64).min)
+    np.minimum.at(merged_x1, group, x1)
+    np.minimum.at(merged_y1, group, y1)
+    np.maximum.at(merged_x2, group, x2)
+    np.maximum.at(merged_y2, group, y2)
+    scores = np.zeros(len(groups))
+    np.maximum.at(scores, group, [det.score for det in detections])
+    sizes = np.bincount(group, minlength=len(groups))
+
+    merged = {det for det, size in zip(detections, sizes[group].tolist()) if size == 1}
+    for index in np.flatnonzero(sizes > 1).tolist():
+        merged.add(
+            Detection(
+                Point(int(merged_x1[index]), int(merged_y1[index])),
+                int(merged_x2[index] - merged_x1[index]),
+                int(merged_y2[index] - merged_y1[index]),
+                float(scores[index]),
+            )
+        )
+    return merged
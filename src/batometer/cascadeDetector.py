@@ -0,0 +1,127 @@
+import logging
+import threading
+
+import cv2
+
+from .constants import BATOMETER
+from .detectionCache import video_fingerprint
+from .detectionObject import Detection
+from .detectorBackend import DetectorBackend
+from .objectfinder import ObjectFinder
+
+logger = logging.getLogger(f"{BATOMETER}.CascadeDetector")
+
+CASCADE_CROP_SIZE = 32  # Side of the square crops the classifier takes
+CASCADE_CROP_PADDING = 0.25  # Context added around each box, as a fraction of its size
+CASCADE_BATCH_SIZE = 64  # Crops per classifier inference
+CASCADE_MIN_SCORE = 0.5  # Default tracker threshold in cascade mode
+
+
+class CascadeDetector(DetectorBackend):
+    """
+    Finds moving blobs with an `ObjectFinder`, then scores each with a small bat/not-bat classifier.
+
+    Only the blobs are classified: each box is padded, cropped from the frame, resized to a small fixed
+    size and classified in batches of up to `batch_size`, so the cost grows with the number of blobs
+    rather than the frame area. The score is stored on each `Detection`; it is up to the tracker
+    (`ObjectTracker.min_score`) to ignore low-scoring blobs such as insects and leaves.
+
+    The classifier is an ONNX model taking a (batch, 3, size, size) RGB input scaled to [0, 1] and
+    returning the bat probability, either as (batch, 1) or as (batch, classes) with bats as the last class.
+    """
+
+    stateful = True
+
+    def __init__(
+        self,
+        object_finder: ObjectFinder,
+        model_path: str,
+        crop_size: int = CASCADE_CROP_SIZE,
+        crop_padding: float = CASCADE_CROP_PADDING,
+        batch_size: int = CASCADE_BATCH_SIZE,
+    ) -> None:
+        """
+        Args:
+            object_finder (ObjectFinder): Proposes the blobs.
+            model_path (str): Path of the `.onnx` classifier.
+            crop_size (int): Side of the square classifier input.
+            crop_padding (float): Context added on each side of a box, as a fraction of its size.
+            batch_size (int): Maximum crops per inference.
+        """
+        self.object_finder = object_finder
+        self.model_path = model_path
+        self.crop_size = crop_size
+        self.crop_padding = crop_padding
+        self.batch_size = batch_size
+        self.net = cv2.dnn.readNetFromONNX(model_path)
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        # collect runs on the pipeline's extract pool, and a network cannot run two inferences at once
+        self._net_lock = threading.Lock()
+        self._model_fingerprint = video_fingerprint(model_path)
+        self.crops = 0
+        self.batches = 0
+        logger.info(f"Loaded classifier {model_path} // Crop size: {crop_size} - Batch size: {batch_size}")
+
+    def params(self) -> dict:
+        return {
+            **self.object_finder.params(),
+            "detector": "cascade",
+            "classifier": self._model_fingerprint,
+            "crop_size": self.crop_size,
+            "crop_padding": self.crop_padding,
+        }
+
+    def submit(self, frame: "cv2.typing.MatLike") -> tuple["cv2.typing.MatLike", "cv2.typing.MatLike"]:
+        return frame, self.object_finder.subtract(frame)
+
+    def collect(
+        self, pending: tuple["cv2.typing.MatLike", "cv2.typing.MatLike"]
+    ) -> tuple[set[Detection], "cv2.typing.MatLike"]:
+        frame, fgmask = pending
+        detections, mask = self.object_finder.extract(fgmask)
+        boxes = list(detections)
+        scores = self.classify(frame, boxes)
+        return {Detection(det.point, det.width, det.height, score) for det, score in zip(boxes, scores)}, mask
+
+    def warm_up(self, frame: "cv2.typing.MatLike") -> None:
+        self.object_finder.warm_up(frame)
+
+    def close(self) -> None:
+        if self.batches:
+            logger.info(f"Classified {self.crops} blobs in {self.batches} batches")
+
+    def classify(self, frame: "cv2.typing.MatLike", boxes: list[Detection]) -> list[float]:
+        """
+        Scores the blobs of a frame.
+
+        Args:
+            frame (cv2.typing.MatLike): The BGR frame the boxes were found in.
+            boxes (list[Detection]): The blobs.
+
+        Returns:
+            list[float]: Bat probability of each box, in order.
+        """
+        if not boxes:
+            return []
+        crops = [self._crop(frame, box) for box in boxes]
+        scores = []
+        for start in range(0, len(crops), self.batch_size):
+            batch = crops[start : start + self.batch_size]
+            blob = cv2.dnn.blobFromImages(batch, 1 / 255, swapRB=True)
+            with self._net_lock:
+                self.net.setInput(blob)
+                output = self.net.forward()
+                self.crops += len(batch)
+                self.batches += 1
+            scores.extend(output.reshape(len(batch), -1)[:, -1].tolist())
+        return scores
+
+    def _crop(self, frame: "cv2.typing.MatLike", box: Detection) -> "cv2.typing.MatLike":
+        height, width = frame.shape[:2]
+        pad_x = int(box.width * self.crop_padding)
+        pad_y = int(box.height * self.crop_padding)
+        x1, y1 = max(0, box.point.x - pad_x), max(0, box.point.y - pad_y)
+        x2 = min(width, box.point.x + box.width + pad_x)
+        y2 = min(height, box.point.y + box.height + pad_y)
+        return cv2.resize(frame[y1:y2, x1:x2], (self.crop_size, self.crop_size), interpolation=cv2.INTER_AREA)
@@ -0,0 +1,164 @@
+import logging
+import os
+import pickle
+from dataclasses import dataclass, field
+from typing import Optional
+
+from .constants import BATOMETER
+from .detectionCache import video_fingerprint
+from .detectorBackend import DetectorBackend
+from .heatmap import Heatmap
+from .objectTracker import ObjectTracker
+from .videoManager import VideoManager
+
+logger = logging.getLogger(f"{BATOMETER}.Checkpoint")
+
+CHECKPOINT_VERSION = 3
+CHECKPOINT_SECONDS = 300.0  # Video time between checkpoints
+CHECKPOINT_WARMUP_FRAMES = 1000  # Frames replayed into the background model on resume
+
+
+@dataclass
+class Checkpoint:
+    """
+    Everything needed to continue processing a video after a given frame.
+
+    Attributes:
+        frame_num (int): Last frame whose results are included.
+        fingerprint (str): `video_fingerprint` of the video, so a checkpoint is never applied to another one.
+        detector_params (dict): Parameters of the detector that produced the tracks.
+        tracking (bytes): Pickled tracker and flow heatmap state, see `tracking_state`.
+        outputs (dict[str, dict]): Resume state of each output writer by name, from its `checkpoint` method.
+        version (int): Format version.
+    """
+
+    frame_num: int
+    fingerprint: str
+    detector_params: dict
+    tracking: bytes
+    outputs: dict[str, dict] = field(default_factory=dict)
+    version: int = CHECKPOINT_VERSION
+
+
+def tracking_state(tracker: ObjectTracker, heatmap: Heatmap) -> bytes:
+    """
+    Snapshots the tracker (every track with its history, the live tracks, `id_count`, `frame_count` and
+    the pixel heatmap) and the flow heatmap accumulators.
+
+    Args:
+        tracker (ObjectTracker): The tracker after the checkpoint frame.
+        heatmap (Heatmap): The flow heatmap after the checkpoint frame.
+
+    Returns:
+        bytes: Pickled state; it does not change when tracking continues.
+    """
+    return pickle.dumps(
+        {
+            "all_objects": sorted(tracker.all_objects, key=lambda obj: obj.id),
+            "live_ids": sorted(obj.id for obj in tracker.current_potential_objects),
+            "id_count": tracker.id_count,
+            "frame_count": tracker.frame_count,
+            "pixel_heatmap": tracker.pixel_heatmap,
+            "direction_sum_grid": heatmap.direction_sum_grid,
+            "direction_count_grid": heatmap.direction_count_grid,
+        },
+        protocol=pickle.HIGHEST_PROTOCOL,
+    )
+
+
+def restore_tracking(state: bytes, tracker: ObjectTracker, heatmap: Heatmap) -> None:
+    """
+    Restores a freshly created tracker and flow heatmap from `tracking_state`.
+
+    Args:
+        state (bytes): Pickled state.
+        tracker (ObjectTracker): Tracker to restore into.
+        heatmap (Heatmap): Flow heatmap to restore into.
+    """
+    tracking = pickle.loads(state)
+    live_ids = set(tracking["live_ids"])
+    tracker.all_objects = set(tracking["all_objects"])
+    tracker.current_potential_objects = {obj for obj in tracking["all_objects"] if obj.id in live_ids}
+    tracker.id_count = tracking["id_count"]
+    tracker.frame_count = tracking["frame_count"]
+    tracker.pixel_heatmap = tracking["pixel_heatmap"]
+    heatmap.direction_sum_grid = tracking["direction_sum_grid"]
+    heatmap.direction_count_grid = tracking["direction_count_grid"]
+
+
+def save_checkpoint(path: str, checkpoint: Checkpoint) -> None:
+    """
+    Writes a checkpoint atomically, so a crash while saving leaves the previous one intact.
+
+    Args:
+        path (str): Checkpoint file.
+        checkpoint (Checkpoint): The checkpoint.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as checkpoint_file:
+        pickle.dump(checkpoint, checkpoint_file, protocol=pickle.HIGHEST_PROTOCOL)
+        checkpoint_file.flush()
+        os.fsync(checkpoint_file.fileno())
+    os.replace(tmp_path, path)
+    logger.info(f"Saved checkpoint at frame {checkpoint.frame_num} to {path}")
+
+
+def load_checkpoint(path: str, video_path: str, detector_params: dict) -> Checkpoint:
+    """
+    Loads a checkpoint and checks that it belongs to this video and detector. Checkpoints are pickles,
+    so only load files you wrote yourself.
+
+    Args:
+        path (str): Checkpoint file.
+        video_path (str): Video being resumed.
+        detector_params (dict): Parameters of the detector, e.g. `ObjectFinder.params()`.
+
+    Returns:
+        Checkpoint: The checkpoint.
+
+    Raises:
+        FileNotFoundError: If there is no checkpoint.
+        ValueError: If the checkpoint is for another video, detector or format version.
+    """
+    if not os.path.isfile(path):
+        raise FileNotFoundError(f"No checkpoint at {path}")
+    with open(path, "rb") as checkpoint_file:
+        checkpoint: Checkpoint = pickle.load(checkpoint_file)
+    if checkpoint.version != CHECKPOINT_VERSION:
+        raise ValueError(f"Checkpoint {path} has version {checkpoint.version}, expected {CHECKPOINT_VERSION}")
+    if checkpoint.fingerprint != video_fingerprint(video_path):
+        raise ValueError(f"Checkpoint {path} was written for a different video")
+    if checkpoint.detector_params != detector_params:
+        raise ValueError(f"Checkpoint {path} was written with other detector parameters")
+    return checkpoint
+
+
+def resume_video(
+    video_manager: VideoManager,
+    detector: DetectorBackend,
+    frame_num: int,
+    warmup_frames: Optional[int] = CHECKPOINT_WARMUP_FRAMES,
+) -> None:
+    """
+    Positions the video after a checkpoint frame and rebuilds the background model of a stateful detector.
+
+    OpenCV cannot save a MOG2 model, so it is rebuilt by replaying the frames before the checkpoint into
+    it. Its memory fades with `history` frames, so after a few times `history` frames the model (and
+    with it the detections) is practically the one of an uninterrupted run; replaying from the first
+    frame reproduces it exactly, at the cost of decoding the whole processed part again.
+
+    Args:
+        video_manager (VideoManager): Freshly opened video.
+        detector (DetectorBackend): Freshly created detector; a stateless one needs no replay.
+        frame_num (int): Checkpoint frame; the next frame read is `frame_num + 1`.
+        warmup_frames (Optional[int]): Frames replayed into the background model; None replays from the start.
+    """
+    if not detector.stateful:
+        logger.info(f"Resuming after frame {frame_num}")
+        video_manager.seek(frame_num)
+        return
+    start = 0 if warmup_frames is None else max(0, frame_num - warmup_frames)
+    logger.info(f"Resuming after frame {frame_num}, warming up the background model from frame {start + 1}")
+    video_manager.seek(start)
+    while video_manager.frame_num < frame_num:
+        detector.warm_up(video_manager.read_frame())
@@ -0,0 +1,229 @@
+import itertools
+import logging
+import os
+import re
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional, TypeVar
+
+import cv2
+import numpy as np
+
+from .constants import BATOMETER
+from .datasetExport import SHARD_INDEX, iter_shard_records
+
+logger = logging.getLogger(f"{BATOMETER}.ClipBuilder")
+
+CLIP_IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+CLIP_DECODE_WORKERS = 4
+CLIP_WINDOW = 16  # Frames decoded ahead of the encoder; bounds memory whatever the clip length
+GIF_PALETTE_FRAMES = 8  # Leading frames the shared GIF palette is built from
+GIF_COLORS = 256
+
+_T = TypeVar("_T")
+_R = TypeVar("_R")
+
+
+def ordered_map(
+    function: Callable[[_T], _R],
+    items: Iterable[_T],
+    workers: int = CLIP_DECODE_WORKERS,
+    window: int = CLIP_WINDOW,
+) -> Iterator[_R]:
+    """
+    Maps `function` over `items` on a thread pool, yielding results in order.
+
+    At most `window` items are in flight, so only a small part of a long stream is ever in memory.
+
+    Args:
+        function (Callable[[_T], _R]): Applied to every item; OpenCV calls release the GIL, so decoding and
+            resizing run in parallel.
+        items (Iterable[_T]): Consumed lazily.
+        workers (int): Threads.
+        window (int): Items submitted ahead of the one being yielded.
+
+    Yields:
+        _R: Results, in the order of `items`.
+    """
+    with ThreadPoolExecutor(workers, thread_name_prefix="batometer-decode") as pool:
+        pending: deque[Future] = deque()
+        for item in items:
+            pending.append(pool.submit(function, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def frame_number(file_name: str) -> int:
+    """
+    Args:
+        file_name (str): Image name such as `frame-12.png` or `frame_12.jpg`.
+
+    Returns:
+        int: The last number in the name, so `frame-9` sorts before `frame-10`; -1 without any.
+    """
+    numbers = re.findall(r"\d+", file_name)
+    return int(numbers[-1]) if numbers else -1
+
+
+def _resize(frame: "cv2.typing.MatLike", scale: float) -> "cv2.typing.MatLike":
+    if scale == 1.0:
+        return frame
+    return cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+
+def _read_video(path: str) -> Iterator["cv2.typing.MatLike"]:
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise FileNotFoundError(f"Could not open {path}")
+    try:
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                return
+            yield frame
+    finally:
+        capture.release()
+
+
+def iter_frames(
+    source: str,
+    scale: float = 1.0,
+    split: Optional[str] = None,
+    workers: int = CLIP_DECODE_WORKERS,
+    window: int = CLIP_WINDOW,
+) -> Iterator["cv2.typing.MatLike"]:
+    """
+    Streams the frames of a folder of images, a sharded dataset export or a video, downscaled once.
+
+    Images are decoded and resized on a pool of `workers` threads, at most `window` frames ahead.
+
+    Args:
+        source (str): A folder of numbered images (e.g. from `utils.save_image_to_temp`), a folder written
+            with `--export-shard-size` (it holds `index.csv`), or a video file such as the annotated video.
+        scale (float): Output size relative to the source frames.
+        split (Optional[str]): For a sharded export, only use the frames of this split.
+        workers (int): Decode threads.
+        window (int): Frames decoded ahead of the consumer.
+
+    Yields:
+        cv2.typing.MatLike: BGR frames in order.
+
+    Raises:
+        FileNotFoundError: If the source does not exist or holds no frames.
+    """
+    if os.path.isfile(os.path.join(source, SHARD_INDEX)):
+        images = (np.frombuffer(image, dtype=np.uint8) for _, image, _ in iter_shard_records(source, split))
+        yield from ordered_map(
+            lambda image: _resize(cv2.imdecode(image, cv2.IMREAD_COLOR), scale), images, workers, window
+        )
+    elif os.path.isdir(source):
+        names = [name for name in os.listdir(source) if name.lower().endswith(CLIP_IMAGE_EXTENSIONS)]
+        names.sort(key=frame_number)
+        if not names:
+            raise FileNotFoundError(f"No images found in {source}")
+        paths = (os.path.join(source, name) for name in names)
+        yield from ordered_map(lambda path: _resize(cv2.imread(path), scale), paths, workers, window)
+    else:
+        yield from ordered_map(lambda frame: _resize(frame, scale), _read_video(source), workers, window)
+
+
+def _fit(frame: "cv2.typing.MatLike", size: tuple[int, int]) -> "cv2.typing.MatLike":
+    # Every frame of a video or GIF has the size of the first
+    if (frame.shape[1], frame.shape[0]) != size:
+        frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    return frame
+
+
+def write_mp4(
+    frames: Iterable["cv2.typing.MatLike"], output_path: str, fps: float, fourcc: str = "mp4v"
+) -> int:
+    """
+    Encodes a stream of frames to a video, holding one frame at a time.
+
+    Args:
+        frames (Iterable[cv2.typing.MatLike]): BGR frames, e.g. from `iter_frames`.
+        output_path (str): Output video path.
+        fps (float): Frame rate of the output.
+        fourcc (str): Codec of the output.
+
+    Returns:
+        int: Number of frames written.
+    """
+    video_writer = None
+    count = 0
+    try:
+        for frame in frames:
+            if video_writer is None:
+                size = (frame.shape[1], frame.shape[0])
+                video_writer = cv2.VideoWriter(output_path, cv2.VideoWriter.fourcc(*fourcc), fps, size)
+                if not video_writer.isOpened():
+                    raise OSError(f"Failed to open {output_path} for writing")
+            video_writer.write(_fit(frame, size))
+            count += 1
+    finally:
+        if video_writer is not None:
+            video_writer.release()
+    logger.info(f"Saved {count} frames to {output_path}")
+    return count
+
+
+def write_gif(
+    frames: Iterable["cv2.typing.MatLike"],
+    output_path: str,
+    duration: int = 60,
+    loop: int = 0,
+    palette_frames: int = GIF_PALETTE_FRAMES,
+    workers: int = CLIP_DECODE_WORKERS,
+    window: int = CLIP_WINDOW,
+) -> int:
+    """
+    Encodes a stream of frames to an animated GIF, writing each frame as soon as it is encoded.
+
+    One 256-colour palette is built from the first `palette_frames` frames and stored once as the global
+    colour table. Every frame is mapped onto it without dithering, which keeps the colours of static
+    background from shimmering between frames, and LZW-encoded on a pool of `workers` threads.
+
+    Args:
+        frames (Iterable[cv2.typing.MatLike]): BGR frames, e.g. from `iter_frames`.
+        output_path (str): Output GIF path.
+        duration (int): Time each frame is shown in milliseconds.
+        loop (int): Number of loops; 0 loops forever.
+        palette_frames (int): Leading frames sampled for the palette.
+        workers (int): Encoder threads.
+        window (int): Frames encoded ahead of the writer.
+
+    Returns:
+        int: Number of frames written.
+
+    Raises:
+        FileNotFoundError: If there are no frames.
+    """
+    from PIL import GifImagePlugin, Image
+
+    frames = iter(frames)
+    leading = [frame for _, frame in zip(range(palette_frames), frames)]
+    if not leading:
+        raise FileNotFoundError("No frames to write")
+    size = (leading[0].shape[1], leading[0].shape[0])
+    sample = np.vstack([cv2.cvtColor(_fit(frame, size), cv2.COLOR_BGR2RGB) for frame in leading])
+    palette = Image.fromarray(sample).quantize(GIF_COLORS, method=Image.Quantize.MEDIANCUT)
+
+    def encode(frame: "cv2.typing.MatLike") -> list[bytes]:
+        image = Image.fromarray(cv2.cvtColor(_fit(frame, size), cv2.COLOR_BGR2RGB))
+        image = image.quantize(palette=palette, dither=Image.Dither.NONE)
+        return GifImagePlugin.getdata(image, duration=duration)
+
+    count = 0
+    with open(output_path, "wb") as gif_file:
+        first = Image.new("P", size)
+        first.putpalette(palette.getpalette())
+        header, _ = GifImagePlugin.getheader(first, info={"loop": loop, "duration": duration})
+        gif_file.writelines(header)
+        for encoded in ordered_map(encode, itertools.chain(leading, frames), workers, window):
+            gif_file.writelines(encoded)
+            count += 1
+        gif_file.write(b";")  # Trailer
+    logger.info(f"Saved {count} frames to {output_path}")
+    return count
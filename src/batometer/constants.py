@@ -9,3 +9,4 @@ SPACE_KEYS = [ord(" ")]
 TRACK_OVERLAY_KEYS = [ord("t"), ord("T")]
 HEATMAP_OVERLAY_KEYS = [ord("h"), ord("H")]
 FLOW_OVERLAY_KEYS = [ord("f"), ord("F")]
+HUD_KEYS = [ord("p"), ord("P")]
@@ -0,0 +1,443 @@
+import csv
+import io
+import logging
+import os
+import tarfile
+import threading
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional
+
+import cv2
+import numpy as np
+
+from .constants import BATOMETER
+from .detectionObject import IdentifiedObject
+
+logger = logging.getLogger(f"{BATOMETER}.DatasetExport")
+
+EXPORT_MIN_TRACK_LENGTH = 10  # Only objects tracked for longer than this are labelled
+EXPORT_SPLITS = ("train", "val")
+SHARD_DIR = "shards"
+SHARD_INDEX = "index.csv"
+SHARD_INDEX_COLUMNS = ("frame", "split", "shard", "image", "label")
+
+
+@dataclass
+class ExportConfig:
+    """
+    Settings of a YOLO training-data export.
+
+    Attributes:
+        output_root (str): Root directory; samples go to `images/<split>/` and `labels/<split>/`.
+        split (str): Split policy, see `parse_split_policy`.
+        image_format (str): "png" or "jpg".
+        jpeg_quality (int): JPEG quality (0-100), used for "jpg".
+        png_compression (int): PNG compression level (0-9); lower is faster and larger.
+        workers (int): Threads encoding and writing samples.
+        max_pending (int): Samples queued for writing before `export` blocks, bounding memory.
+        skip_empty (bool): Whether to skip frames without any labelled object.
+        shard_size (int): Samples per tar shard; 0 writes one image and one label file per sample instead.
+    """
+
+    output_root: str
+    split: str = "ratio:0.2"
+    image_format: str = "png"
+    jpeg_quality: int = 95
+    png_compression: int = 1
+    workers: int = 2
+    max_pending: int = 16
+    skip_empty: bool = True
+    shard_size: int = 0
+
+
+def _open_appending(path: Path, offset: Optional[int], newline: Optional[str] = None) -> io.TextIOWrapper:
+    # Reopens an index file cut back to a checkpoint offset, or starts it afresh
+    if offset is None:
+        return open(path, "w", newline=newline)
+    index_file = open(path, "a", newline=newline)
+    index_file.truncate(offset)
+    return index_file
+
+
+def parse_split_policy(policy: str) -> Callable[[int], str]:
+    """
+    Parses a split policy into a function from frame number to split name.
+
+    - "none": every frame is "train".
+    - "before:N": frames before N are "val", the rest "train".
+    - "ratio:R[:B]": blocks of B consecutive frames (default 250) are assigned to "val" with probability R,
+      by a hash of the block number. Whole blocks are assigned so near-identical neighbouring frames do
+      not end up on both sides of the split, and the same frame always lands in the same split.
+
+    Args:
+        policy (str): The policy.
+
+    Returns:
+        Callable[[int], str]: Split of a frame number.
+
+    Raises:
+        ValueError: If the policy is not recognised.
+    """
+    kind, _, arg = policy.partition(":")
+    match kind:
+        case "none":
+            return lambda frame_num: "train"
+        case "before":
+            first_train_frame = int(arg)
+            return lambda frame_num: "val" if frame_num < first_train_frame else "train"
+        case "ratio":
+            ratio_text, _, block_text = arg.partition(":")
+            ratio, block = float(ratio_text), int(block_text or 250)
+            return lambda frame_num: (
+                "val" if zlib.crc32((frame_num // block).to_bytes(8, "little")) / 2**32 < ratio else "train"
+            )
+        case _:
+            raise ValueError(f"Unknown split policy: {policy}")
+
+
+def yolo_labels(objects: Iterable[IdentifiedObject], width: int, height: int) -> list[str]:
+    """
+    Args:
+        objects (Iterable[IdentifiedObject]): Objects tracked in a frame.
+        width (int): Frame width.
+        height (int): Frame height.
+
+    Returns:
+        list[str]: YOLO label lines (class, normalised centre and size) of the objects tracked for longer
+            than `EXPORT_MIN_TRACK_LENGTH` frames.
+    """
+    return [
+        f"0 {(obj.point.x + obj.width / 2) / width:.6f} {(obj.point.y + obj.height / 2) / height:.6f} "
+        f"{obj.width / width:.6f} {obj.height / height:.6f}"
+        for obj in objects
+        if len(obj.history) > EXPORT_MIN_TRACK_LENGTH
+    ]
+
+
+class ShardWriter:
+    """
+    Appends samples to a sequence of tar shards, with a CSV index and one list file per split.
+
+    Instead of millions of small files, each shard holds `shard_size` samples (an image and a label
+    member each). `index.csv` records the frame, split, shard and member names of every sample, and
+    `<split>.txt` lists `<shard>:<image member>` per sample, so splits are index files rather than folders.
+    Safe to call from several threads: each sample carries a sequence number, and a thread adding a sample
+    waits for the samples before it, so shards and index files are in the order the samples were queued.
+    """
+
+    def __init__(self, root: str, shard_size: int, resume: Optional[dict] = None) -> None:
+        """
+        Args:
+            root (str): Output directory.
+            shard_size (int): Samples per shard.
+            resume (Optional[dict]): State from `checkpoint`; shards and index lines written after it are
+                discarded.
+        """
+        self.root = Path(root)
+        self.shard_size = shard_size
+        os.makedirs(self.root / SHARD_DIR, exist_ok=True)
+        self._lock = threading.Lock()
+        self._turn = threading.Condition(self._lock)
+        self._next_sequence = 0
+        self._tar: Optional[tarfile.TarFile] = None
+        self._shard_name = ""
+        self._num_shards = resume["shards"] if resume else 0
+        self._in_shard = 0
+        for shard_path in (self.root / SHARD_DIR).glob("shard_*.tar"):
+            if int(shard_path.stem.split("_")[1]) >= self._num_shards:
+                shard_path.unlink()
+        self._index_file = _open_appending(self.root / SHARD_INDEX, resume["index"] if resume else None, "")
+        self._index = csv.writer(self._index_file)
+        if not resume:
+            self._index.writerow(SHARD_INDEX_COLUMNS)
+        offsets = resume["splits"] if resume else dict.fromkeys(EXPORT_SPLITS)
+        self._split_files = {
+            split: _open_appending(self.root / f"{split}.txt", offsets[split]) for split in EXPORT_SPLITS
+        }
+
+    def add(
+        self,
+        sequence: int,
+        frame_num: int,
+        split: str,
+        image_name: str,
+        image: bytes,
+        label_name: str,
+        label: bytes,
+    ) -> None:
+        """
+        Appends one sample to the current shard once every earlier sample is added, starting a new shard
+        when it is full.
+
+        Args:
+            sequence (int): Position of the sample, counting from 0 for each writer.
+            frame_num (int): Frame number of the sample.
+            split (str): Split of the sample.
+            image_name (str): Member name of the encoded image.
+            image (bytes): Encoded image.
+            label_name (str): Member name of the label file.
+            label (bytes): Label file contents.
+        """
+        with self._turn:
+            self._turn.wait_for(lambda: self._next_sequence == sequence)
+            try:
+                if self._tar is None or self._in_shard >= self.shard_size:
+                    self._next_shard()
+                for name, data in ((image_name, image), (label_name, label)):
+                    info = tarfile.TarInfo(name)
+                    info.size = len(data)
+                    self._tar.addfile(info, io.BytesIO(data))
+                self._in_shard += 1
+                self._index.writerow((frame_num, split, self._shard_name, image_name, label_name))
+                self._split_files[split].write(f"{self._shard_name}:{image_name}\n")
+            finally:
+                self._advance()
+
+    def skip(self, sequence: int) -> None:
+        """
+        Gives up the place of a sample that will not be added, e.g. because it failed to encode.
+
+        Args:
+            sequence (int): Position of the sample.
+        """
+        with self._turn:
+            self._turn.wait_for(lambda: self._next_sequence == sequence)
+            self._advance()
+
+    def _advance(self) -> None:
+        self._next_sequence += 1
+        self._turn.notify_all()
+
+    def _next_shard(self) -> None:
+        if self._tar is not None:
+            self._tar.close()
+        self._shard_name = f"{SHARD_DIR}/shard_{self._num_shards:06d}.tar"
+        self._tar = tarfile.open(self.root / self._shard_name, "w")
+        self._num_shards += 1
+        self._in_shard = 0
+
+    def checkpoint(self) -> dict:
+        """
+        Finishes the current shard, so the next sample starts a new one, and flushes the index files.
+
+        Returns:
+            dict: State to pass as `resume` to continue after the samples added so far.
+        """
+        with self._lock:
+            if self._tar is not None:
+                self._tar.close()
+                self._tar = None
+            self._index_file.flush()
+            for split_file in self._split_files.values():
+                split_file.flush()
+            return {
+                "shards": self._num_shards,
+                "index": self._index_file.tell(),
+                "splits": {split: split_file.tell() for split, split_file in self._split_files.items()},
+            }
+
+    def close(self) -> None:
+        """
+        Finishes the current shard and the index files.
+        """
+        with self._lock:
+            if self._tar is not None:
+                self._tar.close()
+                self._tar = None
+            self._index_file.close()
+            for split_file in self._split_files.values():
+                split_file.close()
+        logger.info(f"Wrote {self._num_shards} shards to {self.root / SHARD_DIR}")
+
+
+def iter_shard_records(root: str, split: Optional[str] = None) -> Iterator[tuple[int, bytes, list[str]]]:
+    """
+    Reads samples back from a sharded export without decoding the images, one shard at a time.
+
+    Args:
+        root (str): Directory written by `ShardWriter`.
+        split (Optional[str]): Only yield samples of this split.
+
+    Yields:
+        tuple[int, bytes, list[str]]: Frame number, encoded image and label lines.
+    """
+    root_path = Path(root)
+    with open(root_path / SHARD_INDEX, newline="") as index_file:
+        rows = [row for row in csv.DictReader(index_file) if split is None or row["split"] == split]
+    by_shard: dict[str, list[dict]] = {}
+    for row in rows:
+        by_shard.setdefault(row["shard"], []).append(row)
+    for shard, shard_rows in by_shard.items():
+        with tarfile.open(root_path / shard) as tar:
+            for row in shard_rows:
+                label = tar.extractfile(row["label"]).read().decode()
+                yield int(row["frame"]), tar.extractfile(row["image"]).read(), label.splitlines()
+
+
+def iter_shard_samples(root: str, split: Optional[str] = None) -> Iterator[tuple[int, np.ndarray, list[str]]]:
+    """
+    Reads samples back from a sharded export, one shard at a time.
+
+    Args:
+        root (str): Directory written by `ShardWriter`.
+        split (Optional[str]): Only yield samples of this split.
+
+    Yields:
+        tuple[int, np.ndarray, list[str]]: Frame number, decoded BGR image and label lines.
+    """
+    for frame_num, image, labels in iter_shard_records(root, split):
+        yield frame_num, cv2.imdecode(np.frombuffer(image, dtype=np.uint8), cv2.IMREAD_COLOR), labels
+
+
+class DatasetExporter:
+    """
+    Writes frames and their labels as a YOLO dataset on a pool of writer threads.
+
+    `export` hands a sample to the pool and returns straight away; it only blocks when `max_pending`
+    samples are already waiting, so a slow disk cannot grow memory without bound. With a `shard_size`,
+    samples are packed into tar shards (see `ShardWriter`) instead of one image and label file each.
+    Either way, `<split>.txt` index files list the samples of each split.
+    """
+
+    def __init__(self, config: ExportConfig, resume: Optional[dict] = None) -> None:
+        """
+        Args:
+            config (ExportConfig): Export settings.
+            resume (Optional[dict]): State from `checkpoint` to continue from.
+
+        Raises:
+            ValueError: If the image format or split policy is not recognised.
+        """
+        if config.image_format not in ("png", "jpg"):
+            raise ValueError(f"Unknown image format: {config.image_format}")
+        self.config = config
+        self.root = Path(config.output_root)
+        self.split_of = parse_split_policy(config.split)
+        if config.image_format == "jpg":
+            self._encode_params = [cv2.IMWRITE_JPEG_QUALITY, config.jpeg_quality]
+        else:
+            self._encode_params = [cv2.IMWRITE_PNG_COMPRESSION, config.png_compression]
+        self._shards: Optional[ShardWriter] = None
+        self._split_files: dict[str, io.TextIOWrapper] = {}
+        if config.shard_size:
+            shard_resume = resume["shards"] if resume else None
+            self._shards = ShardWriter(config.output_root, config.shard_size, shard_resume)
+        else:
+            for split in EXPORT_SPLITS:
+                os.makedirs(self.root / "images" / split, exist_ok=True)
+                os.makedirs(self.root / "labels" / split, exist_ok=True)
+            # Samples written after a checkpoint are simply overwritten; only the index files are cut back
+            offsets = resume["splits"] if resume else dict.fromkeys(EXPORT_SPLITS)
+            self._split_files = {
+                split: _open_appending(self.root / f"{split}.txt", offsets[split]) for split in EXPORT_SPLITS
+            }
+        self._pool = ThreadPoolExecutor(config.workers, thread_name_prefix="batometer-export")
+        self._pending = threading.BoundedSemaphore(config.max_pending)
+        self._lock = threading.Lock()
+        self._error: Optional[BaseException] = None
+        self._sequence = 0  # Samples queued, which orders them in the shards
+        self.exported = dict(resume["exported"]) if resume else {split: 0 for split in EXPORT_SPLITS}
+        self.skipped = resume["skipped"] if resume else 0
+
+    def export(self, frame_num: int, frame: "cv2.typing.MatLike", labels: list[str]) -> None:
+        """
+        Queues one sample for writing.
+
+        Args:
+            frame_num (int): Frame number, used for the file names and the split.
+            frame ("cv2.typing.MatLike"): The undrawn frame; it must not be modified afterwards.
+            labels (list[str]): YOLO label lines, e.g. from `yolo_labels`.
+        """
+        if not labels and self.config.skip_empty:
+            self.skipped += 1
+            return
+        self._pending.acquire()
+        self._pool.submit(self._write, self._sequence, frame_num, frame, labels).add_done_callback(self._done)
+        self._sequence += 1
+
+    def _done(self, future: Future) -> None:
+        self._pending.release()
+        if future.exception() is not None and self._error is None:
+            self._error = future.exception()
+
+    def _write(self, sequence: int, frame_num: int, frame: "cv2.typing.MatLike", labels: list[str]) -> None:
+        split = self.split_of(frame_num)
+        name = f"frame_{frame_num}"
+        image_name = f"{name}.{self.config.image_format}"
+        if self._shards is not None:
+            # Encoding runs in parallel; the samples then enter the shards in the order they were queued
+            try:
+                ok, encoded = cv2.imencode(f".{self.config.image_format}", frame, self._encode_params)
+                if not ok:
+                    raise OSError(f"Failed to encode frame {frame_num}")
+            except BaseException:
+                self._shards.skip(sequence)
+                raise
+            label = "\n".join(labels).encode()
+            self._shards.add(sequence, frame_num, split, image_name, encoded.tobytes(), f"{name}.txt", label)
+        else:
+            image_path = Path("images") / split / image_name
+            if not cv2.imwrite(str(self.root / image_path), frame, self._encode_params):
+                raise OSError(f"Failed to write {image_path}")
+            with open(self.root / "labels" / split / f"{name}.txt", "w") as txt_file:
+                txt_file.write("\n".join(labels))
+            with self._lock:
+                self._split_files[split].write(f"{image_path.as_posix()}\n")
+        with self._lock:
+            self.exported[split] += 1
+
+    def checkpoint(self) -> dict:
+        """
+        Waits for every queued sample to be written and flushes the index files.
+
+        Must be called from the thread calling `export`.
+
+        Returns:
+            dict: State to pass as `resume` to continue after the samples exported so far.
+
+        Raises:
+            OSError: If a sample could not be written.
+        """
+        # Holding every permit means no sample is in flight
+        for _ in range(self.config.max_pending):
+            self._pending.acquire()
+        for _ in range(self.config.max_pending):
+            self._pending.release()
+        if self._error is not None:
+            raise self._error
+        state = {"exported": dict(self.exported), "skipped": self.skipped}
+        if self._shards is not None:
+            state["shards"] = self._shards.checkpoint()
+        else:
+            for split_file in self._split_files.values():
+                split_file.flush()
+            state["splits"] = {split: split_file.tell() for split, split_file in self._split_files.items()}
+        return state
+
+    def close(self) -> None:
+        """
+        Waits for every queued sample to be written.
+
+        Raises:
+            OSError: If a sample could not be written.
+        """
+        self._pool.shutdown()
+        if self._shards is not None:
+            self._shards.close()
+        for split_file in self._split_files.values():
+            split_file.close()
+        if self._error is not None:
+            raise self._error
+        logger.info(
+            f"Exported {self.exported['train']} train and {self.exported['val']} val samples to {self.root}, "
+            f"skipped {self.skipped} frames without labels"
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
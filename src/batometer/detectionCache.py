@@ -0,0 +1,236 @@
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Iterator, Optional
+
+import cv2
+import numpy as np
+
+from .constants import BATOMETER
+from .detectionObject import Detection, Point
+from .resultsLog import ChunkedColumnWriter, load_chunked_columns
+
+logger = logging.getLogger(f"{BATOMETER}.DetectionCache")
+
+DETECTION_COLUMNS: dict[str, "np.typing.DTypeLike"] = {
+    "frame": np.int32,
+    "x": np.int32,
+    "y": np.int32,
+    "w": np.int32,
+    "h": np.int32,
+    "score": np.float32,
+}
+DETECTION_CHUNK_ROWS = 262144
+FINGERPRINT_BYTES = 4 * 1024 * 1024  # Read from each end of the video when fingerprinting
+META_FILE = "meta.json"
+REFERENCE_FRAME_FILE = "reference.png"
+
+
+def video_fingerprint(video_path: str) -> str:
+    """
+    Computes a fast content fingerprint of a video file.
+
+    Hashing a whole night of footage would take minutes, so only the file size and the first and
+    last `FINGERPRINT_BYTES` are hashed. This is enough to tell different recordings apart.
+
+    Args:
+        video_path (str): Path to the video file.
+
+    Returns:
+        str: Hex digest identifying the video.
+    """
+    size = os.path.getsize(video_path)
+    digest = hashlib.sha1(str(size).encode())
+    with open(video_path, "rb") as video_file:
+        digest.update(video_file.read(FINGERPRINT_BYTES))
+        if size > FINGERPRINT_BYTES:
+            video_file.seek(max(FINGERPRINT_BYTES, size - FINGERPRINT_BYTES))
+            digest.update(video_file.read(FINGERPRINT_BYTES))
+    return digest.hexdigest()
+
+
+def cache_key(video_path: str, detector_params: dict) -> str:
+    """
+    Builds the cache key for a video and a set of detector parameters.
+
+    Args:
+        video_path (str): Path to the video file.
+        detector_params (dict): Parameters of the detector, e.g. `ObjectFinder.params()`.
+
+    Returns:
+        str: Cache key, unique per video content and detector parameters.
+    """
+    digest = hashlib.sha1(video_fingerprint(video_path).encode())
+    digest.update(json.dumps(detector_params, sort_keys=True).encode())
+    return digest.hexdigest()[:16]
+
+
+class DetectionCacheWriter:
+    """
+    Records the detector output of every frame so tracking can later be replayed without decoding.
+
+    Detections are streamed to columnar chunks under `<cache_dir>/<cache_key>/`. The entry is only
+    marked complete once the whole video was processed, so an interrupted run never yields a partial
+    replay.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        video_path: str,
+        detector_params: dict,
+        width: int,
+        height: int,
+        fps: float,
+        resume: Optional[dict] = None,
+    ) -> None:
+        """
+        Args:
+            cache_dir (str): Root directory of the detection cache.
+            video_path (str): Path to the video being processed.
+            detector_params (dict): Parameters of the detector producing the detections.
+            width (int): Width of the video frame.
+            height (int): Height of the video frame.
+            fps (float): Frames per second of the video.
+            resume (Optional[dict]): State from `checkpoint` to continue from.
+        """
+        self.path = Path(cache_dir) / cache_key(video_path, detector_params)
+        self.meta = {
+            "video": str(video_path),
+            "detector_params": detector_params,
+            "width": width,
+            "height": height,
+            "fps": fps,
+            "scores": True,
+            "frames": resume["frames"] if resume else 0,
+            "complete": False,
+        }
+        os.makedirs(self.path, exist_ok=True)
+        self._write_meta()
+        self._writer = ChunkedColumnWriter(
+            str(self.path), DETECTION_COLUMNS, DETECTION_CHUNK_ROWS, resume["chunks"] if resume else None
+        )
+        logger.info(f"Caching detections to {self.path}")
+
+    def append(self, frame_num: int, detections: set[Detection]) -> None:
+        """
+        Records the detections of one frame. Must be called before the tracker consumes the set.
+
+        Args:
+            frame_num (int): 1-based number of the frame.
+            detections (set[Detection]): Detections found in the frame.
+        """
+        for det in detections:
+            self._writer.append_row(frame_num, det.point.x, det.point.y, det.width, det.height, det.score)
+        self.meta["frames"] = frame_num
+
+    def checkpoint(self) -> dict:
+        """
+        Writes the detections recorded so far.
+
+        Returns:
+            dict: State to pass as `resume` to continue after the frames recorded so far.
+        """
+        return {"frames": self.meta["frames"], "chunks": self._writer.checkpoint()}
+
+    def close(self, reference_frame: Optional["cv2.typing.MatLike"] = None, complete: bool = True) -> None:
+        """
+        Flushes the detections and marks the cache entry complete.
+
+        Args:
+            reference_frame (Optional[MatLike]): Last video frame, used as the heatmap background on replay.
+            complete (bool): Whether the whole video was processed. Incomplete entries are never replayed.
+        """
+        self._writer.close()
+        if reference_frame is not None:
+            cv2.imwrite(str(self.path / REFERENCE_FRAME_FILE), reference_frame)
+        self.meta["complete"] = complete
+        self._write_meta()
+
+    def _write_meta(self) -> None:
+        with open(self.path / META_FILE, "w") as meta_file:
+            json.dump(self.meta, meta_file, indent=2)
+
+
+class DetectionCache:
+    """
+    Read access to a complete detection cache entry.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Args:
+            path (str): Directory of the cache entry.
+
+        Raises:
+            FileNotFoundError: If the entry does not exist or was not completed.
+        """
+        self.path = Path(path)
+        meta_path = self.path / META_FILE
+        if not meta_path.is_file():
+            raise FileNotFoundError(f"No detection cache at {self.path}")
+        with open(meta_path) as meta_file:
+            meta = json.load(meta_file)
+        if not meta["complete"]:
+            raise FileNotFoundError(f"Detection cache at {self.path} is incomplete")
+        self.width: int = meta["width"]
+        self.height: int = meta["height"]
+        self.fps: float = meta["fps"]
+        self.num_frames: int = meta["frames"]
+        self.detector_params: dict = meta["detector_params"]
+        if meta.get("scores"):
+            self.columns = load_chunked_columns(str(self.path), DETECTION_COLUMNS)
+        else:
+            # Entries written before detections were scored; their detections count as certain
+            columns = {name: dtype for name, dtype in DETECTION_COLUMNS.items() if name != "score"}
+            self.columns = load_chunked_columns(str(self.path), columns)
+            self.columns["score"] = np.ones(len(self.columns["frame"]), dtype=np.float32)
+
+    @classmethod
+    def find(cls, cache_dir: str, video_path: str, detector_params: dict) -> Optional["DetectionCache"]:
+        """
+        Looks up the complete cache entry for a video and detector parameters.
+
+        Args:
+            cache_dir (str): Root directory of the detection cache.
+            video_path (str): Path to the video file.
+            detector_params (dict): Parameters of the detector.
+
+        Returns:
+            Optional[DetectionCache]: The cache entry, or None if there is no complete entry.
+        """
+        try:
+            return cls(str(Path(cache_dir) / cache_key(video_path, detector_params)))
+        except FileNotFoundError:
+            return None
+
+    def frames(self) -> Iterator[tuple[int, set[Detection]]]:
+        """
+        Iterates over every recorded frame in order, including frames without detections.
+
+        Yields:
+            tuple[int, set[Detection]]: The 1-based frame number and a fresh set of its detections.
+        """
+        frame_col = self.columns["frame"]
+        x_col, y_col = self.columns["x"].tolist(), self.columns["y"].tolist()
+        w_col, h_col = self.columns["w"].tolist(), self.columns["h"].tolist()
+        score_col = self.columns["score"].tolist()
+        bounds = np.searchsorted(frame_col, np.arange(1, self.num_frames + 2)).tolist()
+        for frame_num in range(1, self.num_frames + 1):
+            start, end = bounds[frame_num - 1], bounds[frame_num]
+            yield frame_num, {
+                Detection(Point(x_col[i], y_col[i]), w_col[i], h_col[i], score_col[i])
+                for i in range(start, end)
+            }
+
+    def reference_frame(self) -> Optional["cv2.typing.MatLike"]:
+        """
+        Returns:
+            Optional[MatLike]: The stored reference frame, or None if none was saved.
+        """
+        reference_path = self.path / REFERENCE_FRAME_FILE
+        if not reference_path.is_file():
+            return None
+        return cv2.imread(str(reference_path))
@@ -1,6 +1,16 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import List, Optional
 
+import numpy as np
+
+HISTORY_INITIAL_CAPACITY = 32
+
+
+def _grown(array: np.ndarray, capacity: int, used: int) -> np.ndarray:
+    grown = np.empty((capacity, *array.shape[1:]), dtype=array.dtype)
+    grown[:used] = array[:used]
+    return grown
+
 
 @dataclass
 class Point:
@@ -29,18 +39,21 @@ class Detection:
         point (Point): X and Y coordinate of the top-left corner of the bounding box.
         width (int): Width of the bounding box.
         height (int): Height of the bounding box.
+        score (float): Confidence that the object is a bat, e.g. from a classifier; 1.0 for detectors
+            that do not score. Not part of equality or the hash.
     """
 
     point: Point
     width: int
     height: int
+    score: float = field(default=1.0, compare=False)
 
     def __hash__(self) -> int:
         """Hash based on point, width, and height."""
         return hash((self.point, self.width, self.height))
 
 
-@dataclass
+@dataclass(init=False)
 class IdentifiedObject(Detection):
     """
     Represents an identified object with an assigned unique identifier.
@@ -48,10 +61,13 @@ class IdentifiedObject(Detection):
     Attributes:
         id (int): Unique identifier for the detected object.
         history (List[Optional[Point]]): List of previous positions (None if missed).
+        history_points (np.ndarray): Array-backed copy of the non-missed history, see `history_points()`,
+            with the box size and history index of each entry in `history_boxes()`.
         speed (tuple[float, float]): (vx, vy) speed vector.
         predicted_position (Point): Predicted next position.
         prediction_range (int): Range for prediction.
         missed_tracks (int): Number of missed frames.
+        first_frame (int): Tracker frame of the first detection, i.e. of `history[0]`.
     """
 
     id: int
@@ -60,6 +76,7 @@ class IdentifiedObject(Detection):
     predicted_position: Point
     prediction_range: int = 30
     missed_tracks: int = 0
+    first_frame: int = 0
 
     def __init__(self, id: int, detectionObject: Detection) -> None:
         """
@@ -69,9 +86,17 @@ class IdentifiedObject(Detection):
             id (int): Unique identifier for the object.
             detectionObject (Detection): The detected object to copy bounding box from.
         """
-        super().__init__(detectionObject.point, detectionObject.width, detectionObject.height)
+        super().__init__(
+            detectionObject.point, detectionObject.width, detectionObject.height, detectionObject.score
+        )
         self.id = id
         self.history = [detectionObject.point]
+        self._history_points = np.empty((HISTORY_INITIAL_CAPACITY, 2), dtype=np.int32)
+        self._history_points[0] = (detectionObject.point.x, detectionObject.point.y)
+        # (width, height, index in history) of each detected position
+        self._history_boxes = np.empty((HISTORY_INITIAL_CAPACITY, 3), dtype=np.int32)
+        self._history_boxes[0] = (detectionObject.width, detectionObject.height, 0)
+        self._num_history_points = 1
         self.predicted_position = detectionObject.point
         self.speed = (0.0, 0.0)
 
@@ -79,7 +104,7 @@ class IdentifiedObject(Detection):
         """Hash based on the unique id."""
         return hash(self.id)
 
-    def update(self, point: Optional[Point], width=0, height=0) -> None:
+    def update(self, point: Optional[Point], width=0, height=0, score: float = 1.0) -> None:
         """
         Update the object's location and prediction based on a new point.
         If point is None, increment missed_tracks and update prediction.
@@ -87,6 +112,7 @@ class IdentifiedObject(Detection):
 
         Args:
             point (Optional[Point]): The new detected point or None if missed.
+            score (float): Score of the new detection.
         """
         if point is None:
             self.missed_tracks += 1
@@ -116,6 +142,64 @@ class IdentifiedObject(Detection):
         self.history.append(point)
         self.width = width
         self.height = height
+        self.score = score
+        self._append_history_point(point)
+
+    def history_points(self) -> np.ndarray:
+        """
+        Returns the non-missed positions of the object as an array, without copying.
+
+        Returns:
+            np.ndarray: Int32 array of shape (N, 2) holding the (x, y) of each detected position.
+        """
+        return self._history_points[: self._num_history_points]
+
+    def history_boxes(self) -> np.ndarray:
+        """
+        Returns the box of each detected position, aligned with `history_points()`, without copying.
+
+        Returns:
+            np.ndarray: Int32 array of shape (N, 3) holding the (width, height) of each detected box and its
+                index in `history`, i.e. its frame counted from the first detection.
+        """
+        return self._history_boxes[: self._num_history_points]
+
+    def _append_history_point(self, point: Point) -> None:
+        if self._num_history_points == len(self._history_points):
+            capacity = 2 * len(self._history_points)
+            self._history_points = _grown(self._history_points, capacity, self._num_history_points)
+            self._history_boxes = _grown(self._history_boxes, capacity, self._num_history_points)
+        self._history_points[self._num_history_points] = (point.x, point.y)
+        self._history_boxes[self._num_history_points] = (self.width, self.height, len(self.history) - 1)
+        self._num_history_points += 1
+
+    def join(self, later: "IdentifiedObject") -> None:
+        """
+        Appends a later track of the same object, e.g. a fragment found by `stitch_tracks`, as if the
+        frames between them had been missed. Attributes are rebound rather than modified, so a shallow
+        copy can be joined without changing the original.
+
+        Args:
+            later (IdentifiedObject): Track whose first detection comes after the last one of this track.
+        """
+        offset = later.first_frame - self.first_frame
+        last_step = int(self.history_boxes()[-1, 2])
+        if offset <= last_step:
+            raise ValueError(f"Track {later.id} starts before track {self.id} ends")
+        history = self.history[:offset]
+        self.history = history + [None] * (offset - len(history)) + later.history
+        later_boxes = later.history_boxes().copy()
+        later_boxes[:, 2] += offset
+        self._history_points = np.concatenate([self.history_points(), later.history_points()])
+        self._history_boxes = np.concatenate([self.history_boxes(), later_boxes])
+        self._num_history_points = len(self._history_points)
+        self.point = later.point
+        self.width = later.width
+        self.height = later.height
+        self.score = later.score
+        self.speed = later.speed
+        self.predicted_position = later.predicted_position
+        self.missed_tracks = later.missed_tracks
 
     def is_self(self, det: Detection) -> bool:
         """
@@ -0,0 +1,79 @@
+from abc import ABC, abstractmethod
+from typing import Any
+
+import cv2
+
+from .detectionObject import Detection
+
+DETECTOR_BACKENDS = ["mog2", "onnx", "cascade"]
+
+
+class DetectorBackend(ABC):
+    """
+    Finds the objects in video frames, in two steps so the pipeline can overlap them:
+
+    - `submit` is called for every frame in order, on a single thread, and may keep state between frames
+      (e.g. a background model) or hold frames back (e.g. to batch them).
+    - `collect` turns what `submit` returned into detections. It may be called for several frames at
+      once from a pool of threads, and may block until a held-back frame has been processed.
+    """
+
+    stateful: bool = False  # Whether detections depend on the frames before, so resuming must replay them
+
+    @abstractmethod
+    def params(self) -> dict:
+        """
+        Returns:
+            dict: The detector parameters, e.g. for keying cached detections. Includes the backend name
+                under "detector".
+        """
+
+    @abstractmethod
+    def submit(self, frame: "cv2.typing.MatLike") -> Any:
+        """
+        Starts detecting the objects in a frame.
+
+        Args:
+            frame (cv2.typing.MatLike): The next video frame.
+
+        Returns:
+            Any: Handle to pass to `collect`.
+        """
+
+    @abstractmethod
+    def collect(self, pending: Any) -> tuple[set[Detection], "cv2.typing.MatLike"]:
+        """
+        Finishes detecting the objects in a frame.
+
+        Args:
+            pending (Any): What `submit` returned for the frame.
+
+        Returns:
+            tuple[set[Detection], cv2.typing.MatLike]: Detected objects and a mask of where they are.
+        """
+
+    def update(self, frame: "cv2.typing.MatLike") -> tuple[set[Detection], "cv2.typing.MatLike"]:
+        """
+        Detects the objects in a frame, waiting for the result.
+
+        Args:
+            frame (cv2.typing.MatLike): The next video frame.
+
+        Returns:
+            tuple[set[Detection], cv2.typing.MatLike]: Detected objects and a mask of where they are.
+        """
+        return self.collect(self.submit(frame))
+
+    def warm_up(self, frame: "cv2.typing.MatLike") -> None:
+        """
+        Feeds a frame whose detections are not needed, e.g. to rebuild state when resuming a run. Only
+        called for stateful backends.
+
+        Args:
+            frame (cv2.typing.MatLike): A video frame.
+        """
+
+    def close(self) -> None:
+        """
+        Releases any threads or resources; pending frames are still processed.
+        """
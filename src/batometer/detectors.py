@@ -0,0 +1,70 @@
+from typing import Optional
+
+from .cascadeDetector import CascadeDetector
+from .detectorBackend import DetectorBackend
+from .objectfinder import ObjectFinder
+from .onnxDetector import (
+    ONNX_BATCH_SIZE,
+    ONNX_INPUT_SIZE,
+    ONNX_MAX_LATENCY,
+    ONNX_SCORE_THRESHOLD,
+    OnnxDetector,
+)
+from .profiler import NULL_PROFILER, StageProfiler
+
+
+def create_detector(
+    name: str,
+    model_path: Optional[str] = None,
+    input_size: int = ONNX_INPUT_SIZE,
+    batch_size: int = ONNX_BATCH_SIZE,
+    max_latency: float = ONNX_MAX_LATENCY,
+    score_threshold: float = ONNX_SCORE_THRESHOLD,
+    history: int = 500,
+    var_threshold: float = 100,
+    kernel_size: int = 5,
+    merge_gap: Optional[int] = None,
+    merge_iou: Optional[float] = None,
+    profiler: StageProfiler = NULL_PROFILER,
+) -> DetectorBackend:
+    """
+    Creates a detector backend by name, so runs and replays agree on the parameters keying the cache.
+
+    Args:
+        name (str): One of `DETECTOR_BACKENDS`.
+        model_path (Optional[str]): The `.onnx` model of the onnx and cascade detectors.
+        input_size (int): Side of the square model input of the onnx detector.
+        batch_size (int): Maximum frames per inference of the onnx detector.
+        max_latency (float): Seconds a frame waits for its onnx batch to fill.
+        score_threshold (float): Minimum model score of an onnx detection.
+        history (int): Frames the background model of the mog2 and cascade detectors keeps.
+        var_threshold (float): MOG2 variance threshold of the mog2 and cascade detectors.
+        kernel_size (int): Kernel size opening the foreground mask of the mog2 and cascade detectors.
+        merge_gap (Optional[int]): Merge blobs at most this many pixels apart (mog2 and cascade detectors).
+        merge_iou (Optional[float]): Merge blobs overlapping by at least this intersection over union.
+        profiler (StageProfiler): Records the time spent in each detection stage.
+
+    Returns:
+        DetectorBackend: The detector; call `close` once done with it.
+
+    Raises:
+        ValueError: If the name is unknown, or the detector needs a model path and none was given.
+    """
+    if name in ("onnx", "cascade") and not model_path:
+        raise ValueError(f"The {name} detector needs a model path")
+    match name:
+        case "mog2":
+            return ObjectFinder(history, var_threshold, kernel_size, merge_gap, merge_iou, profiler)
+        case "cascade":
+            finder = ObjectFinder(history, var_threshold, kernel_size, merge_gap, merge_iou, profiler)
+            return CascadeDetector(finder, model_path)
+        case "onnx":
+            return OnnxDetector(
+                model_path,
+                input_size=input_size,
+                batch_size=batch_size,
+                max_latency=max_latency,
+                score_threshold=score_threshold,
+            )
+        case _:
+            raise ValueError(f"Unknown detector: {name}")
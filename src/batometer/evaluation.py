@@ -0,0 +1,102 @@
+import csv
+import logging
+
+import numpy as np
+
+from .constants import BATOMETER
+
+logger = logging.getLogger(f"{BATOMETER}.evaluation")
+
+TRACK_COLUMNS = ("frame", "track_id", "x", "y", "w", "h")
+MATCH_DISTANCE = 20.0  # Max centre distance in pixels for a track to match a ground-truth object
+
+
+def load_ground_truth(path: str) -> dict[str, np.ndarray]:
+    """
+    Loads a ground-truth track file.
+
+    The file is a CSV with a header and the columns `frame,track_id,x,y,w,h`, where (x, y) is the
+    top-left corner of the object's box as for `Detection`, and frames are numbered from 1.
+
+    Args:
+        path (str): Path to the CSV file.
+
+    Returns:
+        dict[str, np.ndarray]: One int32 array per column.
+    """
+    with open(path, newline="") as gt_file:
+        rows = [[int(float(row[name])) for name in TRACK_COLUMNS] for row in csv.DictReader(gt_file)]
+    table = np.array(rows, dtype=np.int32).reshape(-1, len(TRACK_COLUMNS))
+    return {name: table[:, i] for i, name in enumerate(TRACK_COLUMNS)}
+
+
+def evaluate_tracks(
+    predicted: dict[str, np.ndarray],
+    ground_truth: dict[str, np.ndarray],
+    max_distance: float = MATCH_DISTANCE,
+) -> dict[str, float]:
+    """
+    Scores predicted tracks against ground truth with CLEAR-MOT style counts.
+
+    In every frame, predicted boxes are greedily matched to ground-truth boxes by centre distance
+    (closest pairs first, up to `max_distance`). An identity switch is counted whenever a ground-truth
+    object is matched to a different track id than the last time it was matched.
+
+    Args:
+        predicted (dict[str, np.ndarray]): Predicted rows with the columns of `TRACK_COLUMNS`.
+        ground_truth (dict[str, np.ndarray]): Ground-truth rows with the same columns.
+        max_distance (float): Maximum centre distance in pixels for a match.
+
+    Returns:
+        dict[str, float]: Matches, misses, false positives, identity switches, precision, recall and MOTA.
+    """
+    pred_frames, pred_ids, pred_centres = _sorted_centres(predicted)
+    gt_frames, gt_ids, gt_centres = _sorted_centres(ground_truth)
+    frames = np.union1d(pred_frames, gt_frames)
+    pred_bounds = np.searchsorted(pred_frames, np.append(frames, frames[-1] + 1 if len(frames) else 0))
+    gt_bounds = np.searchsorted(gt_frames, np.append(frames, frames[-1] + 1 if len(frames) else 0))
+
+    matches = id_switches = 0
+    last_match: dict[int, int] = {}
+    for i in range(len(frames)):
+        p0, p1 = pred_bounds[i], pred_bounds[i + 1]
+        g0, g1 = gt_bounds[i], gt_bounds[i + 1]
+        if p0 == p1 or g0 == g1:
+            continue
+        distances = np.linalg.norm(gt_centres[g0:g1, None, :] - pred_centres[None, p0:p1, :], axis=2)
+        used_gt: set[int] = set()
+        used_pred: set[int] = set()
+        for flat in np.argsort(distances, axis=None):
+            gi, pi = divmod(int(flat), p1 - p0)
+            if distances[gi, pi] > max_distance:
+                break
+            if gi in used_gt or pi in used_pred:
+                continue
+            used_gt.add(gi)
+            used_pred.add(pi)
+            matches += 1
+            gt_id, pred_id = int(gt_ids[g0 + gi]), int(pred_ids[p0 + pi])
+            if gt_id in last_match and last_match[gt_id] != pred_id:
+                id_switches += 1
+            last_match[gt_id] = pred_id
+
+    num_gt, num_pred = len(gt_frames), len(pred_frames)
+    misses = num_gt - matches
+    false_positives = num_pred - matches
+    return {
+        "matches": matches,
+        "misses": misses,
+        "false_positives": false_positives,
+        "id_switches": id_switches,
+        "precision": matches / num_pred if num_pred else 0.0,
+        "recall": matches / num_gt if num_gt else 0.0,
+        "mota": 1 - (misses + false_positives + id_switches) / num_gt if num_gt else 0.0,
+    }
+
+
+def _sorted_centres(rows: dict[str, np.ndarray]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    order = np.argsort(rows["frame"], kind="stable")
+    centres = np.stack(
+        [rows["x"][order] + rows["w"][order] / 2, rows["y"][order] + rows["h"][order] / 2], axis=1
+    ).astype(np.float64)
+    return rows["frame"][order], rows["track_id"][order], centres.reshape(-1, 2)
@@ -4,6 +4,8 @@ import cv2
 
 from .detectionObject import Detection, IdentifiedObject
 
+LIVE_FRAME_CACHE_MB = 2048  # Frame cache budget of live runs, which have no end; the oldest frames go first
+
 
 @dataclass
 class FrameCacheEntry:
@@ -16,3 +18,16 @@ class FrameCacheEntry:
     frame_time: str
     detections: set[Detection]
     tracked_detections: set[IdentifiedObject]
+
+    def nbytes(self) -> int:
+        """
+        Returns:
+            int: Memory held by the cached frames in bytes.
+        """
+        return (
+            self.video_frame.nbytes
+            + self.objects_frame.nbytes
+            + self.tracks_frame.nbytes
+            + self.flow_frame.nbytes
+            + self.heatmap_frame.nbytes
+        )
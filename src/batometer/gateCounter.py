@@ -0,0 +1,255 @@
+import csv
+import json
+import logging
+import os
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+import numpy as np
+
+from .constants import BATOMETER
+from .detectionObject import IdentifiedObject
+
+logger = logging.getLogger(f"{BATOMETER}.GateCounter")
+
+GATE_CELL_SIZE = 64  # Side in pixels of the grid cells indexing the gates
+GATE_BIN_SECONDS = 60.0
+GATE_COUNT_COLUMNS = ["bin", "start_seconds", "end_seconds", "gate", "in", "out"]
+
+
+@dataclass
+class Gate:
+    """
+    A counting line. Looking from `start` to `end` on screen, tracks crossing from the left-hand side to
+    the right-hand side count as "in", the other way as "out"; e.g. for a gate drawn left to right, bats
+    flying down the frame go in.
+
+    Attributes:
+        name (str): Name used in the counts.
+        start (tuple[int, int]): (x, y) of one end, in frame pixels.
+        end (tuple[int, int]): (x, y) of the other end.
+    """
+
+    name: str
+    start: tuple[int, int]
+    end: tuple[int, int]
+
+    def side(self, x: float, y: float) -> bool:
+        """
+        Returns:
+            bool: Whether (x, y) is on the "in" side; points on the line count as the "out" side, so a
+                track touching the line and turning back is not counted.
+        """
+        (ax, ay), (bx, by) = self.start, self.end
+        return (bx - ax) * (y - ay) - (by - ay) * (x - ax) > 0
+
+
+def load_gates(path: str) -> list[Gate]:
+    """
+    Reads counting gates from a JSON config file, e.g.
+
+    `{"gates": [{"name": "roost", "start": [120, 400], "end": [520, 380]}]}`
+
+    Args:
+        path (str): Path of the config file.
+
+    Returns:
+        list[Gate]: The gates, in file order.
+    """
+    with open(path) as config_file:
+        config = json.load(config_file)
+    gates = [
+        Gate(str(gate["name"]), tuple(map(int, gate["start"])), tuple(map(int, gate["end"])))
+        for gate in config["gates"]
+    ]
+    names = [gate.name for gate in gates]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Gate names must be unique: {names}")
+    return gates
+
+
+def _segments_cross(p: tuple, q: tuple, a: tuple, b: tuple) -> bool:
+    # Whether a and b lie on opposite sides of the line through p and q (or on it)
+    dx, dy = q[0] - p[0], q[1] - p[1]
+    side_a = dx * (a[1] - p[1]) - dy * (a[0] - p[0])
+    side_b = dx * (b[1] - p[1]) - dy * (b[0] - p[0])
+    return side_a * side_b <= 0
+
+
+class GateIndex:
+    """
+    Uniform grid over the frame mapping each cell to the gates passing through it, so a track segment is
+    only tested against the gates near it, however many gates there are.
+    """
+
+    def __init__(self, gates: list[Gate], cell_size: int = GATE_CELL_SIZE) -> None:
+        """
+        Args:
+            gates (list[Gate]): The gates to index.
+            cell_size (int): Side of a grid cell in pixels.
+        """
+        self.cell_size = cell_size
+        self._cells: dict[tuple[int, int], list[int]] = {}
+        half_diagonal = cell_size / np.sqrt(2)
+        for index, gate in enumerate(gates):
+            (ax, ay), (bx, by) = gate.start, gate.end
+            length = np.hypot(bx - ax, by - ay)
+            for cell in self._cells_of_box(min(ax, bx), min(ay, by), max(ax, bx), max(ay, by)):
+                # Keep only the cells of the bounding box the gate actually passes near
+                centre_x, centre_y = (cell[0] + 0.5) * cell_size, (cell[1] + 0.5) * cell_size
+                if length:
+                    distance = abs((bx - ax) * (centre_y - ay) - (by - ay) * (centre_x - ax)) / length
+                else:
+                    distance = np.hypot(centre_x - ax, centre_y - ay)
+                if distance <= half_diagonal:
+                    self._cells.setdefault(cell, []).append(index)
+
+    def candidates(self, x1: int, y1: int, x2: int, y2: int) -> set[int]:
+        """
+        Returns:
+            set[int]: Indices of the gates that may cross the segment from (x1, y1) to (x2, y2).
+        """
+        found: set[int] = set()
+        for cell in self._cells_of_box(min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)):
+            found.update(self._cells.get(cell, ()))
+        return found
+
+    def _cells_of_box(self, x1: float, y1: float, x2: float, y2: float) -> Iterable[tuple[int, int]]:
+        size = self.cell_size
+        for cell_y in range(int(y1 // size), int(y2 // size) + 1):
+            for cell_x in range(int(x1 // size), int(x2 // size) + 1):
+                yield cell_x, cell_y
+
+
+class GateCounter:
+    """
+    Counts tracks crossing the gates as tracking runs.
+
+    After each frame only the newest segment of each matched track, from its previous detected position
+    to the new one, is tested, against the gates the `GateIndex` finds near it, so the cost per frame
+    grows with the number of matched tracks and not with their length or the video length. Totals are
+    available at any time in `counts`; per-bin counts are appended to a CSV file as each bin closes, so
+    it can be tailed during the run.
+    """
+
+    def __init__(
+        self,
+        gates: list[Gate],
+        fps: float,
+        bin_seconds: float = GATE_BIN_SECONDS,
+        output_path: Optional[str] = None,
+        cell_size: int = GATE_CELL_SIZE,
+        resume: Optional[dict] = None,
+    ) -> None:
+        """
+        Args:
+            gates (list[Gate]): The counting gates.
+            fps (float): Frames per second of the video, used to convert bins to times.
+            bin_seconds (float): Duration of each count bin in seconds.
+            output_path (Optional[str]): CSV file for the per-bin counts (None to only keep the totals).
+            cell_size (int): Side of the `GateIndex` cells in pixels.
+            resume (Optional[dict]): State from `checkpoint`; rows written after it are removed.
+        """
+        self.gates = gates
+        self.fps = fps if fps and fps > 0 else 1.0
+        self.bin_seconds = bin_seconds
+        self.bin_frames = max(1, int(round(bin_seconds * self.fps)))
+        self.index = GateIndex(gates, cell_size)
+        # (in, out) per gate, in total and in the open bin
+        self.counts = np.zeros((len(gates), 2), dtype=np.int64)
+        self._bin_counts = np.zeros((len(gates), 2), dtype=np.int64)
+        self._current_bin = 0
+        self._bin_open = False  # Whether frames of the current bin have been counted
+        if resume:
+            self.counts[...] = resume["counts"]
+            self._bin_counts[...] = resume["bin_counts"]
+            self._current_bin = resume["bin"]
+            self._bin_open = resume["bin_open"]
+        self.output_path = output_path
+        self._csv_file = None
+        if output_path:
+            if resume:
+                self._csv_file = open(output_path, "r+", newline="")
+                self._csv_file.truncate(resume["csv_offset"])
+                self._csv_file.seek(resume["csv_offset"])
+            else:
+                os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+                self._csv_file = open(output_path, "w", newline="")
+            self._csv = csv.writer(self._csv_file, lineterminator="\n")
+            if not resume:
+                self._csv.writerow(GATE_COUNT_COLUMNS)
+                self._csv_file.flush()
+        logger.info(f"Counting {len(gates)} gates in bins of {self.bin_frames} frames")
+
+    def update(self, frame_num: int, tracked: Iterable[IdentifiedObject]) -> None:
+        """
+        Counts the crossings of the tracks matched in a frame, closing the bin if it has ended.
+
+        Args:
+            frame_num (int): 1-based number of the frame just tracked.
+            tracked (Iterable[IdentifiedObject]): Objects matched or started in the frame, as returned
+                by `ObjectTracker.update`.
+        """
+        frame_bin = (frame_num - 1) // self.bin_frames
+        # Frames may be skipped (e.g. dropped live frames); close any bins that ended unseen
+        while self._current_bin < frame_bin:
+            self._close_bin()
+        self._bin_open = True
+        for obj in tracked:
+            points = obj.history_points()
+            if len(points) < 2:
+                continue
+            (x1, y1), (x2, y2) = points[-2].tolist(), points[-1].tolist()
+            for index in self.index.candidates(x1, y1, x2, y2):
+                gate = self.gates[index]
+                was_in, is_in = gate.side(x1, y1), gate.side(x2, y2)
+                if was_in != is_in and _segments_cross((x1, y1), (x2, y2), gate.start, gate.end):
+                    self._bin_counts[index, 0 if is_in else 1] += 1
+                    self.counts[index, 0 if is_in else 1] += 1
+        if frame_num % self.bin_frames == 0:
+            self._close_bin()
+
+    def totals(self) -> dict[str, tuple[int, int]]:
+        """
+        Returns:
+            dict[str, tuple[int, int]]: (in, out) count of each gate so far.
+        """
+        return {gate.name: (int(count[0]), int(count[1])) for gate, count in zip(self.gates, self.counts)}
+
+    def checkpoint(self) -> dict:
+        """
+        Returns:
+            dict: State to pass as `resume` to continue after the frames counted so far.
+        """
+        return {
+            "counts": self.counts.copy(),
+            "bin_counts": self._bin_counts.copy(),
+            "bin": self._current_bin,
+            "bin_open": self._bin_open,
+            "csv_offset": self._csv_file.tell() if self._csv_file is not None else 0,
+        }
+
+    def close(self) -> None:
+        """
+        Writes the final partial bin and logs the totals.
+        """
+        if self._bin_open:
+            self._close_bin()
+        if self._csv_file is not None:
+            self._csv_file.close()
+            self._csv_file = None
+        for name, (count_in, count_out) in self.totals().items():
+            logger.info(f"Gate {name}: {count_in} in, {count_out} out")
+
+    def _close_bin(self) -> None:
+        if self._csv_file is not None:
+            start = self._current_bin * self.bin_frames / self.fps
+            end = (self._current_bin + 1) * self.bin_frames / self.fps
+            for gate, (count_in, count_out) in zip(self.gates, self._bin_counts.tolist()):
+                self._csv.writerow(
+                    [self._current_bin, f"{start:.3f}", f"{end:.3f}", gate.name, count_in, count_out]
+                )
+            self._csv_file.flush()
+        self._bin_counts[...] = 0
+        self._current_bin += 1
+        self._bin_open = False
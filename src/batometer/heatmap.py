@@ -13,6 +13,10 @@ HEATMAP_ALPHA = 0.4
 FRAME_ALPHA = 0.6
 GRID_OVERLAY_ALPHA = 0.7
 DIRECTION_THRESHOLD = 1e-2
+PIXEL_HEATMAP_SCALE = 0.25  # Accumulator resolution relative to the video frame
+PIXEL_HEATMAP_REFRESH_INTERVAL = 1  # Minimum updates between colour map rebuilds
+PIXEL_HEATMAP_LINE_THICKNESS = 2  # Track thickness in full-resolution pixels
+PIXEL_HEATMAP_ALPHA = 0.3
 
 
 class Heatmap:
@@ -67,3 +71,121 @@ class Heatmap:
                 else:
                     cv2.circle(arrow_overlay, (center_x, center_y), DOT_RADIUS, DOT_COLOR, -1)
         return arrow_overlay
+
+
+class PixelHeatmap:
+    """
+    Accumulates track paths into a reduced-resolution integer heatmap.
+
+    The accumulator only ever grows, so the maximum is maintained incrementally instead of
+    min/max normalising every frame. The colourised image is rebuilt lazily when the accumulator
+    has changed (at most once every `refresh_interval` updates) and is only upscaled to the video
+    resolution when it is displayed or exported.
+    """
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        scale: float = PIXEL_HEATMAP_SCALE,
+        refresh_interval: int = PIXEL_HEATMAP_REFRESH_INTERVAL,
+    ) -> None:
+        """
+        Args:
+            width (int): Width of the video frame.
+            height (int): Height of the video frame.
+            scale (float): Accumulator resolution as a fraction of the video resolution.
+            refresh_interval (int): Minimum number of updates between colour map rebuilds.
+        """
+        self.width = width
+        self.height = height
+        self.scale = scale
+        self.refresh_interval = max(1, refresh_interval)
+        self.acc_w = max(1, int(round(width * scale)))
+        self.acc_h = max(1, int(round(height * scale)))
+        self.thickness = max(1, int(round(PIXEL_HEATMAP_LINE_THICKNESS * scale)))
+        self.accumulator = np.zeros((self.acc_h, self.acc_w), dtype=np.int32)
+        self.max_value = 0
+        self._scratch = np.zeros((self.acc_h, self.acc_w), dtype=np.uint8)
+        self._version = 0
+        self._colour_version = -1
+        self._updates_since_render = 0
+        self._colour_img: "cv2.typing.MatLike | None" = None
+        self._upscaled_img: "cv2.typing.MatLike | None" = None
+        self._upscaled_version = -1
+
+    def add_track(self, points: np.ndarray) -> None:
+        """
+        Adds one pass of an object's path to the accumulator.
+
+        Each pixel of the path is incremented once, even where the path overlaps itself.
+
+        Args:
+            points (np.ndarray): (N, 2) array of the object's detected (x, y) positions.
+        """
+        if len(points) < 2:
+            return
+        pts = np.round(points * self.scale).astype(np.int32)
+        cv2.polylines(self._scratch, [pts], False, (1,), self.thickness)
+        x0 = max(0, int(pts[:, 0].min()) - self.thickness)
+        y0 = max(0, int(pts[:, 1].min()) - self.thickness)
+        x1 = min(self.acc_w, int(pts[:, 0].max()) + self.thickness + 1)
+        y1 = min(self.acc_h, int(pts[:, 1].max()) + self.thickness + 1)
+        if x0 >= x1 or y0 >= y1:
+            return
+        roi = self.accumulator[y0:y1, x0:x1]
+        roi += self._scratch[y0:y1, x0:x1]
+        # Erase by redrawing rather than clearing the whole scratch buffer
+        cv2.polylines(self._scratch, [pts], False, (0,), self.thickness)
+        self.max_value = max(self.max_value, int(roi.max()))
+        self._version += 1
+
+    def tick(self) -> None:
+        """
+        Marks the end of an update step, counting towards the colour map refresh interval.
+        """
+        self._updates_since_render += 1
+
+    def colour_image(self) -> "cv2.typing.MatLike":
+        """
+        Returns the colourised heatmap at accumulator resolution, rebuilding it only if needed.
+
+        Returns:
+            MatLike: BGR colour-mapped heatmap of shape (acc_h, acc_w, 3).
+        """
+        stale = self._colour_version != self._version
+        due = self._updates_since_render >= self.refresh_interval
+        if self._colour_img is None or (stale and due):
+            alpha = 255.0 / self.max_value if self.max_value > 0 else 0.0
+            heatmap_prob = cv2.convertScaleAbs(self.accumulator, alpha=alpha)
+            self._colour_img = cv2.applyColorMap(heatmap_prob, cv2.COLORMAP_JET)
+            self._colour_version = self._version
+            self._updates_since_render = 0
+        return self._colour_img
+
+    def render(self) -> "cv2.typing.MatLike":
+        """
+        Returns the colourised heatmap upscaled to the video resolution, for display or export.
+
+        Returns:
+            MatLike: BGR colour-mapped heatmap of shape (height, width, 3).
+        """
+        colour_img = self.colour_image()
+        if self._upscaled_img is None or self._upscaled_version != self._colour_version:
+            self._upscaled_img = cv2.resize(
+                colour_img, (self.width, self.height), interpolation=cv2.INTER_LINEAR
+            )
+            self._upscaled_version = self._colour_version
+        return self._upscaled_img
+
+    def create_overlay(self, frame: "cv2.typing.MatLike") -> "cv2.typing.MatLike":
+        """
+        Blends the upscaled heatmap over a video frame.
+
+        Args:
+            frame (MatLike): The video frame.
+
+        Returns:
+            MatLike: The frame with the heatmap blended on top.
+        """
+        return cv2.addWeighted(frame, 1 - PIXEL_HEATMAP_ALPHA, self.render(), PIXEL_HEATMAP_ALPHA, 0)
@@ -0,0 +1,145 @@
+import time
+from collections import deque
+from typing import Optional
+
+import cv2
+
+from .profiler import StageProfiler
+
+HUD_TOP = 40  # Drawn directly below the status bar of `draw_overlay_text`
+HUD_LINE_HEIGHT = 22
+HUD_STAGES_PER_LINE = 5
+HUD_REFRESH_SECONDS = 0.25
+HUD_FPS_WINDOW = 30  # Processed frames averaged for the processing rate
+HUD_OK_COLOUR = (255, 255, 255)
+HUD_OVERLOAD_COLOUR = (80, 80, 255)
+
+
+class PipelineHud:
+    """
+    Live throughput and latency readout drawn on top of the viewer.
+
+    Call `frame_processed` once per processed frame and `idle` while playback is paused, so paused
+    time does not count as lag. The text is rebuilt at most every `refresh_seconds`; between refreshes
+    `draw` only fills one rectangle and draws a few lines of cached text.
+    """
+
+    def __init__(
+        self,
+        source_fps: float,
+        profiler: StageProfiler,
+        refresh_seconds: float = HUD_REFRESH_SECONDS,
+        window: int = HUD_FPS_WINDOW,
+    ) -> None:
+        """
+        Args:
+            source_fps (float): Frame rate of the source footage.
+            profiler (StageProfiler): Profiler providing the per-stage times; must be enabled to show them.
+            refresh_seconds (float): Minimum interval between text updates.
+            window (int): Number of recent processed frames averaged for the processing rate.
+        """
+        self.source_fps = source_fps
+        self.profiler = profiler
+        self.refresh_seconds = refresh_seconds
+        self._timestamps: deque = deque(maxlen=window)
+        self._last_timestamp: Optional[float] = None
+        self._busy_seconds = 0.0
+        self._busy_frames = 0
+        self._live_tracks = 0
+        self._cache_bytes = 0
+        self._dropped_frames = 0
+        self._lines: list[str] = []
+        self._overloaded = False
+        self._next_refresh = 0.0
+
+    def frame_processed(self, live_tracks: int, cache_bytes: int, dropped_frames: int = 0) -> None:
+        """
+        Records that a frame has been processed.
+
+        Args:
+            live_tracks (int): Number of tracks currently alive.
+            cache_bytes (int): Memory held by the frame cache in bytes.
+            dropped_frames (int): Frames a live source has dropped so far.
+        """
+        now = time.perf_counter()
+        if self._last_timestamp is not None:
+            self._busy_seconds += now - self._last_timestamp
+            self._busy_frames += 1
+        self._last_timestamp = now
+        self._timestamps.append(now)
+        self._live_tracks = live_tracks
+        self._cache_bytes = cache_bytes
+        self._dropped_frames = dropped_frames
+
+    def idle(self) -> None:
+        """
+        Marks a pause in processing; the gap until the next processed frame is not counted.
+        """
+        self._last_timestamp = None
+        self._timestamps.clear()
+
+    def processing_fps(self) -> float:
+        """
+        Returns:
+            float: Frames processed per second over the recent window (0 until two frames are seen).
+        """
+        if len(self._timestamps) < 2:
+            return 0.0
+        return (len(self._timestamps) - 1) / (self._timestamps[-1] - self._timestamps[0])
+
+    def lag_seconds(self) -> float:
+        """
+        Returns:
+            float: How far processing is behind real-time playback of the source, excluding pauses.
+        """
+        if not self.source_fps:
+            return 0.0
+        return max(0.0, self._busy_seconds - self._busy_frames / self.source_fps)
+
+    def lines(self) -> list[str]:
+        """
+        Returns:
+            list[str]: The HUD text, one entry per line.
+        """
+        fps = self.processing_fps()
+        lines = [
+            f"{fps:.1f} / {self.source_fps:.1f} fps | Lag: {self.lag_seconds():.1f}s | "
+            f"Dropped: {self._dropped_frames} | Tracks: {self._live_tracks} | "
+            f"Cache: {self._cache_bytes / 2**20:.0f} MB"
+        ]
+        stages = [f"{name} {self.profiler.recent_ms(name):.1f}" for name in self.profiler.stage_names()]
+        for i in range(0, len(stages), HUD_STAGES_PER_LINE):
+            prefix = "Stage ms: " if i == 0 else ""
+            lines.append(prefix + " | ".join(stages[i : i + HUD_STAGES_PER_LINE]))
+        self._overloaded = 0 < fps < self.source_fps
+        return lines
+
+    def draw(self, frame: "cv2.typing.MatLike") -> "cv2.typing.MatLike":
+        """
+        Draws the HUD below the status bar.
+
+        Args:
+            frame ("cv2.typing.MatLike"): The frame to draw on.
+
+        Returns:
+            "cv2.typing.MatLike": The frame with the HUD drawn on it.
+        """
+        now = time.perf_counter()
+        if now >= self._next_refresh:
+            self._lines = self.lines()
+            self._next_refresh = now + self.refresh_seconds
+        bottom = HUD_TOP + HUD_LINE_HEIGHT * len(self._lines) + 8
+        cv2.rectangle(frame, (0, HUD_TOP), (frame.shape[1], bottom), (0, 0, 0), -1)
+        colour = HUD_OVERLOAD_COLOUR if self._overloaded else HUD_OK_COLOUR
+        for i, line in enumerate(self._lines):
+            cv2.putText(
+                frame,
+                line,
+                (10, HUD_TOP + HUD_LINE_HEIGHT * (i + 1)),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                0.5,
+                colour if i == 0 else HUD_OK_COLOUR,
+                1,
+                cv2.LINE_AA,
+            )
+        return frame
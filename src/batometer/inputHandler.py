@@ -2,6 +2,7 @@ from batometer.constants import (
     ESC_KEYS,
     FLOW_OVERLAY_KEYS,
     HEATMAP_OVERLAY_KEYS,
+    HUD_KEYS,
     LEFT_KEYS,
     RIGHT_KEYS,
     SPACE_KEYS,
@@ -11,11 +12,12 @@ from batometer.window import OverlayMode
 
 
 class InputHandler:
-    def __init__(self):
+    def __init__(self, show_hud: bool = False):
         self.is_autoplay = True
         self.overlay_mode = OverlayMode.NONE
         self.current_paused_frame_idx = 0
         self.show_objects = False
+        self.show_hud = show_hud
 
     def handle_key(self, key, frame_cache_length):
         match key:
@@ -49,4 +51,6 @@ class InputHandler:
                 )
             case k if k in [ord("o")]:
                 self.show_objects = not self.show_objects
+            case k if k in HUD_KEYS:
+                self.show_hud = not self.show_hud
         return None
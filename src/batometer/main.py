@@ -5,16 +5,28 @@ import sys
 
 from dotenv import load_dotenv
 
+from .activitySummary import ACTIVITY_BIN_SECONDS
 from .batometerApp import BatometerApp
+from .blobMerging import MERGE_MAX_GAP
+from .cascadeDetector import CASCADE_MIN_SCORE
+from .checkpoint import CHECKPOINT_SECONDS, CHECKPOINT_WARMUP_FRAMES
 from .constants import BATOMETER
+from .datasetExport import ExportConfig
+from .detectorBackend import DETECTOR_BACKENDS
+from .frameCache import LIVE_FRAME_CACHE_MB
+from .gateCounter import GATE_BIN_SECONDS
+from .onnxDetector import ONNX_BATCH_SIZE, ONNX_INPUT_SIZE, ONNX_MAX_LATENCY, ONNX_SCORE_THRESHOLD
+from .pipeline import PIPELINE_DETECT_WORKERS, PIPELINE_QUEUE_SIZE
+from .trackStitching import STITCH_MAX_GAP
+from .window import OverlayMode
 
 FORMAT = "%(asctime)s %(levelname)-8s %(message)s"
 logging.basicConfig(level=logging.INFO, format=FORMAT)
 logger = logging.getLogger(BATOMETER)
 
 
-def main(video_path: str) -> None:
-    app = BatometerApp(video_path)
+def main(video_path: str, **options) -> None:
+    app = BatometerApp(video_path, **options)
     app.run()
 
 
@@ -30,8 +42,327 @@ if __name__ == "__main__":
         default=os.getenv("VIDEO_PATH"),
         help="Path to the video file (or set VIDEO_PATH env variable)",
     )
+    parser.add_argument(
+        "--heatmap-cube",
+        type=str,
+        default=None,
+        help="Write time-binned heatmap activity to this memory-mapped .npy cube",
+    )
+    parser.add_argument(
+        "--heatmap-cube-bin-seconds",
+        type=float,
+        default=60.0,
+        help="Duration of each heatmap cube time bin in seconds",
+    )
+    parser.add_argument(
+        "--heatmap-cube-source",
+        choices=["pixel", "flow"],
+        default="pixel",
+        help="Accumulate the pixel track heatmap or the flow grid counts into the cube",
+    )
+    parser.add_argument(
+        "--results-log",
+        type=str,
+        default=None,
+        help="Stream per-frame track boxes to this directory of columnar .npz chunks",
+    )
+    parser.add_argument(
+        "--track-features",
+        type=str,
+        default=None,
+        help="Write speed, tortuosity, heading, wingbeat and direction features of every track to this CSV",
+    )
+    parser.add_argument(
+        "--gates",
+        type=str,
+        default=None,
+        help="Count tracks crossing the counting lines in this JSON config file",
+    )
+    parser.add_argument(
+        "--gate-counts",
+        type=str,
+        default=None,
+        help="Append per-bin in/out counts of each gate to this CSV as each bin closes",
+    )
+    parser.add_argument(
+        "--gate-bin-seconds",
+        type=float,
+        default=GATE_BIN_SECONDS,
+        help="Duration of each gate count bin in seconds",
+    )
+    parser.add_argument(
+        "--activity-summary",
+        type=str,
+        default=None,
+        help="Append per-bin detection, track, direction and bat likelihood counts to this CSV as bins close",
+    )
+    parser.add_argument(
+        "--activity-bin-seconds",
+        type=float,
+        default=ACTIVITY_BIN_SECONDS,
+        help="Duration of each activity summary bin in seconds",
+    )
+    parser.add_argument(
+        "--stitch",
+        action="store_true",
+        help="Join the track fragments of objects that went undetected for a while before the analysis",
+    )
+    parser.add_argument(
+        "--stitch-max-gap",
+        type=int,
+        default=STITCH_MAX_GAP,
+        help="Most frames between two fragments that --stitch joins",
+    )
+    parser.add_argument(
+        "--detection-cache",
+        type=str,
+        default=None,
+        help="Cache per-frame detections in this directory for replay with batometer.replay",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Time each pipeline stage and print a breakdown at the end of the run",
+    )
+    parser.add_argument(
+        "--profile-csv",
+        type=str,
+        default=None,
+        help="With --profile, also write per-frame stage timings to this CSV",
+    )
+    parser.add_argument(
+        "--hud",
+        action="store_true",
+        help="Show live throughput, lag, track count and per-stage times over the video (toggle with p)",
+    )
+    parser.add_argument(
+        "--live",
+        action="store_true",
+        help="Treat the video path as a live source (device index such as 0, or a stream URL), dropping "
+        "frames to keep up; a video file is replayed at its native frame rate",
+    )
+    parser.add_argument(
+        "--frame-cache-mb",
+        type=float,
+        default=None,
+        help=f"Memory for frames kept to step back through, dropping the oldest beyond it (default: the "
+        f"whole video, or {LIVE_FRAME_CACHE_MB} MB with --live)",
+    )
+    parser.add_argument(
+        "--detect-workers",
+        type=int,
+        default=PIPELINE_DETECT_WORKERS,
+        help="Threads extracting detections from foreground masks",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=PIPELINE_QUEUE_SIZE,
+        help="Frames buffered between pipeline stages (1 with --live)",
+    )
+    parser.add_argument(
+        "--detector",
+        choices=DETECTOR_BACKENDS,
+        default="mog2",
+        help="Motion detection by background subtraction (mog2), a learned model run on the CPU (onnx), or "
+        "motion detection with each blob scored by a small classifier (cascade)",
+    )
+    parser.add_argument(
+        "--detector-model",
+        type=str,
+        default=None,
+        help="With --detector onnx, the .onnx detection model, e.g. YOLOv8 trained on an --export-dataset "
+        "export; with --detector cascade, the .onnx bat/not-bat classifier",
+    )
+    parser.add_argument(
+        "--detector-input-size",
+        type=int,
+        default=ONNX_INPUT_SIZE,
+        help="Side of the square model input",
+    )
+    parser.add_argument(
+        "--detector-batch-size",
+        type=int,
+        default=ONNX_BATCH_SIZE,
+        help="Frames per model inference; at most --queue-size (1 with --live)",
+    )
+    parser.add_argument(
+        "--detector-max-latency",
+        type=float,
+        default=ONNX_MAX_LATENCY,
+        help="Seconds a frame waits for its batch to fill before a partial batch runs",
+    )
+    parser.add_argument(
+        "--detector-score-threshold",
+        type=float,
+        default=ONNX_SCORE_THRESHOLD,
+        help="Minimum model score of a detection",
+    )
+    parser.add_argument(
+        "--min-detection-score",
+        type=float,
+        default=None,
+        help=f"The tracker ignores detections scoring below this (default {CASCADE_MIN_SCORE} with "
+        "--detector cascade, 0 otherwise)",
+    )
+    parser.add_argument(
+        "--merge-gap",
+        type=int,
+        default=None,
+        help=f"Merge blobs at most this many pixels apart, e.g. split wings, into one detection "
+        f"(mog2 and cascade detectors; try {MERGE_MAX_GAP})",
+    )
+    parser.add_argument(
+        "--merge-iou",
+        type=float,
+        default=None,
+        help="Merge blobs whose boxes overlap by at least this intersection over union",
+    )
+    export_defaults = ExportConfig("")
+    parser.add_argument(
+        "--export-dataset",
+        type=str,
+        default=None,
+        help="Export frames with tracked objects as a YOLO dataset under this directory (off by default)",
+    )
+    parser.add_argument(
+        "--export-split",
+        type=str,
+        default=export_defaults.split,
+        help="Train/val split policy: none, before:FRAME or ratio:R[:BLOCK_FRAMES]",
+    )
+    parser.add_argument("--export-format", choices=["png", "jpg"], default=export_defaults.image_format)
+    parser.add_argument("--export-jpeg-quality", type=int, default=export_defaults.jpeg_quality)
+    parser.add_argument(
+        "--export-png-compression",
+        type=int,
+        default=export_defaults.png_compression,
+        help="PNG compression level 0-9; lower is faster but larger",
+    )
+    parser.add_argument("--export-workers", type=int, default=export_defaults.workers)
+    parser.add_argument(
+        "--export-shard-size",
+        type=int,
+        default=export_defaults.shard_size,
+        help="Pack exported samples into tar shards of this many frames instead of one file each",
+    )
+    parser.add_argument(
+        "--export-keep-empty",
+        action="store_true",
+        help="Also export frames without any tracked object",
+    )
+    parser.add_argument(
+        "--annotated-video",
+        type=str,
+        default=None,
+        help="Encode the annotated frames to this video file (e.g. annotated.mp4) while processing",
+    )
+    parser.add_argument(
+        "--annotated-video-overlay",
+        choices=[mode.value for mode in OverlayMode],
+        default=OverlayMode.NONE.value,
+        help="Overlay drawn on the annotated video",
+    )
+    parser.add_argument(
+        "--annotated-video-objects",
+        action="store_true",
+        help="Place the foreground mask beside each frame of the annotated video",
+    )
+    parser.add_argument(
+        "--annotated-video-scale",
+        type=float,
+        default=1.0,
+        help="Scale of the annotated video relative to the source, e.g. 0.5 to encode faster",
+    )
+    parser.add_argument(
+        "--annotated-video-stride",
+        type=int,
+        default=1,
+        help="Only encode every Nth frame into the annotated video",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        type=str,
+        default=None,
+        help="Periodically save the tracking state and output positions to this file, for --resume",
+    )
+    parser.add_argument(
+        "--checkpoint-seconds",
+        type=float,
+        default=CHECKPOINT_SECONDS,
+        help="Video time between checkpoints",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue from the last --checkpoint of an interrupted run, keeping its outputs",
+    )
+    parser.add_argument(
+        "--resume-warmup-frames",
+        type=int,
+        default=CHECKPOINT_WARMUP_FRAMES,
+        help="Frames before the checkpoint replayed to rebuild the background model",
+    )
+    parser.add_argument(
+        "--resume-exact",
+        action="store_true",
+        help="Rebuild the background model from the first frame, reproducing an uninterrupted run exactly",
+    )
     args = parser.parse_args()
     if not args.video_path:
         logger.error("No video path provided. Use --video-path or set VIDEO_PATH in .env.")
         sys.exit(1)
-    main(args.video_path)
+    dataset_export = None
+    if args.export_dataset:
+        dataset_export = ExportConfig(
+            args.export_dataset,
+            split=args.export_split,
+            image_format=args.export_format,
+            jpeg_quality=args.export_jpeg_quality,
+            png_compression=args.export_png_compression,
+            workers=args.export_workers,
+            skip_empty=not args.export_keep_empty,
+            shard_size=args.export_shard_size,
+        )
+    main(
+        args.video_path,
+        heatmap_cube_path=args.heatmap_cube,
+        heatmap_cube_bin_seconds=args.heatmap_cube_bin_seconds,
+        heatmap_cube_source=args.heatmap_cube_source,
+        results_log_path=args.results_log,
+        track_features_path=args.track_features,
+        gates_path=args.gates,
+        gate_counts_path=args.gate_counts,
+        gate_bin_seconds=args.gate_bin_seconds,
+        activity_summary_path=args.activity_summary,
+        activity_bin_seconds=args.activity_bin_seconds,
+        stitch=args.stitch,
+        stitch_max_gap=args.stitch_max_gap,
+        detection_cache_dir=args.detection_cache,
+        profile=args.profile,
+        profile_csv_path=args.profile_csv,
+        hud=args.hud,
+        live=args.live,
+        frame_cache_mb=args.frame_cache_mb,
+        detect_workers=args.detect_workers,
+        queue_size=args.queue_size,
+        dataset_export=dataset_export,
+        annotated_video_path=args.annotated_video,
+        annotated_video_overlay=OverlayMode(args.annotated_video_overlay),
+        annotated_video_objects=args.annotated_video_objects,
+        annotated_video_scale=args.annotated_video_scale,
+        annotated_video_stride=args.annotated_video_stride,
+        checkpoint_path=args.checkpoint,
+        checkpoint_seconds=args.checkpoint_seconds,
+        resume=args.resume,
+        resume_warmup_frames=None if args.resume_exact else args.resume_warmup_frames,
+        detector=args.detector,
+        detector_model_path=args.detector_model,
+        detector_input_size=args.detector_input_size,
+        detector_batch_size=args.detector_batch_size,
+        detector_max_latency=args.detector_max_latency,
+        detector_score_threshold=args.detector_score_threshold,
+        min_detection_score=args.min_detection_score,
+        merge_gap=args.merge_gap,
+        merge_iou=args.merge_iou,
+    )
@@ -1,10 +1,13 @@
 import logging
+from typing import Optional
 
 import cv2
 import numpy as np
 
 from .constants import BATOMETER
 from .detectionObject import Detection, IdentifiedObject
+from .heatmap import PIXEL_HEATMAP_REFRESH_INTERVAL, PIXEL_HEATMAP_SCALE, PixelHeatmap
+from .profiler import NULL_PROFILER, StageProfiler
 
 logger = logging.getLogger(f"{BATOMETER}.ObjectTracker")
 
@@ -18,22 +21,53 @@ class ObjectTracker:
     all_objects: set["IdentifiedObject"]
     current_potential_objects: set["IdentifiedObject"]
     id_count: int
-
-    def __init__(self, width: int, height: int) -> None:
+    frame_count: int
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        heatmap_scale: float = PIXEL_HEATMAP_SCALE,
+        heatmap_refresh_interval: int = PIXEL_HEATMAP_REFRESH_INTERVAL,
+        max_missed_frames: int = 10,
+        prediction_range: int = IdentifiedObject.prediction_range,
+        enable_heatmap: bool = True,
+        min_score: float = 0.0,
+        profiler: StageProfiler = NULL_PROFILER,
+    ) -> None:
         """
         Initializes the EuclideanDistTracker.
         Sets up storage for all tracked objects, currently tracked objects, and the ID counter.
+
+        Args:
+            width (int): Width of the video frame.
+            height (int): Height of the video frame.
+            heatmap_scale (float): Resolution of the pixel heatmap relative to the frame.
+            heatmap_refresh_interval (int): Minimum frames between heatmap colour map rebuilds.
+            max_missed_frames (int): Frames an object may go undetected before it is dropped.
+            prediction_range (int): Radius around the predicted position in which detections match.
+            enable_heatmap (bool): Whether to accumulate the pixel heatmap (not needed for headless sweeps).
+            min_score (float): Detections scoring below this, e.g. blobs a classifier found not to be bats,
+                are ignored: they neither continue nor start a track.
+            profiler (StageProfiler): Records the time spent updating the pixel heatmap.
         """
         # Store the center positions of the objects
         self.width = width
         self.height = height
         self.all_objects: set[IdentifiedObject] = set()
         self.current_potential_objects: set[IdentifiedObject] = set()
-        self.pixel_heatmap = np.zeros((self.height, self.width), dtype=np.float32)
-        self.max_missed_frames = 10
+        self.pixel_heatmap: Optional[PixelHeatmap] = None
+        if enable_heatmap:
+            self.pixel_heatmap = PixelHeatmap(width, height, heatmap_scale, heatmap_refresh_interval)
+        self.max_missed_frames = max_missed_frames
+        self.prediction_range = prediction_range
+        self.min_score = min_score
+        self.profiler = profiler
         # Keep the count of the IDs
         # each time a new object id detected, the count will increase by one
         self.id_count: int = 0
+        # Number of updates so far, recorded as the first frame of new objects
+        self.frame_count: int = 0
 
     def update(
         self, detected_objects: set["Detection"]
@@ -47,48 +81,48 @@ class ObjectTracker:
         Returns:
             set[IdentifiedObject]: Set of objects with assigned unique IDs for the current frame.
         """
+        if self.pixel_heatmap is not None:
+            with self.profiler.stage("update_heatmap"):
+                for obj in self.current_potential_objects:
+                    self.update_heatmap(obj)
+                self.pixel_heatmap.tick()
         for obj in list(self.current_potential_objects):
-            self.update_heatmap(obj)
             if obj.missed_tracks > self.max_missed_frames:
                 self.current_potential_objects.remove(obj)
         current_objects: set[IdentifiedObject] = set()
-        for obj in self.current_potential_objects:
+        # Match in a fixed order so results do not depend on set iteration order (e.g. when replaying)
+        unmatched = sorted(
+            (det for det in detected_objects if det.score >= self.min_score),
+            key=lambda det: (det.point.y, det.point.x, det.width, det.height),
+        )
+        # Oldest tracks claim detections first; set order would differ for a tracker restored from a
+        # checkpoint
+        for obj in sorted(self.current_potential_objects, key=lambda obj: obj.id):
             matched = False
-            for det in detected_objects:
+            for det in unmatched:
                 if obj.is_self(det):
-                    obj.update(det.point, det.width, det.height)
+                    obj.update(det.point, det.width, det.height, det.score)
+                    unmatched.remove(det)
                     detected_objects.remove(det)
                     current_objects.add(obj)
                     matched = True
                     break
             if not matched:
                 obj.update(None)
-        for det in detected_objects:
+        for det in unmatched:
             new_obj = IdentifiedObject(self.id_count, det)
+            new_obj.prediction_range = self.prediction_range
+            new_obj.first_frame = self.frame_count
             self.current_potential_objects.add(new_obj)
             current_objects.add(new_obj)
             self.all_objects.add(new_obj)
             self.id_count += 1
 
+        self.frame_count += 1
         return current_objects.copy(), self.current_potential_objects.difference(current_objects)
 
     def update_heatmap(self, obj: IdentifiedObject):
-        left_p = 0
-        tracks_frame = np.zeros_like(self.pixel_heatmap, dtype=np.uint8)
-        while left_p < len(obj.history) - 1:
-            pt1 = obj.history[left_p]
-            # Move the second pointer to the next non-None point
-            right_p = left_p + 1
-            while right_p < len(obj.history) and obj.history[right_p] is None:
-                right_p += 1
-
-            if right_p < len(obj.history):
-                pt2 = obj.history[right_p]
-                if pt1 is not None and pt2 is not None:
-                    cv2.line(tracks_frame, (pt1.x, pt1.y), (pt2.x, pt2.y), color=(1,), thickness=2)
-            # Move the first pointer to the second pointer's position
-            left_p = right_p
-        self.pixel_heatmap += tracks_frame
+        self.pixel_heatmap.add_track(obj.history_points())
 
     def create_overlay(self, frame):
         long_tracks = set(obj for obj in self.current_potential_objects.union(self.all_objects))
@@ -123,13 +157,9 @@ class ObjectTracker:
         return overlay
 
     def create_heatmap_overlay(self, frame):
-        log_heatmap = self.pixel_heatmap
-        heatmap_prob = np.zeros_like(log_heatmap, dtype=np.uint8)
-        cv2.normalize(log_heatmap, heatmap_prob, 0, 255, cv2.NORM_MINMAX, dtype=cv2.CV_8U)
-        heatmap_img = cv2.applyColorMap(heatmap_prob, cv2.COLORMAP_JET)
-        resized_heatmap_img = cv2.resize(heatmap_img, (self.width, self.height))
-        final_heatmap_img = cv2.addWeighted(frame, 0.7, resized_heatmap_img, 0.3, 0)
-        return final_heatmap_img
+        if self.pixel_heatmap is None:
+            return frame.copy()
+        return self.pixel_heatmap.create_overlay(frame)
 
     # Add a method to calculate bat likelihood based on movement patterns
     def calculate_bat_likelihood(self, movement_pattern):
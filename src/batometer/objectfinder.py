@@ -1,31 +1,89 @@
 import logging
+from typing import Optional
 
 import cv2
 from cv2.typing import MatLike
 
+from .blobMerging import merge_detections
 from .constants import BATOMETER
 from .detectionObject import Detection, Point
+from .detectorBackend import DetectorBackend
+from .profiler import NULL_PROFILER, StageProfiler
 
 logger = logging.getLogger(f"{BATOMETER}.ObjectFinder")
 
 
-class ObjectFinder:
+class ObjectFinder(DetectorBackend):
     """
     Detects moving objects in video frames using background subtraction and contour detection.
+
+    As a `DetectorBackend`, `submit` updates the background model and `collect` finds the contours.
     """
 
-    kernel: "MatLike" = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+    stateful = True
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        history: int = 500,
+        var_threshold: float = 100,
+        kernel_size: int = 5,
+        merge_gap: Optional[int] = None,
+        merge_iou: Optional[float] = None,
+        profiler: StageProfiler = NULL_PROFILER,
+    ) -> None:
         """
         Initializes the ObjectFinder with a background subtractor for object detection.
+
+        Args:
+            history (int): Number of frames the background model keeps.
+            var_threshold (float): MOG2 variance threshold; higher is less sensitive.
+            kernel_size (int): Size of the elliptical kernel used to open the foreground mask.
+            merge_gap (Optional[int]): Merge contours at most this many pixels apart into one detection,
+                see `merge_detections` (None to keep every contour).
+            merge_iou (Optional[float]): Merge contours whose boxes overlap by at least this intersection
+                over union (None to not merge by overlap).
+            profiler (StageProfiler): Records the time spent in each detection stage.
         """
+        self.history = history
+        self.var_threshold = var_threshold
+        self.kernel_size = kernel_size
+        self.merge_gap = merge_gap
+        self.merge_iou = merge_iou
+        self.profiler = profiler
+        self.kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (kernel_size, kernel_size))
         self.backgroundSub = cv2.createBackgroundSubtractorMOG2(
-            history=500,  # no. frames to keep
-            varThreshold=100,  # sensitivity of
+            history=history,  # no. frames to keep
+            varThreshold=var_threshold,  # sensitivity of
             detectShadows=False,
         )
 
+    def params(self) -> dict:
+        """
+        Returns:
+            dict: The detector parameters, e.g. for keying cached detections.
+        """
+        params = {
+            "detector": "mog2",
+            "history": self.history,
+            "var_threshold": self.var_threshold,
+            "kernel_size": self.kernel_size,
+        }
+        # Only when merging, so caches written without it keep their keys
+        if self.merge_gap is not None:
+            params["merge_gap"] = self.merge_gap
+        if self.merge_iou is not None:
+            params["merge_iou"] = self.merge_iou
+        return params
+
+    def submit(self, frame: MatLike) -> MatLike:
+        return self.subtract(frame)
+
+    def collect(self, pending: MatLike) -> tuple[set["Detection"], "MatLike"]:
+        return self.extract(pending)
+
+    def warm_up(self, frame: MatLike) -> None:
+        self.subtract(frame)
+
     def initialise(self, video: "cv2.VideoCapture") -> None:
         """
         Primes the background subtractor with initial frames to stabilize the background model.
@@ -53,11 +111,44 @@ class ObjectFinder:
         Returns:
             tuple[set[Detection], MatLike]: Set of detected objects and the foreground mask.
         """
-        # Create the foreground mask
-        fgmask = self.backgroundSub.apply(frame)
-        fgmask = cv2.morphologyEx(fgmask, cv2.MORPH_OPEN, self.kernel)
+        return self.extract(self.subtract(frame))
+
+    def subtract(self, frame: MatLike) -> MatLike:
+        """
+        Updates the background model with a frame and returns its raw foreground mask.
+
+        The background model is stateful, so frames must be subtracted one at a time and in order.
+
+        Args:
+            frame (MatLike): The current video frame.
+
+        Returns:
+            MatLike: The raw foreground mask.
+        """
+        with self.profiler.stage("mog2"):
+            return self.backgroundSub.apply(frame)
+
+    def extract(self, fgmask: MatLike) -> tuple[set["Detection"], "MatLike"]:
+        """
+        Cleans a raw foreground mask and finds the objects in it.
+
+        This does not touch the background model, so masks of different frames may be extracted in
+        parallel.
+
+        Args:
+            fgmask (MatLike): A raw foreground mask from `subtract`.
+
+        Returns:
+            tuple[set[Detection], MatLike]: Set of detected objects and the cleaned foreground mask.
+        """
+        with self.profiler.stage("morphology"):
+            fgmask = cv2.morphologyEx(fgmask, cv2.MORPH_OPEN, self.kernel)
         # Find contours on the foreground
-        detections = self._get_contours(fgmask)
+        with self.profiler.stage("contours"):
+            detections = self._get_contours(fgmask)
+        if self.merge_gap is not None or self.merge_iou is not None:
+            with self.profiler.stage("merge"):
+                detections = merge_detections(detections, self.merge_gap, self.merge_iou)
         return detections, fgmask
 
     def _get_contours(self, frame: MatLike) -> set[Detection]:
@@ -0,0 +1,199 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import cv2
+import numpy as np
+
+from .constants import BATOMETER
+from .detectionCache import video_fingerprint
+from .detectionObject import Detection, Point
+from .detectorBackend import DetectorBackend
+
+logger = logging.getLogger(f"{BATOMETER}.OnnxDetector")
+
+ONNX_INPUT_SIZE = 640  # Side of the square model input
+ONNX_BATCH_SIZE = 8
+ONNX_MAX_LATENCY = 0.05  # Seconds a frame waits for its batch to fill before a partial batch runs
+ONNX_SCORE_THRESHOLD = 0.3
+ONNX_NMS_THRESHOLD = 0.45
+LETTERBOX_COLOUR = (114, 114, 114)  # Padding colour YOLO models are trained with
+_CLOSE = object()
+
+
+class _Letterbox:
+    __slots__ = ("scale", "pad_x", "pad_y", "shape")
+
+    def __init__(self, scale: float, pad_x: int, pad_y: int, shape: tuple[int, int]) -> None:
+        self.scale = scale
+        self.pad_x = pad_x
+        self.pad_y = pad_y
+        self.shape = shape  # (height, width) of the frame
+
+
+class OnnxDetector(DetectorBackend):
+    """
+    Detects objects with a learned model exported to ONNX (e.g. YOLOv8 trained on a `--export-dataset`
+    export), run on the CPU with OpenCV's DNN module.
+
+    Running a model on one frame at a time leaves most of the CPU idle, so `submit` only queues frames.
+    An inference thread takes them in batches of up to `batch_size`, running a partial batch once the
+    oldest queued frame has waited `max_latency` seconds, so a slow or paused source is never held up
+    waiting for a batch to fill. `collect` waits for the frame's batch, then decodes its boxes; decoding
+    runs on the caller's thread, so the pipeline's extract pool decodes frames of a batch in parallel.
+
+    The model takes a (batch, 3, size, size) RGB input scaled to [0, 1], and returns for each frame one
+    column per candidate box, as YOLOv8 exports do: centre x, centre y, width and height in input pixels,
+    followed by one score per class. Outputs of shape (batch, 4 + classes, height, width) are also
+    accepted and read as height * width candidates.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        input_size: int = ONNX_INPUT_SIZE,
+        batch_size: int = ONNX_BATCH_SIZE,
+        max_latency: float = ONNX_MAX_LATENCY,
+        score_threshold: float = ONNX_SCORE_THRESHOLD,
+        nms_threshold: float = ONNX_NMS_THRESHOLD,
+    ) -> None:
+        """
+        Args:
+            model_path (str): Path of the `.onnx` model.
+            input_size (int): Side of the square model input; frames are letterboxed to it.
+            batch_size (int): Maximum frames per inference. Keep it at most the pipeline queue size, or
+                batches only ever fill up to the frames the pipeline lets through.
+            max_latency (float): Seconds the oldest queued frame waits for the batch to fill.
+            score_threshold (float): Minimum class score of a detection.
+            nms_threshold (float): Overlap above which the lower scoring of two boxes is suppressed.
+        """
+        self.model_path = model_path
+        self.input_size = input_size
+        self.batch_size = batch_size
+        self.max_latency = max_latency
+        self.score_threshold = score_threshold
+        self.nms_threshold = nms_threshold
+        self.net = cv2.dnn.readNetFromONNX(model_path)
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        self.batches = 0
+        self.frames = 0
+        self._model_fingerprint = video_fingerprint(model_path)
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._inference_loop, name="batometer-inference", daemon=True)
+        self._thread.start()
+        logger.info(
+            f"Loaded {model_path} // Input: {input_size} - Batch size: {batch_size} - "
+            f"Max latency: {max_latency * 1000:.0f}ms"
+        )
+
+    def params(self) -> dict:
+        return {
+            "detector": "onnx",
+            "model": self._model_fingerprint,
+            "input_size": self.input_size,
+            "score_threshold": self.score_threshold,
+            "nms_threshold": self.nms_threshold,
+        }
+
+    def submit(self, frame: "cv2.typing.MatLike") -> Future:
+        future: Future = Future()
+        self._queue.put((frame, future, time.perf_counter()))
+        return future
+
+    def collect(self, pending: Future) -> tuple[set[Detection], "cv2.typing.MatLike"]:
+        output, letterbox = pending.result()
+        return self._decode(output, letterbox)
+
+    def close(self) -> None:
+        self._queue.put(_CLOSE)
+        self._thread.join()
+        if self.batches:
+            per_batch = self.frames / self.batches
+            logger.info(f"Ran {self.frames} frames in {self.batches} batches ({per_batch:.1f} per batch)")
+
+    def _next_batch(self) -> tuple[list[tuple["cv2.typing.MatLike", Future, float]], bool]:
+        first = self._queue.get()
+        if first is _CLOSE:
+            return [], True
+        batch = [first]
+        deadline = first[2] + self.max_latency
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.perf_counter()))
+            except queue.Empty:
+                break
+            if item is _CLOSE:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _inference_loop(self) -> None:
+        closing = False
+        while not closing:
+            batch, closing = self._next_batch()
+            if not batch:
+                continue
+            try:
+                images, letterboxes = zip(*(self._letterbox(frame) for frame, _, _ in batch))
+                blob = cv2.dnn.blobFromImages(list(images), 1 / 255, swapRB=True)
+                self.net.setInput(blob)
+                outputs = self.net.forward()
+                outputs = outputs.reshape(len(batch), outputs.shape[1], -1)
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.frames += len(batch)
+            for (_, future, _), output, letterbox in zip(batch, outputs, letterboxes):
+                future.set_result((output, letterbox))
+
+    def _letterbox(self, frame: "cv2.typing.MatLike") -> tuple["cv2.typing.MatLike", _Letterbox]:
+        height, width = frame.shape[:2]
+        scale = min(self.input_size / width, self.input_size / height)
+        resized_width, resized_height = round(width * scale), round(height * scale)
+        pad_x = (self.input_size - resized_width) // 2
+        pad_y = (self.input_size - resized_height) // 2
+        image = cv2.resize(frame, (resized_width, resized_height), interpolation=cv2.INTER_AREA)
+        image = cv2.copyMakeBorder(
+            image,
+            pad_y,
+            self.input_size - resized_height - pad_y,
+            pad_x,
+            self.input_size - resized_width - pad_x,
+            cv2.BORDER_CONSTANT,
+            value=LETTERBOX_COLOUR,
+        )
+        return image, _Letterbox(scale, pad_x, pad_y, (height, width))
+
+    def _decode(
+        self, output: np.ndarray, letterbox: _Letterbox
+    ) -> tuple[set[Detection], "cv2.typing.MatLike"]:
+        candidates = output.T  # One row per candidate: cx, cy, w, h, class scores...
+        scores = candidates[:, 4:].max(axis=1)
+        keep = scores >= self.score_threshold
+        candidates, scores = candidates[keep], scores[keep]
+        height, width = letterbox.shape
+        mask = np.zeros((height, width), dtype=np.uint8)
+        detections: set[Detection] = set()
+        if not len(candidates):
+            return detections, mask
+        boxes = np.empty((len(candidates), 4), dtype=np.float32)
+        boxes[:, 0] = (candidates[:, 0] - candidates[:, 2] / 2 - letterbox.pad_x) / letterbox.scale
+        boxes[:, 1] = (candidates[:, 1] - candidates[:, 3] / 2 - letterbox.pad_y) / letterbox.scale
+        boxes[:, 2:] = candidates[:, 2:4] / letterbox.scale
+        kept = cv2.dnn.NMSBoxes(
+            boxes.tolist(), scores.tolist(), self.score_threshold, self.nms_threshold
+        )
+        for index in np.asarray(kept, dtype=int).reshape(-1):
+            x, y, w, h = boxes[index]
+            x1, y1 = max(0, int(round(x))), max(0, int(round(y)))
+            x2, y2 = min(width, int(round(x + w))), min(height, int(round(y + h)))
+            if x2 <= x1 or y2 <= y1:
+                continue
+            detections.add(Detection(Point(x1, y1), x2 - x1, y2 - y1, float(scores[index])))
+            mask[y1:y2, x1:x2] = 255
+        return detections, mask
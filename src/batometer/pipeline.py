@@ -0,0 +1,387 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+import cv2
+
+from .constants import BATOMETER
+from .detectionObject import Detection, IdentifiedObject
+from .detectorBackend import DetectorBackend
+from .profiler import NULL_PROFILER, StageProfiler
+from .videoManager import VideoManager
+
+logger = logging.getLogger(f"{BATOMETER}.pipeline")
+
+PIPELINE_QUEUE_SIZE = 8  # Frames buffered between two stages
+PIPELINE_DETECT_WORKERS = 2
+PIPELINE_POLL_SECONDS = 0.1  # How often blocked stages check for a stop request
+_END = object()
+
+
+@dataclass
+class PipelineFrame:
+    """
+    A frame travelling through the pipeline, filled in stage by stage.
+    """
+
+    frame_num: int
+    frame_time: str
+    frame: "cv2.typing.MatLike"  # Drawn on by the track stage
+    original_frame: "cv2.typing.MatLike"
+    objects_frame: Optional["cv2.typing.MatLike"] = None
+    detections: set[Detection] = field(default_factory=set)
+    raw_detections: set[Detection] = field(default_factory=set)  # Detector output, before tracking takes any
+    tracked: set[IdentifiedObject] = field(default_factory=set)
+    predicted: set[IdentifiedObject] = field(default_factory=set)
+    overlays: dict[str, "cv2.typing.MatLike"] = field(default_factory=dict)
+    labels: list[str] = field(default_factory=list)  # Training labels, taken while the tracks are current
+    checkpoint: Optional[dict] = None  # Output state taken on the track thread, completed by the write stage
+    live_tracks: int = 0
+    timings: dict[str, tuple[float, float]] = field(default_factory=dict)  # stage -> (wall, cpu) seconds
+
+
+class StageStats:
+    """
+    Busy and waiting time of one pipeline stage.
+    """
+
+    def __init__(self, name: str, workers: int = 1) -> None:
+        """
+        Args:
+            name (str): Name of the stage.
+            workers (int): Number of threads running the stage.
+        """
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.busy = 0.0
+        self.starved = 0.0  # Waiting for input
+        self.blocked = 0.0  # Waiting for room downstream
+        self._lock = threading.Lock()
+
+    def add(self, busy: float = 0.0, starved: float = 0.0, blocked: float = 0.0, items: int = 0) -> None:
+        with self._lock:
+            self.busy += busy
+            self.starved += starved
+            self.blocked += blocked
+            self.items += items
+
+
+class _Timed:
+    __slots__ = ("item", "stats", "name", "wall_start", "cpu_start")
+
+    def __init__(self, item: PipelineFrame, stats: StageStats, name: str) -> None:
+        self.item = item
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.thread_time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        wall = time.perf_counter() - self.wall_start
+        self.item.timings[self.name] = (wall, time.thread_time() - self.cpu_start)
+        self.stats.add(busy=wall, items=1)
+
+
+class FramePipeline:
+    """
+    Runs the processing of a video as concurrent stages connected by bounded queues.
+
+    - decode: reads frames on its own thread.
+    - subtract: runs the detector's `submit` (e.g. updates the background model or queues the frame for
+      batched inference), one frame at a time and in order.
+    - extract: runs the detector's `collect` (e.g. cleans masks and finds contours) on a pool of
+      `detect_workers` threads.
+    - track: runs `track` on every frame in order, on a single thread.
+    - render: runs the `renderers` of a frame in parallel, while the track stage waits, so they can read
+      the tracker state without locking.
+    - write: runs `write` on every frame on its own thread.
+
+    The consumer (the GUI) takes finished frames with `get`. Full queues block the stage before them, so
+    a consumer that stops taking frames, e.g. when paused, stops processing without unbounded memory.
+
+    With `drop_stale`, for live sources, the decode stage never blocks: a decoded frame that the subtract
+    stage has not taken yet is replaced by the next one. At most `3 * queue_size + 3` decoded frames then
+    wait for the consumer (the queues, plus one held by each of the decode, subtract and track stages),
+    however slow it is, so a frame reaches it at most that many frames after it was decoded.
+    """
+
+    def __init__(
+        self,
+        video_manager: VideoManager,
+        detector: DetectorBackend,
+        track: Callable[[PipelineFrame], None],
+        renderers: dict[str, Callable[[PipelineFrame], "cv2.typing.MatLike"]],
+        write: Optional[Callable[[PipelineFrame], None]] = None,
+        detect_workers: int = PIPELINE_DETECT_WORKERS,
+        queue_size: int = PIPELINE_QUEUE_SIZE,
+        profiler: StageProfiler = NULL_PROFILER,
+        drop_stale: bool = False,
+    ) -> None:
+        """
+        Args:
+            video_manager (VideoManager): Source of the frames.
+            detector (DetectorBackend): Detector; its `submit` is only called by the subtract stage.
+            track (Callable[[PipelineFrame], None]): Updates the tracking state from a frame's detections.
+            renderers (dict[str, Callable]): Overlay builders, stored in `PipelineFrame.overlays` by name.
+            write (Optional[Callable[[PipelineFrame], None]]): Writes a frame's outputs to disk.
+            detect_workers (int): Threads collecting detections, e.g. from foreground masks.
+            queue_size (int): Capacity of each queue between stages.
+            profiler (StageProfiler): Profiler the detector and tracker time their steps with; steps timed
+                in the subtract, extract and track stages are added to the frame's `timings`.
+            drop_stale (bool): Drop decoded frames the subtract stage has not taken when a newer one is
+                decoded, instead of blocking the decode stage.
+        """
+        self.video_manager = video_manager
+        self.detector = detector
+        self.track = track
+        self.renderers = renderers
+        self.write = write
+        self.profiler = profiler
+        self.drop_stale = drop_stale
+        self.dropped_frames = 0  # Decoded frames replaced by a newer one, with `drop_stale`
+        self.completed = False  # Whether every frame of the source reached the consumer
+        self.stats = {
+            "decode": StageStats("decode"),
+            "subtract": StageStats("subtract"),
+            "extract": StageStats("extract", detect_workers),
+            "track": StageStats("track"),
+            "render": StageStats("render", max(1, len(renderers))),
+            "write": StageStats("write"),
+        }
+        self._decoded: queue.Queue = queue.Queue(queue_size)
+        self._extracting: queue.Queue = queue.Queue(queue_size)
+        self._finished: queue.Queue = queue.Queue(queue_size)
+        self._writing: queue.Queue = queue.Queue(queue_size)
+        self._detect_pool = ThreadPoolExecutor(detect_workers, thread_name_prefix="batometer-extract")
+        self._render_pool = ThreadPoolExecutor(max(1, len(renderers)), thread_name_prefix="batometer-render")
+        self._stop = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._start = time.perf_counter()
+        self._threads = [
+            threading.Thread(
+                target=self._guard, args=(target, downstream), name=f"batometer-{name}", daemon=True
+            )
+            for name, target, downstream in (
+                ("decode", self._decode_loop, self._decoded),
+                ("subtract", self._subtract_loop, self._extracting),
+                ("track", self._track_loop, self._finished),
+            )
+        ]
+        self._writer = threading.Thread(target=self._write_loop, name="batometer-write", daemon=True)
+        for thread in self._threads:
+            thread.start()
+        self._writer.start()
+
+    def get(self) -> Optional[PipelineFrame]:
+        """
+        Waits for the next finished frame.
+
+        Returns:
+            Optional[PipelineFrame]: The next frame in order, or None once the source is exhausted.
+
+        Raises:
+            Exception: Any error raised by a stage.
+        """
+        if self.completed:
+            return None
+        item = self._get(self._finished)
+        if self._error is not None:
+            raise self._error
+        if item is _END:
+            self.completed = True
+            return None
+        return item
+
+    def get_available(self) -> list[PipelineFrame]:
+        """
+        Waits for the next finished frame, then also takes every other frame that is already finished.
+
+        Returns:
+            list[PipelineFrame]: Finished frames in order; empty once the source is exhausted.
+        """
+        item = self.get()
+        items = []
+        while item is not None:
+            items.append(item)
+            if self._finished.empty():
+                break
+            item = self.get()
+        return items
+
+    def close(self) -> None:
+        """
+        Stops the decode, detect and track stages, finishes any queued writes and logs the utilisation.
+        """
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self._writer.join()
+        self._detect_pool.shutdown()
+        self._render_pool.shutdown()
+        if self.dropped_frames:
+            logger.info(f"Pipeline dropped {self.dropped_frames} stale decoded frames")
+        logger.info("Pipeline utilisation\n" + self.report())
+
+    def report(self) -> str:
+        """
+        Returns:
+            str: Table of items, busy time, utilisation and time spent starved or blocked per stage.
+        """
+        elapsed = time.perf_counter() - self._start
+        lines = [
+            f"{'stage':<10}{'workers':>8}{'frames':>8}{'busy s':>9}{'util %':>8}"
+            f"{'starved s':>11}{'blocked s':>11}"
+        ]
+        for stats in self.stats.values():
+            utilisation = 100 * stats.busy / (elapsed * stats.workers) if elapsed else 0.0
+            lines.append(
+                f"{stats.name:<10}{stats.workers:>8}{stats.items:>8}{stats.busy:>9.2f}{utilisation:>8.1f}"
+                f"{stats.starved:>11.2f}{stats.blocked:>11.2f}"
+            )
+        return "\n".join(lines)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _guard(self, loop: Callable[[], None], downstream: queue.Queue) -> None:
+        try:
+            loop()
+        except BaseException as e:
+            logger.exception("Pipeline stage failed")
+            self._error = e
+            self._stop.set()
+        self._put(downstream, _END)
+
+    def _get(self, source: queue.Queue, stats: Optional[StageStats] = None):
+        start = time.perf_counter()
+        while True:
+            try:
+                item = source.get(timeout=PIPELINE_POLL_SECONDS)
+                break
+            except queue.Empty:
+                if self._stop.is_set():
+                    item = _END
+                    break
+        if stats is not None:
+            stats.add(starved=time.perf_counter() - start)
+        return item
+
+    def _put(self, target: queue.Queue, item, stats: Optional[StageStats] = None) -> None:
+        start = time.perf_counter()
+        while True:
+            try:
+                target.put(item, timeout=PIPELINE_POLL_SECONDS)
+                break
+            except queue.Full:
+                if self._stop.is_set():
+                    break
+        if stats is not None:
+            stats.add(blocked=time.perf_counter() - start)
+
+    def _decode_loop(self) -> None:
+        stats = self.stats["decode"]
+        video_manager = self.video_manager
+        while not self._stop.is_set() and video_manager.has_more_frames():
+            start, cpu_start = time.perf_counter(), time.thread_time()
+            frame = video_manager.read_frame()
+            item = PipelineFrame(video_manager.frame_num, video_manager.frame_time, frame, frame.copy())
+            wall = time.perf_counter() - start
+            item.timings["decode"] = (wall, time.thread_time() - cpu_start)
+            stats.add(busy=wall, items=1)
+            if self.drop_stale:
+                self._put_latest(self._decoded, item)
+            else:
+                self._put(self._decoded, item, stats)
+
+    def _put_latest(self, target: queue.Queue, item: PipelineFrame) -> None:
+        while True:
+            try:
+                target.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    target.get_nowait()
+                    self.dropped_frames += 1
+                except queue.Empty:
+                    pass  # Taken downstream in the meantime
+
+    def _subtract_loop(self) -> None:
+        stats = self.stats["subtract"]
+        while True:
+            item = self._get(self._decoded, stats)
+            if item is _END:
+                return
+            with _Timed(item, stats, "subtract"), self.profiler.collect(item.timings):
+                pending = self.detector.submit(item.frame)
+            self._put(self._extracting, self._detect_pool.submit(self._extract, item, pending), stats)
+
+    def _extract(self, item: PipelineFrame, pending) -> PipelineFrame:
+        with _Timed(item, self.stats["extract"], "extract"), self.profiler.collect(item.timings):
+            item.detections, item.objects_frame = self.detector.collect(pending)
+        return item
+
+    def _track_loop(self) -> None:
+        stats = self.stats["track"]
+        while True:
+            future = self._get(self._extracting, stats)
+            if future is _END:
+                return
+            start = time.perf_counter()
+            item = future.result()  # Frames arrive in order however the pool schedules them
+            stats.add(starved=time.perf_counter() - start)
+            with _Timed(item, stats, "track"), self.profiler.collect(item.timings):
+                self.track(item)
+            futures: dict[str, Future] = {
+                name: self._render_pool.submit(self._render, name, render, item)
+                for name, render in self.renderers.items()
+            }
+            for name, render_future in futures.items():
+                item.overlays[name] = render_future.result()
+            self.stats["render"].add(items=1)
+            if self.write is not None:
+                self._writing.put(item)  # The writer drains even after a stop, so this cannot block forever
+            self._put(self._finished, item, stats)
+
+    def _render(
+        self, name: str, render: Callable[[PipelineFrame], "cv2.typing.MatLike"], item: PipelineFrame
+    ) -> "cv2.typing.MatLike":
+        start, cpu_start = time.perf_counter(), time.thread_time()
+        overlay = render(item)
+        wall = time.perf_counter() - start
+        item.timings[name] = (wall, time.thread_time() - cpu_start)
+        self.stats["render"].add(busy=wall)
+        return overlay
+
+    def _write_loop(self) -> None:
+        stats = self.stats["write"]
+        while True:
+            start = time.perf_counter()
+            try:
+                item = self._writing.get(timeout=PIPELINE_POLL_SECONDS)
+            except queue.Empty:
+                stats.add(starved=time.perf_counter() - start)
+                # The track stage puts its last frame before exiting, so nothing can arrive after this
+                if not any(thread.is_alive() for thread in self._threads) and self._writing.empty():
+                    return
+                continue
+            stats.add(starved=time.perf_counter() - start)
+            start = time.perf_counter()
+            try:
+                # Not added to the frame's timings, as the consumer may already be reading them
+                self.write(item)
+            except Exception as e:
+                logger.exception("Pipeline write failed")
+                self._error = e
+                self._stop.set()
+            stats.add(busy=time.perf_counter() - start, items=1)
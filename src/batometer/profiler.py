@@ -0,0 +1,218 @@
+import csv
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from typing import Optional
+
+import numpy as np
+
+from .constants import BATOMETER
+
+logger = logging.getLogger(f"{BATOMETER}.profiler")
+
+PROFILER_WINDOW = 1000  # Frames kept for the rolling percentiles
+_NULL_STAGE = nullcontext()
+_frame_timings = threading.local()  # Timings of the frame a pipeline thread is working on, see `collect`
+
+
+class _Stage:
+    __slots__ = ("profiler", "name", "wall_start", "cpu_start")
+
+    def __init__(self, profiler: "StageProfiler", name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.thread_time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler._record(
+            self.name, time.perf_counter() - self.wall_start, time.thread_time() - self.cpu_start
+        )
+
+
+class _Collect:
+    __slots__ = ("timings", "previous")
+
+    def __init__(self, timings: dict[str, tuple[float, float]]) -> None:
+        self.timings = timings
+
+    def __enter__(self):
+        self.previous = getattr(_frame_timings, "timings", None)
+        _frame_timings.timings = self.timings
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _frame_timings.timings = self.previous
+
+
+class StageProfiler:
+    """
+    Per-stage wall and CPU timers for the processing pipeline.
+
+    Wrap each stage in `with profiler.stage("name"):` and call `end_frame` once per frame. Times of a
+    stage within one frame are summed, rolling percentiles are kept over the last `window` frames, and
+    totals over the whole run. When disabled, `stage` returns a shared no-op context manager, so
+    instrumented code costs close to nothing.
+
+    Code running on pipeline threads, e.g. the detector, is timed inside `collect`: its stages go into the
+    timings of the frame being worked on, which the consumer passes to `record` with the frame.
+    """
+
+    def __init__(
+        self, enabled: bool = False, csv_path: Optional[str] = None, window: int = PROFILER_WINDOW
+    ) -> None:
+        """
+        Args:
+            enabled (bool): Whether to record timings.
+            csv_path (Optional[str]): Optional path of a per-frame timing CSV (frame, stage, wall_ms, cpu_ms).
+            window (int): Number of frames kept for rolling percentiles.
+        """
+        self.enabled = enabled
+        self.window = window
+        self._frame: dict[str, list[float]] = {}
+        self._recent: dict[str, deque] = {}
+        self._totals: dict[str, list[float]] = {}  # name -> [frames, wall, cpu]
+        self._frames = 0
+        self._start = time.perf_counter()
+        self._csv_file = None
+        self._csv_writer = None
+        if enabled and csv_path:
+            self._csv_file = open(csv_path, "w", newline="")
+            self._csv_writer = csv.writer(self._csv_file)
+            self._csv_writer.writerow(["frame", "stage", "wall_ms", "cpu_ms"])
+
+    def stage(self, name: str):
+        """
+        Args:
+            name (str): Name of the stage.
+
+        Returns:
+            A context manager timing the enclosed block.
+        """
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def collect(self, timings: dict[str, tuple[float, float]]):
+        """
+        Args:
+            timings (dict[str, tuple[float, float]]): Stage -> (wall, cpu) seconds of one frame, e.g.
+                `PipelineFrame.timings`.
+
+        Returns:
+            A context manager sending the stages timed on this thread to `timings` instead of the current
+            frame of the profiler.
+        """
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Collect(timings)
+
+    def record(self, name: str, wall: float, cpu: float) -> None:
+        """
+        Adds a stage time measured elsewhere, e.g. on a pipeline thread, to the current frame.
+
+        The profiler itself is not thread-safe; call this from the thread that calls `end_frame`.
+
+        Args:
+            name (str): Name of the stage.
+            wall (float): Wall time in seconds.
+            cpu (float): CPU time in seconds.
+        """
+        if self.enabled:
+            self._record(name, wall, cpu)
+
+    def _record(self, name: str, wall: float, cpu: float) -> None:
+        frame_timings = getattr(_frame_timings, "timings", None)
+        if frame_timings is not None:
+            previous_wall, previous_cpu = frame_timings.get(name, (0.0, 0.0))
+            frame_timings[name] = (previous_wall + wall, previous_cpu + cpu)
+            return
+        times = self._frame.get(name)
+        if times is None:
+            self._frame[name] = [wall, cpu]
+        else:
+            times[0] += wall
+            times[1] += cpu
+
+    def end_frame(self, frame_num: int) -> None:
+        """
+        Closes the timings of the current frame.
+
+        Args:
+            frame_num (int): Number of the frame just processed.
+        """
+        if not self.enabled:
+            return
+        self._frames += 1
+        for name, (wall, cpu) in self._frame.items():
+            if name not in self._totals:
+                self._totals[name] = [0, 0.0, 0.0]
+                self._recent[name] = deque(maxlen=self.window)
+            totals = self._totals[name]
+            totals[0] += 1
+            totals[1] += wall
+            totals[2] += cpu
+            self._recent[name].append(wall)
+            if self._csv_writer is not None:
+                self._csv_writer.writerow([frame_num, name, f"{wall * 1000:.3f}", f"{cpu * 1000:.3f}"])
+        self._frame = {}
+
+    def recent_ms(self, name: str) -> float:
+        """
+        Args:
+            name (str): Name of the stage.
+
+        Returns:
+            float: Mean wall time of the stage over the rolling window in milliseconds (0 if unseen).
+        """
+        recent = self._recent.get(name)
+        if not recent:
+            return 0.0
+        return 1000 * sum(recent) / len(recent)
+
+    def stage_names(self) -> list[str]:
+        """
+        Returns:
+            list[str]: Names of all recorded stages, in first-seen order.
+        """
+        return list(self._totals)
+
+    def report(self) -> str:
+        """
+        Returns:
+            str: Table of total and per-frame wall and CPU times for every stage.
+        """
+        elapsed = time.perf_counter() - self._start
+        lines = [
+            f"Processed {self._frames} frames in {elapsed:.2f}s "
+            f"({self._frames / elapsed if elapsed else 0:.1f} fps)",
+            f"{'stage':<18}{'total s':>9}{'% wall':>8}{'mean ms':>9}{'p50 ms':>8}{'p95 ms':>8}"
+            f"{'p99 ms':>8}{'cpu ms':>8}",
+        ]
+        for name, (frames, wall, cpu) in sorted(self._totals.items(), key=lambda item: -item[1][1]):
+            p50, p95, p99 = np.percentile(np.array(self._recent[name]) * 1000, [50, 95, 99])
+            lines.append(
+                f"{name:<18}{wall:>9.2f}{100 * wall / elapsed if elapsed else 0:>7.1f}%"
+                f"{1000 * wall / frames:>9.2f}{p50:>8.2f}{p95:>8.2f}{p99:>8.2f}{1000 * cpu / frames:>8.2f}"
+            )
+        return "\n".join(lines)
+
+    def close(self) -> None:
+        """
+        Logs the end-of-run report and closes the timing CSV.
+        """
+        if not self.enabled:
+            return
+        logger.info("Pipeline timings\n" + self.report())
+        if self._csv_file is not None:
+            self._csv_file.close()
+            self._csv_file = None
+            self._csv_writer = None
+
+
+NULL_PROFILER = StageProfiler(enabled=False)
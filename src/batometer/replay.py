@@ -0,0 +1,255 @@
+import argparse
+import logging
+import os
+import sys
+import time
+from typing import Optional
+
+import cv2
+from dotenv import load_dotenv
+
+from .activitySummary import ACTIVITY_BIN_SECONDS, ActivitySummaryWriter
+from .analysis import BAT_ANALYSIS_PATH, save_bat_analysis
+from .blobMerging import merge_detections
+from .cascadeDetector import CASCADE_MIN_SCORE
+from .constants import BATOMETER
+from .detectionCache import DetectionCache
+from .detectionObject import IdentifiedObject
+from .detectorBackend import DETECTOR_BACKENDS
+from .detectors import create_detector
+from .gateCounter import GATE_BIN_SECONDS, GateCounter, load_gates
+from .heatmap import Heatmap
+from .objectTracker import ObjectTracker
+from .onnxDetector import ONNX_INPUT_SIZE, ONNX_SCORE_THRESHOLD
+from .resultsLog import ResultsLogWriter
+from .trackAnalytics import save_track_features, track_features
+from .trackStitching import STITCH_MAX_GAP, stitch_tracks
+
+FORMAT = "%(asctime)s %(levelname)-8s %(message)s"
+logging.basicConfig(level=logging.INFO, format=FORMAT)
+logger = logging.getLogger(f"{BATOMETER}.replay")
+
+HEATMAP_OUTPUT_PATH = "heatmap.png"
+
+
+def replay_detections(
+    cache: DetectionCache,
+    max_missed_frames: int = 10,
+    prediction_range: int = IdentifiedObject.prediction_range,
+    analysis_path: Optional[str] = BAT_ANALYSIS_PATH,
+    heatmap_path: Optional[str] = HEATMAP_OUTPUT_PATH,
+    results_log_path: Optional[str] = None,
+    min_score: float = 0.0,
+    track_features_path: Optional[str] = None,
+    gates_path: Optional[str] = None,
+    gate_counts_path: Optional[str] = None,
+    gate_bin_seconds: float = GATE_BIN_SECONDS,
+    activity_summary_path: Optional[str] = None,
+    activity_bin_seconds: float = ACTIVITY_BIN_SECONDS,
+    stitch_max_gap: Optional[int] = None,
+    merge_gap: Optional[int] = None,
+    merge_iou: Optional[float] = None,
+) -> ObjectTracker:
+    """
+    Reruns tracking and heatmaps over cached detections, without decoding the video.
+
+    Args:
+        cache (DetectionCache): Cached detector output of a video.
+        max_missed_frames (int): Frames an object may go undetected before it is dropped.
+        prediction_range (int): Radius around the predicted position in which detections match.
+        analysis_path (Optional[str]): Where to write the track summary CSV (None to skip).
+        heatmap_path (Optional[str]): Where to write the heatmap image (None to skip).
+        results_log_path (Optional[str]): Directory for a per-frame results log (None to skip).
+        min_score (float): Detections scoring below this are ignored, see `ObjectTracker`.
+        track_features_path (Optional[str]): Where to write the per-track feature table CSV (None to skip).
+        gates_path (Optional[str]): JSON config of counting gates, see `load_gates` (None to skip).
+        gate_counts_path (Optional[str]): Where to write the per-bin gate counts CSV (None to skip).
+        gate_bin_seconds (float): Duration of each gate count bin in seconds.
+        activity_summary_path (Optional[str]): Where to write the per-bin activity summary CSV (None to skip).
+        activity_bin_seconds (float): Duration of each activity summary bin in seconds.
+        stitch_max_gap (Optional[int]): Join track fragments up to this many frames apart before the
+            analysis, see `stitch_tracks` (None to skip).
+        merge_gap (Optional[int]): Merge cached blobs at most this many pixels apart before tracking, see
+            `merge_detections` (None to keep every blob).
+        merge_iou (Optional[float]): Merge cached blobs overlapping by at least this intersection over union.
+
+    Returns:
+        ObjectTracker: The tracker after replaying every frame.
+    """
+    start = time.perf_counter()
+    tracker = ObjectTracker(
+        cache.width,
+        cache.height,
+        max_missed_frames=max_missed_frames,
+        prediction_range=prediction_range,
+        min_score=min_score,
+    )
+    heatmap = Heatmap(cache.width, cache.height)
+    results_log = ResultsLogWriter(results_log_path) if results_log_path else None
+    gate_counter = None
+    if gates_path:
+        gate_counter = GateCounter(
+            load_gates(gates_path), cache.fps, bin_seconds=gate_bin_seconds, output_path=gate_counts_path
+        )
+    activity_summary = None
+    if activity_summary_path:
+        activity_summary = ActivitySummaryWriter(
+            activity_summary_path, tracker, cache.fps, bin_seconds=activity_bin_seconds
+        )
+    merging = merge_gap is not None or merge_iou is not None
+    for frame_num, detections in cache.frames():
+        if merging:
+            detections = merge_detections(detections, merge_gap, merge_iou)
+        num_detections = len(detections)
+        tracked_detections, predicted_objs = tracker.update(detections)
+        heatmap.update(tracked_detections)
+        if results_log is not None:
+            results_log.append_frame(frame_num, tracked_detections, predicted_objs)
+        if gate_counter is not None:
+            gate_counter.update(frame_num, tracked_detections)
+        if activity_summary is not None:
+            activity_summary.update(frame_num, num_detections, tracked_detections, predicted_objs)
+    if results_log is not None:
+        results_log.close()
+    if gate_counter is not None:
+        gate_counter.close()
+    if activity_summary is not None:
+        activity_summary.close()
+    elapsed = time.perf_counter() - start
+    logger.info(f"Replayed {cache.num_frames} frames into {tracker.id_count} tracks in {elapsed:.2f}s")
+
+    if stitch_max_gap is not None:
+        tracker.all_objects = set(stitch_tracks(tracker.all_objects, max_gap=stitch_max_gap))
+    if analysis_path:
+        save_bat_analysis(tracker, analysis_path, track_features_path)
+    elif track_features_path:
+        save_track_features(track_features(tracker.all_objects), track_features_path)
+    if heatmap_path:
+        reference_frame = cache.reference_frame()
+        if reference_frame is not None:
+            heatmap_img = tracker.create_heatmap_overlay(reference_frame)
+        else:
+            heatmap_img = tracker.pixel_heatmap.render()
+        cv2.imwrite(heatmap_path, heatmap_img)
+    return tracker
+
+
+if __name__ == "__main__":
+    """
+    Command-line entry point to replay cached detections with different tracker settings.
+    """
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Replay cached Bat-O-Meter detections through the tracker")
+    parser.add_argument(
+        "--video-path",
+        type=str,
+        default=os.getenv("VIDEO_PATH"),
+        help="Path to the video whose detections were cached (or set VIDEO_PATH env variable)",
+    )
+    parser.add_argument(
+        "--detection-cache", type=str, required=True, help="Root directory of the detection cache"
+    )
+    parser.add_argument(
+        "--detector", choices=DETECTOR_BACKENDS, default="mog2", help="Detector the cache was made with"
+    )
+    parser.add_argument(
+        "--detector-model", type=str, default=None, help="Model of the onnx or cascade detector of the cache"
+    )
+    parser.add_argument(
+        "--detector-input-size", type=int, default=ONNX_INPUT_SIZE, help="Model input the cache was made with"
+    )
+    parser.add_argument(
+        "--detector-score-threshold",
+        type=float,
+        default=ONNX_SCORE_THRESHOLD,
+        help="Minimum model score the cache was made with",
+    )
+    parser.add_argument(
+        "--detector-history", type=int, default=500, help="MOG2 history the cache was made with"
+    )
+    parser.add_argument(
+        "--detector-var-threshold", type=float, default=100, help="MOG2 threshold the cache was made with"
+    )
+    parser.add_argument(
+        "--detector-kernel-size", type=int, default=5, help="Kernel size the cache was made with"
+    )
+    parser.add_argument("--max-missed-frames", type=int, default=10)
+    parser.add_argument("--prediction-range", type=int, default=IdentifiedObject.prediction_range)
+    parser.add_argument(
+        "--min-detection-score",
+        type=float,
+        default=None,
+        help=f"The tracker ignores detections scoring below this (default {CASCADE_MIN_SCORE} with "
+        "--detector cascade, 0 otherwise)",
+    )
+    parser.add_argument("--analysis-path", type=str, default=BAT_ANALYSIS_PATH)
+    parser.add_argument("--heatmap-path", type=str, default=HEATMAP_OUTPUT_PATH)
+    parser.add_argument("--results-log", type=str, default=None)
+    parser.add_argument("--track-features-path", type=str, default=None)
+    parser.add_argument("--gates", type=str, default=None, help="JSON config of counting gates")
+    parser.add_argument("--gate-counts", type=str, default=None)
+    parser.add_argument("--gate-bin-seconds", type=float, default=GATE_BIN_SECONDS)
+    parser.add_argument("--activity-summary", type=str, default=None)
+    parser.add_argument("--activity-bin-seconds", type=float, default=ACTIVITY_BIN_SECONDS)
+    parser.add_argument("--stitch", action="store_true", help="Join track fragments before the analysis")
+    parser.add_argument("--stitch-max-gap", type=int, default=STITCH_MAX_GAP)
+    parser.add_argument(
+        "--cache-merge-gap", type=int, default=None, help="--merge-gap of the run that wrote the cache"
+    )
+    parser.add_argument(
+        "--cache-merge-iou", type=float, default=None, help="--merge-iou of the run that wrote the cache"
+    )
+    parser.add_argument(
+        "--merge-gap", type=int, default=None, help="Merge the cached blobs again before tracking"
+    )
+    parser.add_argument("--merge-iou", type=float, default=None)
+    args = parser.parse_args()
+    if not args.video_path:
+        logger.error("No video path provided. Use --video-path or set VIDEO_PATH in .env.")
+        sys.exit(1)
+
+    if args.detector in ("onnx", "cascade") and not args.detector_model:
+        logger.error(f"The {args.detector} detector needs --detector-model, to match the cache key.")
+        sys.exit(1)
+    # Only built for its parameters, which key the cache
+    detector = create_detector(
+        args.detector,
+        args.detector_model,
+        input_size=args.detector_input_size,
+        score_threshold=args.detector_score_threshold,
+        history=args.detector_history,
+        var_threshold=args.detector_var_threshold,
+        kernel_size=args.detector_kernel_size,
+        merge_gap=args.cache_merge_gap,
+        merge_iou=args.cache_merge_iou,
+    )
+    detector_params = detector.params()
+    detector.close()
+    min_score = args.min_detection_score
+    if min_score is None:
+        min_score = CASCADE_MIN_SCORE if args.detector == "cascade" else 0.0
+    detection_cache = DetectionCache.find(args.detection_cache, args.video_path, detector_params)
+    if detection_cache is None:
+        logger.error(
+            f"No complete detection cache for {args.video_path} in {args.detection_cache}. "
+            "Run batometer.main with --detection-cache first, and pass its detector and merge options here."
+        )
+        sys.exit(1)
+    replay_detections(
+        detection_cache,
+        max_missed_frames=args.max_missed_frames,
+        prediction_range=args.prediction_range,
+        analysis_path=args.analysis_path,
+        heatmap_path=args.heatmap_path,
+        results_log_path=args.results_log,
+        min_score=min_score,
+        track_features_path=args.track_features_path,
+        gates_path=args.gates,
+        gate_counts_path=args.gate_counts,
+        gate_bin_seconds=args.gate_bin_seconds,
+        activity_summary_path=args.activity_summary,
+        activity_bin_seconds=args.activity_bin_seconds,
+        stitch_max_gap=args.stitch_max_gap if args.stitch else None,
+        merge_gap=args.merge_gap,
+        merge_iou=args.merge_iou,
+    )
@@ -0,0 +1,179 @@
+import logging
+import os
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+
+from .constants import BATOMETER
+from .detectionObject import IdentifiedObject
+
+logger = logging.getLogger(f"{BATOMETER}.ResultsLog")
+
+RESULTS_LOG_COLUMNS: dict[str, "np.typing.DTypeLike"] = {
+    "frame": np.int32,
+    "track_id": np.int32,
+    "x": np.int32,
+    "y": np.int32,
+    "w": np.int32,
+    "h": np.int32,
+    "matched": np.bool_,
+}
+RESULTS_LOG_CHUNK_ROWS = 65536
+CHUNK_GLOB = "chunk_*.npz"
+
+
+class ChunkedColumnWriter:
+    """
+    Streams rows to a directory of columnar `.npz` chunks.
+
+    Rows are buffered in fixed-size column arrays and written out as one chunk (row group) whenever
+    the buffer fills, so memory stays bounded. Chunks are written to a temporary file and renamed,
+    so any chunk visible on disk is complete and can be loaded while the writer is still running.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        columns: dict[str, "np.typing.DTypeLike"],
+        chunk_rows: int,
+        resume: Optional[dict] = None,
+    ) -> None:
+        """
+        Args:
+            path (str): Output directory for the chunks. Existing chunks in it are removed.
+            columns (dict[str, DTypeLike]): Column names and dtypes, in row order.
+            chunk_rows (int): Number of rows buffered before a chunk is written.
+            resume (Optional[dict]): State from `checkpoint`; chunks written up to it are kept, later ones
+                removed.
+        """
+        self.path = Path(path)
+        self.chunk_rows = chunk_rows
+        os.makedirs(self.path, exist_ok=True)
+        kept_chunks = resume["chunks"] if resume else 0
+        for old_chunk in self.path.glob(CHUNK_GLOB):
+            if int(old_chunk.stem.split("_")[1]) >= kept_chunks:
+                old_chunk.unlink()
+        self._columns = {name: np.empty(chunk_rows, dtype=dtype) for name, dtype in columns.items()}
+        self._column_list = list(self._columns.values())
+        self._num_rows = 0
+        self._num_chunks = kept_chunks
+        self.rows_written = resume["rows"] if resume else 0
+
+    def append_row(self, *values) -> None:
+        """
+        Appends one row, with values in column order.
+        """
+        row = self._num_rows
+        for column, value in zip(self._column_list, values):
+            column[row] = value
+        self._num_rows += 1
+        if self._num_rows == self.chunk_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Writes buffered rows as a new chunk.
+        """
+        if self._num_rows == 0:
+            return
+        chunk_path = self.path / f"chunk_{self._num_chunks:06d}.npz"
+        tmp_path = self.path / f".chunk_{self._num_chunks:06d}.tmp.npz"
+        np.savez(tmp_path, **{name: column[: self._num_rows] for name, column in self._columns.items()})
+        os.replace(tmp_path, chunk_path)
+        self.rows_written += self._num_rows
+        self._num_chunks += 1
+        self._num_rows = 0
+
+    def checkpoint(self) -> dict:
+        """
+        Writes buffered rows, so everything appended so far is on disk.
+
+        Returns:
+            dict: State to pass as `resume` to continue after the rows appended so far.
+        """
+        self.flush()
+        return {"chunks": self._num_chunks, "rows": self.rows_written}
+
+    def close(self) -> None:
+        """
+        Writes any remaining buffered rows.
+        """
+        self.flush()
+        logger.info(f"Saved {self.rows_written} rows in {self._num_chunks} chunks to {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def load_chunked_columns(path: str, columns: dict[str, "np.typing.DTypeLike"]) -> dict[str, np.ndarray]:
+    """
+    Loads all complete chunks written by a `ChunkedColumnWriter` into contiguous columns.
+
+    Args:
+        path (str): Directory of chunks.
+        columns (dict[str, DTypeLike]): Column names and dtypes to load.
+
+    Returns:
+        dict[str, np.ndarray]: One array per column.
+    """
+    chunks = []
+    for chunk_path in sorted(Path(path).glob(CHUNK_GLOB)):
+        with np.load(chunk_path) as chunk:
+            chunks.append({name: chunk[name] for name in columns})
+    if not chunks:
+        return {name: np.empty(0, dtype=dtype) for name, dtype in columns.items()}
+    return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in columns}
+
+
+class ResultsLogWriter(ChunkedColumnWriter):
+    """
+    Streams per-frame track assignments to a directory of columnar `.npz` chunks.
+
+    Each row is one live object in one frame: matched objects carry their detected box, unmatched
+    (predicted) objects carry their predicted position and last box size with `matched` False.
+    """
+
+    def __init__(
+        self, path: str, chunk_rows: int = RESULTS_LOG_CHUNK_ROWS, resume: Optional[dict] = None
+    ) -> None:
+        """
+        Args:
+            path (str): Output directory for the chunks. Existing chunks in it are removed.
+            chunk_rows (int): Number of rows buffered before a chunk is written.
+            resume (Optional[dict]): State from `checkpoint` to continue from.
+        """
+        super().__init__(path, RESULTS_LOG_COLUMNS, chunk_rows, resume)
+
+    def append_frame(
+        self, frame_num: int, tracked: Iterable[IdentifiedObject], predicted: Iterable[IdentifiedObject]
+    ) -> None:
+        """
+        Appends the tracker output for one frame.
+
+        Args:
+            frame_num (int): Number of the frame.
+            tracked (Iterable[IdentifiedObject]): Objects matched to a detection in this frame.
+            predicted (Iterable[IdentifiedObject]): Live objects without a detection in this frame.
+        """
+        for obj in tracked:
+            self.append_row(frame_num, obj.id, obj.point.x, obj.point.y, obj.width, obj.height, True)
+        for obj in predicted:
+            position = obj.predicted_position
+            self.append_row(frame_num, obj.id, position.x, position.y, obj.width, obj.height, False)
+
+
+def load_results_log(path: str) -> dict[str, np.ndarray]:
+    """
+    Loads all complete chunks of a results log into contiguous columns.
+
+    Args:
+        path (str): Directory written by `ResultsLogWriter`.
+
+    Returns:
+        dict[str, np.ndarray]: One array per column, e.g. `pd.DataFrame(load_results_log(path))`.
+    """
+    return load_chunked_columns(path, RESULTS_LOG_COLUMNS)
@@ -0,0 +1,252 @@
+import argparse
+import itertools
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+from .analysis import summarise_tracks
+from .constants import BATOMETER
+from .detectionCache import DetectionCache, cache_key
+from .detectionObject import IdentifiedObject
+from .evaluation import MATCH_DISTANCE, TRACK_COLUMNS, evaluate_tracks, load_ground_truth
+from .objectfinder import ObjectFinder
+from .objectTracker import ObjectTracker
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+FORMAT = "%(asctime)s %(levelname)-8s %(message)s"
+logging.basicConfig(level=logging.INFO, format=FORMAT)
+logger = logging.getLogger(f"{BATOMETER}.sweep")
+
+DEFAULT_CONFIGURATION = {
+    "max_missed_frames": 10,
+    "prediction_range": IdentifiedObject.prediction_range,
+    "min_area": 0,
+    "max_area": 0,  # 0 means no upper limit
+    "detector_history": 500,
+    "detector_var_threshold": 100,
+    "detector_kernel_size": 5,
+}
+
+# Per-process caches, so each worker loads a detection cache or ground truth file only once
+_worker_caches: dict[str, DetectionCache] = {}
+_worker_ground_truth: dict[str, dict[str, np.ndarray]] = {}
+
+
+def expand_grid(grid: dict[str, list]) -> list[dict]:
+    """
+    Expands a parameter grid into the list of every configuration, filling in defaults.
+
+    Args:
+        grid (dict[str, list]): Values to try for each parameter in `DEFAULT_CONFIGURATION`.
+
+    Returns:
+        list[dict]: One complete configuration per grid point.
+
+    Raises:
+        ValueError: If the grid contains an unknown parameter.
+    """
+    unknown = set(grid) - set(DEFAULT_CONFIGURATION)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {sorted(unknown)}")
+    names = list(grid)
+    return [
+        {**DEFAULT_CONFIGURATION, **dict(zip(names, values))} for values in itertools.product(*grid.values())
+    ]
+
+
+def detector_params(config: dict) -> dict:
+    """
+    Args:
+        config (dict): A sweep configuration.
+
+    Returns:
+        dict: The detector parameters identifying the detection cache entry for the configuration.
+    """
+    return ObjectFinder(
+        config["detector_history"], config["detector_var_threshold"], config["detector_kernel_size"]
+    ).params()
+
+
+def evaluate_configuration(
+    cache: DetectionCache,
+    config: dict,
+    ground_truth: Optional[dict[str, np.ndarray]] = None,
+    max_distance: float = MATCH_DISTANCE,
+) -> dict:
+    """
+    Runs the tracker over cached detections with one configuration and measures the tracks.
+
+    Args:
+        cache (DetectionCache): Cached detections matching the configuration's detector parameters.
+        config (dict): A complete sweep configuration.
+        ground_truth (Optional[dict[str, np.ndarray]]): Ground-truth tracks to score against.
+        max_distance (float): Maximum centre distance in pixels for a ground-truth match.
+
+    Returns:
+        dict: The configuration together with its metrics.
+    """
+    tracker = ObjectTracker(
+        cache.width,
+        cache.height,
+        max_missed_frames=config["max_missed_frames"],
+        prediction_range=config["prediction_range"],
+        enable_heatmap=False,
+    )
+    min_area, max_area = config["min_area"], config["max_area"]
+    rows: list[tuple[int, ...]] = []
+    for frame_num, detections in cache.frames():
+        if min_area or max_area:
+            detections = {
+                det
+                for det in detections
+                if det.width * det.height >= min_area and (not max_area or det.width * det.height <= max_area)
+            }
+        tracked, _ = tracker.update(detections)
+        if ground_truth is not None:
+            rows.extend(
+                (frame_num, obj.id, obj.point.x, obj.point.y, obj.width, obj.height) for obj in tracked
+            )
+
+    lengths = np.array([len(obj.history_points()) for obj in tracker.all_objects], dtype=np.int64)
+    summary = summarise_tracks(tracker)
+    track_count = tracker.id_count
+    metrics = {
+        **config,
+        "track_count": track_count,
+        "confirmed_tracks": len(summary),
+        "id_churn": (track_count - len(summary)) / track_count if track_count else 0.0,
+        "new_ids_per_1000_frames": 1000 * track_count / cache.num_frames if cache.num_frames else 0.0,
+        "track_length_mean": float(lengths.mean()) if track_count else 0.0,
+        "track_length_median": float(np.median(lengths)) if track_count else 0.0,
+        "track_length_p90": float(np.percentile(lengths, 90)) if track_count else 0.0,
+        "track_length_max": int(lengths.max()) if track_count else 0,
+        "bat_likelihood_total": float(sum(row["Likelihood of Bat"] for row in summary)),
+    }
+    if ground_truth is not None:
+        table = np.array(rows, dtype=np.int32).reshape(-1, len(TRACK_COLUMNS))
+        predicted = {name: table[:, i] for i, name in enumerate(TRACK_COLUMNS)}
+        metrics.update(evaluate_tracks(predicted, ground_truth, max_distance))
+    return metrics
+
+
+def _run_configuration(task: tuple[str, dict, Optional[str], float]) -> dict:
+    cache_path, config, ground_truth_path, max_distance = task
+    if cache_path not in _worker_caches:
+        _worker_caches[cache_path] = DetectionCache(cache_path)
+    ground_truth = None
+    if ground_truth_path is not None:
+        if ground_truth_path not in _worker_ground_truth:
+            _worker_ground_truth[ground_truth_path] = load_ground_truth(ground_truth_path)
+        ground_truth = _worker_ground_truth[ground_truth_path]
+    return evaluate_configuration(_worker_caches[cache_path], config, ground_truth, max_distance)
+
+
+def run_sweep(
+    video_path: str,
+    cache_dir: str,
+    grid: dict[str, list],
+    processes: Optional[int] = None,
+    ground_truth_path: Optional[str] = None,
+    max_distance: float = MATCH_DISTANCE,
+) -> "pd.DataFrame":
+    """
+    Evaluates every configuration of a parameter grid on a process pool over cached detections.
+
+    Args:
+        video_path (str): Path to the video whose detections were cached.
+        cache_dir (str): Root directory of the detection cache.
+        grid (dict[str, list]): Values to try for each parameter in `DEFAULT_CONFIGURATION`.
+        processes (Optional[int]): Number of worker processes (defaults to the CPU count).
+        ground_truth_path (Optional[str]): Ground-truth track CSV to score each configuration against.
+        max_distance (float): Maximum centre distance in pixels for a ground-truth match.
+
+    Returns:
+        pd.DataFrame: One row per configuration with its parameters and metrics.
+
+    Raises:
+        FileNotFoundError: If a configuration needs detector parameters that have not been cached.
+    """
+    import pandas as pd  # Only needed for the result; slow to import
+
+    configs = expand_grid(grid)
+    cache_paths: dict[str, str] = {}
+    tasks = []
+    for config in configs:
+        params = detector_params(config)
+        params_key = repr(sorted(params.items()))
+        if params_key not in cache_paths:
+            cache_path = Path(cache_dir) / cache_key(video_path, params)
+            DetectionCache(str(cache_path))  # Fail early on a missing or incomplete entry
+            cache_paths[params_key] = str(cache_path)
+        tasks.append((cache_paths[params_key], config, ground_truth_path, max_distance))
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        results = list(pool.map(_run_configuration, tasks))
+    logger.info(f"Evaluated {len(configs)} configurations in {time.perf_counter() - start:.1f}s")
+    return pd.DataFrame(results)
+
+
+def _parse_param(text: str) -> tuple[str, list]:
+    name, _, values = text.partition("=")
+    parsed = []
+    for value in values.split(","):
+        number = float(value)
+        parsed.append(int(number) if number.is_integer() else number)
+    return name.strip(), parsed
+
+
+if __name__ == "__main__":
+    """
+    Command-line entry point to sweep tracker settings over cached detections.
+    """
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Sweep Bat-O-Meter tracker settings over cached detections")
+    parser.add_argument(
+        "--video-path",
+        type=str,
+        default=os.getenv("VIDEO_PATH"),
+        help="Path to the video whose detections were cached (or set VIDEO_PATH env variable)",
+    )
+    parser.add_argument(
+        "--detection-cache", type=str, required=True, help="Root directory of the detection cache"
+    )
+    parser.add_argument(
+        "--param",
+        action="append",
+        default=[],
+        help="Values to sweep, e.g. --param max_missed_frames=5,10,20 (repeatable)",
+    )
+    parser.add_argument("--ground-truth", type=str, default=None, help="Ground-truth track CSV")
+    parser.add_argument("--max-distance", type=float, default=MATCH_DISTANCE)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--output", type=str, default="sweep.csv")
+    args = parser.parse_args()
+    if not args.video_path:
+        logger.error("No video path provided. Use --video-path or set VIDEO_PATH in .env.")
+        sys.exit(1)
+
+    sweep_grid = dict(_parse_param(param) for param in args.param)
+    try:
+        results = run_sweep(
+            args.video_path,
+            args.detection_cache,
+            sweep_grid,
+            processes=args.processes,
+            ground_truth_path=args.ground_truth,
+            max_distance=args.max_distance,
+        )
+    except FileNotFoundError as e:
+        logger.error(f"{e}. Run batometer.main with --detection-cache and matching detector settings first.")
+        sys.exit(1)
+    results.to_csv(args.output, index=False)
+    logger.info(f"Saved sweep results to {args.output}")
@@ -0,0 +1,255 @@
+import argparse
+import csv
+import logging
+import math
+from dataclasses import dataclass
+from typing import Iterator
+
+import cv2
+import numpy as np
+
+from .constants import BATOMETER
+from .evaluation import TRACK_COLUMNS
+
+FORMAT = "%(asctime)s %(levelname)-8s %(message)s"
+logging.basicConfig(level=logging.INFO, format=FORMAT)
+logger = logging.getLogger(f"{BATOMETER}.synthetic")
+
+SKY_TOP = 170  # Grey level of the background at the top of the frame
+SKY_BOTTOM = 120  # Grey level of the background at the bottom of the frame
+BAT_COLOUR = 25
+OCCLUDER_COLOUR = 60
+
+
+@dataclass
+class SyntheticConfig:
+    """
+    Settings of a synthetic bat clip.
+
+    Attributes:
+        width (int): Frame width in pixels.
+        height (int): Frame height in pixels.
+        fps (int): Frames per second.
+        num_frames (int): Number of frames, including the warm-up.
+        warmup_frames (int): Frames without bats at the start, for the background model to settle.
+        num_bats (int): Number of bats flying through the clip.
+        entry_spread (int): Bats enter uniformly over this many frames after the warm-up; smaller is denser.
+        bat_size (tuple[int, int]): Min and max wingspan of a bat in pixels.
+        speed (tuple[float, float]): Min and max speed of a bat in pixels per frame.
+        trajectory (str): "linear", "erratic" (sinusoidal wobble) or "crossing" (pairs fly through the
+            centre).
+        wingbeat_period (float): Frames per wingbeat; the blob height oscillates with this period.
+        noise_sigma (float): Standard deviation of per-frame Gaussian pixel noise (0 for a static background).
+        occluders (int): Number of vertical bars (e.g. trees) that hide bats flying behind them.
+        seed (int): Random seed; the same config always renders the same clip.
+    """
+
+    width: int = 640
+    height: int = 480
+    fps: int = 25
+    num_frames: int = 200
+    warmup_frames: int = 20
+    num_bats: int = 5
+    entry_spread: int = 100
+    bat_size: tuple[int, int] = (10, 16)
+    speed: tuple[float, float] = (4.0, 8.0)
+    trajectory: str = "linear"
+    wingbeat_period: float = 6.0
+    noise_sigma: float = 0.0
+    occluders: int = 0
+    seed: int = 0
+
+
+@dataclass
+class _SyntheticBat:
+    track_id: int
+    entry_frame: int
+    start: tuple[float, float]
+    velocity: tuple[float, float]
+    wingspan: int
+    wobble_amplitude: float
+    wobble_period: float
+    wingbeat_phase: float
+
+    def centre(self, frame_idx: int) -> tuple[float, float]:
+        t = frame_idx - self.entry_frame
+        x = self.start[0] + self.velocity[0] * t
+        y = self.start[1] + self.velocity[1] * t
+        if self.wobble_amplitude:
+            # Wobble perpendicular to the direction of flight
+            speed = math.hypot(*self.velocity)
+            offset = self.wobble_amplitude * math.sin(2 * math.pi * t / self.wobble_period)
+            x += -self.velocity[1] / speed * offset
+            y += self.velocity[0] / speed * offset
+        return x, y
+
+
+class SyntheticScene:
+    """
+    Deterministic synthetic footage of small dark blobs flying across a dusk sky, with ground truth.
+    """
+
+    def __init__(self, config: SyntheticConfig) -> None:
+        """
+        Args:
+            config (SyntheticConfig): Settings of the clip.
+        """
+        self.config = config
+        self._rng = np.random.default_rng(config.seed)
+        gradient = np.linspace(SKY_TOP, SKY_BOTTOM, config.height, dtype=np.float32)
+        self.background = np.repeat(gradient[:, None], config.width, axis=1).astype(np.uint8)
+        self.occluders = self._make_occluders()
+        self.bats = self._make_bats()
+
+    def _make_occluders(self) -> list[tuple[int, int]]:
+        config = self.config
+        if config.occluders == 0:
+            return []
+        bar_width = max(8, config.width // 40)
+        spacing = config.width / (config.occluders + 1)
+        return [(int(spacing * (i + 1)) - bar_width // 2, bar_width) for i in range(config.occluders)]
+
+    def _make_bats(self) -> list[_SyntheticBat]:
+        config, rng = self.config, self._rng
+        bats = []
+        for track_id in range(config.num_bats):
+            entry_frame = config.warmup_frames + int(rng.integers(0, max(1, config.entry_spread)))
+            speed = rng.uniform(*config.speed)
+            if config.trajectory == "crossing" and track_id % 2 == 0:
+                start_x, start_y = 0.0, (0.5 + rng.uniform(-0.3, 0.3)) * config.height
+                target = (float(config.width), config.height - start_y)
+            elif config.trajectory == "crossing":
+                # Mirror the partner through the centre of the frame, so both meet there at the same time
+                partner = bats[-1]
+                entry_frame, speed = partner.entry_frame, math.hypot(*partner.velocity)
+                start_x, start_y = float(config.width), config.height - partner.start[1]
+                target = (0.0, partner.start[1])
+            else:
+                start_x = 0.0 if rng.random() < 0.5 else float(config.width)
+                start_y = rng.uniform(0.15, 0.85) * config.height
+                target = (config.width - start_x, rng.uniform(0.15, 0.85) * config.height)
+            dx, dy = target[0] - start_x, target[1] - start_y
+            norm = math.hypot(dx, dy)
+            wobble = rng.uniform(4, 10) if config.trajectory == "erratic" else 0.0
+            bats.append(
+                _SyntheticBat(
+                    track_id=track_id,
+                    entry_frame=entry_frame,
+                    start=(start_x, start_y),
+                    velocity=(dx / norm * speed, dy / norm * speed),
+                    wingspan=int(rng.integers(config.bat_size[0], config.bat_size[1] + 1)),
+                    wobble_amplitude=wobble,
+                    wobble_period=rng.uniform(10, 20),
+                    wingbeat_phase=rng.uniform(0, 2 * math.pi),
+                )
+            )
+        return bats
+
+    def _is_occluded(self, x0: int, x1: int) -> bool:
+        return any(x0 < bar_x + bar_width and x1 > bar_x for bar_x, bar_width in self.occluders)
+
+    def frames(self) -> Iterator[tuple[np.ndarray, list[tuple[int, int, int, int, int, int]]]]:
+        """
+        Renders the clip frame by frame.
+
+        Yields:
+            tuple[np.ndarray, list[tuple]]: The BGR frame and its ground-truth rows
+                (frame, track_id, x, y, w, h) for every fully visible bat, with frames numbered from 1.
+        """
+        config = self.config
+        for frame_idx in range(config.num_frames):
+            frame_num = frame_idx + 1
+            grey = self.background.copy()
+            rows = []
+            for bat in self.bats:
+                if frame_idx < bat.entry_frame:
+                    continue
+                cx, cy = bat.centre(frame_idx)
+                wingbeat = math.sin(2 * math.pi * frame_idx / config.wingbeat_period + bat.wingbeat_phase)
+                half_w = bat.wingspan / 2
+                half_h = max(1.5, bat.wingspan / 4 * (1 + 0.5 * wingbeat))
+                x0, y0 = int(round(cx - half_w)), int(round(cy - half_h))
+                x1, y1 = int(round(cx + half_w)), int(round(cy + half_h))
+                if x1 < 0 or y1 < 0 or x0 >= config.width or y0 >= config.height:
+                    continue
+                cv2.ellipse(
+                    grey,
+                    (int(round(cx)), int(round(cy))),
+                    (int(round(half_w)), int(round(half_h))),
+                    0,
+                    0,
+                    360,
+                    (BAT_COLOUR,),
+                    -1,
+                )
+                inside = x0 >= 0 and y0 >= 0 and x1 < config.width and y1 < config.height
+                if inside and not self._is_occluded(x0, x1):
+                    rows.append((frame_num, bat.track_id, x0, y0, x1 - x0 + 1, y1 - y0 + 1))
+            for bar_x, bar_width in self.occluders:
+                grey[:, max(0, bar_x) : bar_x + bar_width] = OCCLUDER_COLOUR
+            if config.noise_sigma > 0:
+                noise = self._rng.normal(0, config.noise_sigma, grey.shape)
+                grey = np.clip(grey + noise, 0, 255).astype(np.uint8)
+            yield cv2.cvtColor(grey, cv2.COLOR_GRAY2BGR), rows
+
+
+def write_synthetic_clip(config: SyntheticConfig, video_path: str, ground_truth_path: str) -> None:
+    """
+    Renders a synthetic clip to a video file and its ground truth to a CSV.
+
+    Args:
+        config (SyntheticConfig): Settings of the clip.
+        video_path (str): Output video path. `.avi` is written as lossless-ish MJPG, anything else as mp4v.
+        ground_truth_path (str): Output CSV path with the columns `frame,track_id,x,y,w,h`.
+    """
+    fourcc = cv2.VideoWriter.fourcc(*("MJPG" if video_path.endswith(".avi") else "mp4v"))
+    video_writer = cv2.VideoWriter(video_path, fourcc, config.fps, (config.width, config.height))
+    with open(ground_truth_path, "w", newline="") as gt_file:
+        gt_writer = csv.writer(gt_file)
+        gt_writer.writerow(TRACK_COLUMNS)
+        for frame, rows in SyntheticScene(config).frames():
+            video_writer.write(frame)
+            gt_writer.writerows(rows)
+    video_writer.release()
+    logger.info(f"Saved synthetic clip to {video_path} and ground truth to {ground_truth_path}")
+
+
+if __name__ == "__main__":
+    """
+    Command-line entry point to render a synthetic clip with ground truth.
+    """
+    defaults = SyntheticConfig()
+    parser = argparse.ArgumentParser(description="Render a synthetic bat clip with ground-truth tracks")
+    parser.add_argument("--output", type=str, default="synthetic.avi", help="Output video path")
+    parser.add_argument(
+        "--ground-truth", type=str, default="synthetic_truth.csv", help="Output ground-truth CSV"
+    )
+    parser.add_argument("--width", type=int, default=defaults.width)
+    parser.add_argument("--height", type=int, default=defaults.height)
+    parser.add_argument("--fps", type=int, default=defaults.fps)
+    parser.add_argument("--num-frames", type=int, default=defaults.num_frames)
+    parser.add_argument("--num-bats", type=int, default=defaults.num_bats)
+    parser.add_argument("--entry-spread", type=int, default=defaults.entry_spread)
+    parser.add_argument(
+        "--trajectory", choices=["linear", "erratic", "crossing"], default=defaults.trajectory
+    )
+    parser.add_argument("--noise-sigma", type=float, default=defaults.noise_sigma)
+    parser.add_argument("--occluders", type=int, default=defaults.occluders)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    args = parser.parse_args()
+    write_synthetic_clip(
+        SyntheticConfig(
+            width=args.width,
+            height=args.height,
+            fps=args.fps,
+            num_frames=args.num_frames,
+            num_bats=args.num_bats,
+            entry_spread=args.entry_spread,
+            trajectory=args.trajectory,
+            noise_sigma=args.noise_sigma,
+            occluders=args.occluders,
+            seed=args.seed,
+        ),
+        args.output,
+        args.ground_truth,
+    )
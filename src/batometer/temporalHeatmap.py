@@ -0,0 +1,225 @@
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from .constants import BATOMETER
+
+logger = logging.getLogger(f"{BATOMETER}.TemporalHeatmap")
+
+CUBE_DTYPE = np.int32
+CUBE_GROW_FACTOR = 2
+CUBE_COPY_CHUNK_BINS = 64  # Bins copied at a time when the cube grows
+
+
+def _index_path(cube_path: Path) -> Path:
+    return cube_path.with_suffix(".json")
+
+
+class TemporalHeatmapWriter:
+    """
+    Accumulates a cumulative activity grid into time bins stored in a memory-mapped `.npy` cube.
+
+    The source grid (e.g. `PixelHeatmap.accumulator` or `Heatmap.direction_count_grid`) only ever
+    grows, so each bin is stored as the difference between the grid at the end and at the start of
+    the bin. Only the grid at the start of the current bin is kept in RAM; the cube itself lives on
+    disk, so memory use is bounded regardless of video length. A JSON index next to the cube
+    records how many bins have been written, so the cube can be read while the run is in progress.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        grid_shape: tuple[int, int],
+        fps: float,
+        bin_seconds: float = 60.0,
+        expected_frames: int = 0,
+        source: str = "pixel",
+        scale: float = 1.0,
+        resume: Optional[dict] = None,
+    ) -> None:
+        """
+        Args:
+            path (str): Output path of the `.npy` cube.
+            grid_shape (tuple[int, int]): (height, width) of the source grid.
+            fps (float): Frames per second of the video, used to convert bins to times.
+            bin_seconds (float): Duration of each time bin in seconds.
+            expected_frames (int): Expected number of frames, used to preallocate the cube (0 if unknown).
+            source (str): Name of the accumulated grid, recorded in the index.
+            scale (float): Grid resolution relative to the video frame, recorded in the index.
+            resume (Optional[dict]): State from `checkpoint`; the existing cube is reopened and bins after
+                the checkpoint are rewritten.
+        """
+        self.path = Path(path)
+        self.grid_shape = grid_shape
+        self.fps = fps if fps and fps > 0 else 1.0
+        self.bin_seconds = bin_seconds
+        self.bin_frames = max(1, int(round(bin_seconds * self.fps)))
+        self.source = source
+        self.scale = scale
+        self.bins_written = resume["bins"] if resume else 0
+        self._baseline = resume["baseline"].copy() if resume else np.zeros(grid_shape, dtype=CUBE_DTYPE)
+        self._last_grid: Optional[np.ndarray] = None  # Copy of the grid after the last frame of the open bin
+        self._bin_open = False
+        self._current_bin = self.bins_written
+        capacity = max(1, -(-expected_frames // self.bin_frames))
+        os.makedirs(self.path.parent or ".", exist_ok=True)
+        if resume:
+            self._cube = np.lib.format.open_memmap(self.path, mode="r+")
+        else:
+            self._cube = np.lib.format.open_memmap(
+                self.path, mode="w+", dtype=CUBE_DTYPE, shape=(capacity, *grid_shape)
+            )
+        self._write_index()
+        logger.info(f"Writing temporal heatmap cube to {self.path} ({self.bin_frames} frames per bin)")
+
+    def update(self, frame_num: int, grid: np.ndarray) -> None:
+        """
+        Records the cumulative grid after processing a frame, closing the bin if it has ended.
+
+        Args:
+            frame_num (int): 1-based number of the frame just processed.
+            grid (np.ndarray): The cumulative source grid after this frame.
+        """
+        frame_bin = (frame_num - 1) // self.bin_frames
+        # Frames may be skipped (e.g. dropped live frames): the open bin ends with the grid of its last
+        # frame, and bins skipped entirely are left empty
+        while self._current_bin < frame_bin:
+            self._close_bin(self._last_grid if self._bin_open else self._baseline)
+        if frame_num % self.bin_frames == 0:
+            self._close_bin(grid)
+            return
+        # The caller keeps updating its grid, so keep a copy
+        if self._last_grid is None:
+            self._last_grid = grid.copy()
+        else:
+            np.copyto(self._last_grid, grid)
+        self._bin_open = True
+
+    def checkpoint(self) -> dict:
+        """
+        Returns:
+            dict: State to pass as `resume` to continue after the frames recorded so far. The closed bins
+                are already on disk; the open bin is rebuilt from the baseline.
+        """
+        return {"bins": self._current_bin, "baseline": self._baseline.copy()}
+
+    def close(self) -> None:
+        """
+        Flushes the final partial bin and the index.
+        """
+        if self._bin_open:
+            self._close_bin(self._last_grid)
+        self._cube.flush()
+        self._write_index()
+        logger.info(f"Saved {self.bins_written} heatmap bins to {self.path}")
+
+    def _close_bin(self, grid: np.ndarray) -> None:
+        if self._current_bin >= self._cube.shape[0]:
+            self._grow(self._current_bin + 1)
+        np.subtract(grid, self._baseline, out=self._cube[self._current_bin], casting="unsafe")
+        self._baseline[...] = grid
+        self._bin_open = False
+        self._current_bin += 1
+        self.bins_written = self._current_bin
+        self._cube.flush()
+        self._write_index()
+
+    def _grow(self, min_bins: int) -> None:
+        capacity = max(min_bins, self._cube.shape[0] * CUBE_GROW_FACTOR)
+        tmp_path = self.path.with_suffix(".grow.npy")
+        grown = np.lib.format.open_memmap(
+            tmp_path, mode="w+", dtype=CUBE_DTYPE, shape=(capacity, *self.grid_shape)
+        )
+        for start in range(0, self.bins_written, CUBE_COPY_CHUNK_BINS):
+            end = min(start + CUBE_COPY_CHUNK_BINS, self.bins_written)
+            grown[start:end] = self._cube[start:end]
+        grown.flush()
+        del self._cube
+        os.replace(tmp_path, self.path)
+        self._cube = np.lib.format.open_memmap(self.path, mode="r+")
+        del grown
+
+    def _write_index(self) -> None:
+        index = {
+            "bins": self.bins_written,
+            "bin_frames": self.bin_frames,
+            "bin_seconds": self.bin_frames / self.fps,
+            "fps": self.fps,
+            "source": self.source,
+            "scale": self.scale,
+        }
+        tmp_path = _index_path(self.path).with_suffix(".json.tmp")
+        with open(tmp_path, "w") as index_file:
+            json.dump(index, index_file)
+        os.replace(tmp_path, _index_path(self.path))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class TemporalHeatmapCube:
+    """
+    Read-only, memory-mapped view over a cube written by `TemporalHeatmapWriter`.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Args:
+            path (str): Path of the `.npy` cube.
+        """
+        self.path = Path(path)
+        with open(_index_path(self.path)) as index_file:
+            index = json.load(index_file)
+        self.bins: int = index["bins"]
+        self.bin_frames: int = index["bin_frames"]
+        self.bin_seconds: float = index["bin_seconds"]
+        self.fps: float = index["fps"]
+        self.source: str = index["source"]
+        self.scale: float = index["scale"]
+        self._cube = np.load(self.path, mmap_mode="r")
+
+    @property
+    def data(self) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: Memory-mapped array of shape (bins, height, width) holding the written bins.
+        """
+        return self._cube[: self.bins]
+
+    def bin_start_times(self) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: Start time of each bin in seconds.
+        """
+        return np.arange(self.bins) * self.bin_seconds
+
+    def window(self, start_seconds: float, end_seconds: float) -> np.ndarray:
+        """
+        Sums the activity of all bins overlapping a time window.
+
+        Args:
+            start_seconds (float): Start of the window in seconds.
+            end_seconds (float): End of the window in seconds (exclusive).
+
+        Returns:
+            np.ndarray: Activity grid of shape (height, width) for the window.
+        """
+        start_bin = max(0, int(start_seconds // self.bin_seconds))
+        end_bin = min(self.bins, int(-(-end_seconds // self.bin_seconds)))
+        if end_bin <= start_bin:
+            return np.zeros(self._cube.shape[1:], dtype=np.int64)
+        return self._cube[start_bin:end_bin].sum(axis=0, dtype=np.int64)
+
+    def activity_per_bin(self) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: Total activity of each bin, e.g. for plotting emergence over time.
+        """
+        return self.data.sum(axis=(1, 2), dtype=np.int64)
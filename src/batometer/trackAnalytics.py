@@ -0,0 +1,177 @@
+import csv
+from operator import attrgetter
+from typing import Iterable, Optional
+
+import numpy as np
+
+from .detectionObject import IdentifiedObject
+
+END_POINTS = 20  # Detections averaged for the incoming and outgoing positions
+CONFIRMED_TRACK_POINTS = 10  # Tracks with more detections than this are summarised
+BAT_SPEED = 10.0  # Mean pixels between detections at which the bat likelihood saturates
+DIRECTIONS = np.array(["right", "left", "down", "up"])
+
+TRACK_FEATURE_COLUMNS: dict[str, "np.typing.DTypeLike"] = {
+    "id": np.int64,
+    "points": np.int64,  # Detected positions
+    "duration": np.int64,  # Frames from the first to the last detection
+    "incoming_x": np.float64,  # Mean of the first END_POINTS positions
+    "incoming_y": np.float64,
+    "outgoing_x": np.float64,  # Mean of the last END_POINTS positions
+    "outgoing_y": np.float64,
+    "incoming_direction": DIRECTIONS.dtype,
+    "outgoing_direction": DIRECTIONS.dtype,
+    "path_length": np.float64,  # Pixels travelled between detections
+    "net_displacement": np.float64,  # Pixels from the first to the last detection
+    "tortuosity": np.float64,  # path_length / net_displacement; 1 for a straight flight
+    "mean_step": np.float64,  # Mean pixels between consecutive detections
+    "mean_speed": np.float64,  # Pixels per frame, spreading each step over the frames it spans
+    "max_speed": np.float64,
+    "speed_std": np.float64,
+    "mean_heading_change": np.float64,  # Mean absolute turn between consecutive steps, in radians
+    "size_mean": np.float64,  # Mean box area in pixels
+    "size_cv": np.float64,  # Coefficient of variation of the box area
+    "wingbeat_frequency": np.float64,  # Box area oscillations per frame, a proxy for the wingbeat
+    "bat_likelihood": np.float64,
+}
+
+
+def _directions(start_x: np.ndarray, start_y: np.ndarray, end_x: np.ndarray, end_y: np.ndarray):
+    # Same rule as analysis.get_direction, for many tracks at once
+    dx, dy = end_x - start_x, end_y - start_y
+    codes = np.where(np.abs(dx) > np.abs(dy), np.where(dx > 0, 0, 1), np.where(dy > 0, 2, 3))
+    return DIRECTIONS[codes]
+
+
+def track_features(objects: Iterable[IdentifiedObject]) -> dict[str, np.ndarray]:
+    """
+    Computes motion features of many tracks at once.
+
+    The array-backed histories of all tracks are concatenated into flat arrays, and every feature is a
+    segmented reduction over them (`np.bincount` by track), so the cost is a handful of array passes
+    however many tracks there are. Missed frames are skipped: steps are taken between consecutive
+    detections, and speeds divide each step by the frames it spans.
+
+    Args:
+        objects (Iterable[IdentifiedObject]): The tracks, e.g. `ObjectTracker.all_objects`.
+
+    Returns:
+        dict[str, np.ndarray]: One array per column of `TRACK_FEATURE_COLUMNS`, with one row per track in
+            id order, e.g. for `pd.DataFrame`.
+    """
+    objects = sorted(objects, key=attrgetter("id"))
+    num_tracks = len(objects)
+    if not num_tracks:
+        return {name: np.empty(0, dtype=dtype) for name, dtype in TRACK_FEATURE_COLUMNS.items()}
+    histories = [obj.history_points() for obj in objects]
+    lengths = np.fromiter(map(len, histories), dtype=np.int64, count=num_tracks)
+    starts = np.zeros(num_tracks, dtype=np.int64)
+    np.cumsum(lengths[:-1], out=starts[1:])
+    ends = starts + lengths
+    track = np.repeat(np.arange(num_tracks), lengths)
+    rank = np.arange(len(track)) - starts[track]  # Position of each detection within its track
+    points = np.concatenate(histories).astype(np.int64)
+    boxes = np.concatenate([obj.history_boxes() for obj in objects]).astype(np.int64)
+    steps = boxes[:, 2]
+
+    def track_sum(values: np.ndarray, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        weights = values if mask is None else np.where(mask, values, 0)
+        return np.bincount(track, weights=weights, minlength=num_tracks)
+
+    def track_mean(values: np.ndarray, mask: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        return np.divide(track_sum(values, mask), counts, out=np.zeros(num_tracks), where=counts > 0)
+
+    # Incoming and outgoing positions; integer sums are exact, so these match a plain Python mean
+    end_counts = np.minimum(lengths, END_POINTS)
+    first = rank < END_POINTS
+    last = rank >= (lengths - END_POINTS)[track]
+    incoming_x = track_sum(points[:, 0], first) / end_counts
+    incoming_y = track_sum(points[:, 1], first) / end_counts
+    outgoing_x = track_sum(points[:, 0], last) / end_counts
+    outgoing_y = track_sum(points[:, 1], last) / end_counts
+
+    # Steps between consecutive detections of the same track, attributed to the track of their end
+    step_mask = np.zeros(len(track), dtype=bool)
+    step_mask[1:] = track[1:] == track[:-1]
+    delta = np.zeros_like(points)
+    delta[1:] = points[1:] - points[:-1]
+    step_length = np.sqrt((delta[:, 0] ** 2 + delta[:, 1] ** 2).astype(np.float64))
+    frames_spanned = np.ones(len(track), dtype=np.int64)
+    frames_spanned[1:] = steps[1:] - steps[:-1]
+    speed = step_length / np.maximum(frames_spanned, 1)
+    step_counts = lengths - 1
+    path_length = track_sum(step_length, step_mask)
+    mean_step = track_mean(step_length, step_mask, step_counts)
+    mean_speed = track_mean(speed, step_mask, step_counts)
+    speed_sq = track_mean(speed**2, step_mask, step_counts)
+    speed_std = np.sqrt(np.maximum(speed_sq - mean_speed**2, 0))
+    max_speed = np.zeros(num_tracks)
+    step_tracks = track[step_mask]
+    if len(step_tracks):
+        group_starts = np.flatnonzero(np.r_[True, step_tracks[1:] != step_tracks[:-1]])
+        max_speed[step_tracks[group_starts]] = np.maximum.reduceat(speed[step_mask], group_starts)
+
+    net = np.hypot(
+        (points[ends - 1, 0] - points[starts, 0]).astype(np.float64),
+        (points[ends - 1, 1] - points[starts, 1]).astype(np.float64),
+    )
+    tortuosity = np.divide(path_length, net, out=np.ones(num_tracks), where=net > 0)
+
+    # Turns between consecutive non-zero steps of the same track
+    heading = np.arctan2(delta[:, 1], delta[:, 0])
+    moving = step_mask & (step_length > 0)
+    turn_mask = np.zeros(len(track), dtype=bool)
+    turn_mask[1:] = moving[1:] & moving[:-1]
+    turn = np.zeros(len(track))
+    turn[1:] = np.abs((heading[1:] - heading[:-1] + np.pi) % (2 * np.pi) - np.pi)
+    mean_heading_change = track_mean(turn, turn_mask, track_sum(turn_mask.astype(np.float64)))
+
+    # Wing strokes make the box grow and shrink; count crossings of the track's mean area
+    area = (boxes[:, 0] * boxes[:, 1]).astype(np.float64)
+    size_mean = track_sum(area) / lengths
+    size_sq = track_sum(area**2) / lengths
+    size_std = np.sqrt(np.maximum(size_sq - size_mean**2, 0))
+    size_cv = np.divide(size_std, size_mean, out=np.zeros(num_tracks), where=size_mean > 0)
+    above = area > size_mean[track]
+    crossing = np.zeros(len(track), dtype=bool)
+    crossing[1:] = step_mask[1:] & (above[1:] != above[:-1])
+    duration = steps[ends - 1] - steps[starts] + 1
+    wingbeat_frequency = track_sum(crossing.astype(np.float64)) / (2 * duration)
+
+    return {
+        "id": np.fromiter((obj.id for obj in objects), dtype=np.int64, count=num_tracks),
+        "points": lengths,
+        "duration": duration,
+        "incoming_x": incoming_x,
+        "incoming_y": incoming_y,
+        "outgoing_x": outgoing_x,
+        "outgoing_y": outgoing_y,
+        "incoming_direction": _directions(incoming_x, incoming_y, outgoing_x, outgoing_y),
+        "outgoing_direction": _directions(outgoing_x, outgoing_y, incoming_x, incoming_y),
+        "path_length": path_length,
+        "net_displacement": net,
+        "tortuosity": tortuosity,
+        "mean_step": mean_step,
+        "mean_speed": mean_speed,
+        "max_speed": max_speed,
+        "speed_std": speed_std,
+        "mean_heading_change": mean_heading_change,
+        "size_mean": size_mean,
+        "size_cv": size_cv,
+        "wingbeat_frequency": wingbeat_frequency,
+        "bat_likelihood": np.minimum(1.0, mean_step / BAT_SPEED),
+    }
+
+
+def save_track_features(features: dict[str, np.ndarray], output_path: str) -> None:
+    """
+    Writes a feature table from `track_features` to a CSV file, one row per track.
+
+    Args:
+        features (dict[str, np.ndarray]): The feature columns.
+        output_path (str): Path of the CSV file.
+    """
+    with open(output_path, "w", newline="") as csv_file:
+        writer = csv.writer(csv_file, lineterminator="\n")
+        writer.writerow(features)
+        writer.writerows(zip(*(column.tolist() for column in features.values())))
@@ -0,0 +1,171 @@
+import copy
+import logging
+from operator import attrgetter
+from typing import Iterable
+
+import numpy as np
+
+from .constants import BATOMETER
+from .detectionObject import IdentifiedObject
+
+logger = logging.getLogger(f"{BATOMETER}.TrackStitching")
+
+STITCH_MAX_GAP = 50  # Frames an object may go unseen between two fragments
+STITCH_RADIUS = 30.0  # Pixels between the extrapolated end of a fragment and the start of the next
+STITCH_RADIUS_GROWTH = 2.0  # Extra pixels allowed per frame of gap, as the extrapolation drifts
+STITCH_VELOCITY_POINTS = 5  # Detections at the end of a fragment its velocity is measured over
+STITCH_CELL_SIZE = 64  # Side in pixels of the index cells
+
+
+def _fragment_ends(objects: list[IdentifiedObject]) -> dict[str, np.ndarray]:
+    # Start and end of every fragment, in tracker frames and pixels, gathered in one pass over the histories
+    histories = [obj.history_points() for obj in objects]
+    lengths = np.fromiter(map(len, histories), dtype=np.int64, count=len(objects))
+    firsts = np.zeros(len(objects), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=firsts[1:])
+    lasts = firsts + lengths - 1
+    points = np.concatenate(histories).astype(np.float64)
+    steps = np.concatenate([obj.history_boxes()[:, 2] for obj in objects])
+    first_frames = np.fromiter((obj.first_frame for obj in objects), dtype=np.int64, count=len(objects))
+    # Velocity over the last few detections, in pixels per frame
+    earlier = lasts - np.minimum(lengths - 1, STITCH_VELOCITY_POINTS)
+    frames = (steps[lasts] - steps[earlier])[:, np.newaxis]
+    velocity = np.divide(
+        points[lasts] - points[earlier], frames, out=np.zeros((len(objects), 2)), where=frames > 0
+    )
+    return {
+        "start_time": first_frames,
+        "start": points[firsts],
+        "end_time": first_frames + steps[lasts],
+        "end": points[lasts],
+        "velocity": velocity,
+    }
+
+
+def link_fragments(
+    objects: Iterable[IdentifiedObject],
+    max_gap: int = STITCH_MAX_GAP,
+    radius: float = STITCH_RADIUS,
+    radius_growth: float = STITCH_RADIUS_GROWTH,
+    cell_size: int = STITCH_CELL_SIZE,
+) -> list[tuple[int, int]]:
+    """
+    Finds pairs of tracks that are likely one object seen twice, e.g. a bat that went undetected for
+    longer than the tracker's `max_missed_frames`.
+
+    A fragment's end is extrapolated at its final velocity to the start time of each later fragment; a
+    later fragment starting within `max_gap` frames, within `radius + radius_growth * gap` pixels of the
+    extrapolated position, is a candidate. Rather than testing every pair, the starts are indexed in a
+    grid of `cell_size` pixels by `max_gap` frames, and each end only looks up the cells its
+    extrapolation can reach. All lookups run as one sorted join, so the cost grows as n log n with the
+    number of fragments. Candidates are then linked greedily, closest first, so each fragment has at most
+    one successor and one predecessor.
+
+    Args:
+        objects (Iterable[IdentifiedObject]): Finished tracks, e.g. `ObjectTracker.all_objects`.
+        max_gap (int): Most frames between the end of a fragment and the start of the next.
+        radius (float): Pixels allowed between the extrapolated end and the next start.
+        radius_growth (float): Extra pixels allowed per frame of gap.
+        cell_size (int): Side of the index cells in pixels.
+
+    Returns:
+        list[tuple[int, int]]: (earlier id, later id) of each link, ordered by the earlier id.
+    """
+    objects = sorted(objects, key=attrgetter("id"))
+    if len(objects) < 2:
+        return []
+    ends = _fragment_ends(objects)
+    ids = np.fromiter((obj.id for obj in objects), dtype=np.int64, count=len(objects))
+
+    # Index the starts by (time bucket, cell y, cell x), as one sorted integer key
+    start_cells = np.floor(ends["start"] / cell_size).astype(np.int64)
+    cell_min, cell_max = start_cells.min(axis=0), start_cells.max(axis=0)
+    num_x, num_y = cell_max - cell_min + 1
+
+    def key(bucket: np.ndarray, cell_x: np.ndarray, cell_y: np.ndarray) -> np.ndarray:
+        return (bucket * num_y + (cell_y - cell_min[1])) * num_x + (cell_x - cell_min[0])
+
+    start_keys = key(ends["start_time"] // max_gap, start_cells[:, 0], start_cells[:, 1])
+    order = np.argsort(start_keys, kind="stable")
+    sorted_keys = start_keys[order]
+
+    # Each end queries the (at most two) time buckets its gap window overlaps
+    first_time, last_time = ends["end_time"] + 1, ends["end_time"] + max_gap
+    query = np.repeat(np.arange(len(objects)), 2)
+    bucket = np.stack([first_time // max_gap, last_time // max_gap], axis=1).reshape(-1)
+    valid = np.ones(len(query), dtype=bool)
+    valid[1::2] = bucket[1::2] != bucket[::2]
+    query, bucket = query[valid], bucket[valid]
+    gap_low = np.maximum(first_time[query], bucket * max_gap) - ends["end_time"][query]
+    gap_high = np.minimum(last_time[query], (bucket + 1) * max_gap - 1) - ends["end_time"][query]
+    reach = (radius + radius_growth * gap_high)[:, np.newaxis]
+    near = ends["end"][query] + ends["velocity"][query] * gap_low[:, np.newaxis]
+    far = ends["end"][query] + ends["velocity"][query] * gap_high[:, np.newaxis]
+    low = np.maximum(np.floor((np.minimum(near, far) - reach) / cell_size).astype(np.int64), cell_min)
+    high = np.minimum(np.floor((np.maximum(near, far) + reach) / cell_size).astype(np.int64), cell_max)
+    spans = np.maximum(high - low + 1, 0)
+    num_cells = spans[:, 0] * spans[:, 1]
+
+    # Expand every query into its cells, then look the cells up among the sorted starts
+    cell_query = np.repeat(np.arange(len(query)), num_cells)
+    cell_rank = np.arange(len(cell_query)) - np.repeat(np.cumsum(num_cells) - num_cells, num_cells)
+    cell_x = low[cell_query, 0] + cell_rank % spans[cell_query, 0]
+    cell_y = low[cell_query, 1] + cell_rank // spans[cell_query, 0]
+    cell_keys = key(bucket[cell_query], cell_x, cell_y)
+    found_low = np.searchsorted(sorted_keys, cell_keys, side="left")
+    found_count = np.searchsorted(sorted_keys, cell_keys, side="right") - found_low
+    pair_cell = np.repeat(np.arange(len(cell_keys)), found_count)
+    pair_rank = np.arange(len(pair_cell)) - np.repeat(np.cumsum(found_count) - found_count, found_count)
+    earlier = query[cell_query[pair_cell]]
+    later = order[found_low[pair_cell] + pair_rank]
+
+    # Exact gate on the candidates
+    gap = ends["start_time"][later] - ends["end_time"][earlier]
+    predicted = ends["end"][earlier] + ends["velocity"][earlier] * gap[:, np.newaxis]
+    distance = np.hypot(*(predicted - ends["start"][later]).T)
+    allowed = radius + radius_growth * gap
+    keep = (gap >= 1) & (gap <= max_gap) & (distance <= allowed)
+    earlier, later, gap, cost = earlier[keep], later[keep], gap[keep], distance[keep] / allowed[keep]
+
+    linked_from = np.zeros(len(objects), dtype=bool)
+    linked_to = np.zeros(len(objects), dtype=bool)
+    links = []
+    for pair in np.lexsort((later, earlier, gap, cost)).tolist():
+        a, b = earlier[pair], later[pair]
+        if not linked_from[a] and not linked_to[b]:
+            linked_from[a] = linked_to[b] = True
+            links.append((int(ids[a]), int(ids[b])))
+    links.sort()
+    return links
+
+
+def stitch_tracks(objects: Iterable[IdentifiedObject], **link_options) -> list[IdentifiedObject]:
+    """
+    Joins the fragments `link_fragments` finds into single tracks.
+
+    Args:
+        objects (Iterable[IdentifiedObject]): Finished tracks, e.g. `ObjectTracker.all_objects`.
+        **link_options: Passed to `link_fragments`.
+
+    Returns:
+        list[IdentifiedObject]: The tracks in id order. Each chain of fragments becomes a copy of its first
+            fragment, keeping its id, joined with the later ones; other tracks are returned unchanged.
+    """
+    objects = sorted(objects, key=attrgetter("id"))
+    links = link_fragments(objects, **link_options)
+    successor = dict(links)
+    later_ids = set(successor.values())
+    by_id = {obj.id: obj for obj in objects}
+    stitched = []
+    for obj in objects:
+        if obj.id in later_ids:
+            continue
+        next_id = successor.get(obj.id)
+        if next_id is not None:
+            obj = copy.copy(obj)
+            while next_id is not None:
+                obj.join(by_id[next_id])
+                next_id = successor.get(next_id)
+        stitched.append(obj)
+    logger.info(f"Stitched {len(objects)} tracks into {len(stitched)}")
+    return stitched
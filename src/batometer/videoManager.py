@@ -1,8 +1,11 @@
 import logging
 import os
 import sys
+import threading
+import time
 from contextlib import AbstractContextManager
 from pathlib import Path
+from typing import Optional
 
 import cv2
 
@@ -12,6 +15,9 @@ FORMAT = "%(asctime)s %(levelname)-8s %(message)s"
 logging.basicConfig(level=logging.INFO, format=FORMAT)
 logger = logging.getLogger(BATOMETER)
 
+LIVE_DEFAULT_FPS = 25.0  # Assumed when a camera or stream does not report its frame rate
+LIVE_STOP_TIMEOUT = 5.0  # Seconds to wait for the capture thread on release
+
 
 class VideoManager(AbstractContextManager):
     def __init__(self, video_path):
@@ -23,6 +29,7 @@ class VideoManager(AbstractContextManager):
             logger.error(f"Failed to open video at {video_path}")
             sys.exit(1)
         self.frame_num = 0
+        self.dropped_frames = 0  # Files never drop frames; see LiveVideoManager
 
     def _load_video(self, path_str: str) -> tuple["cv2.VideoCapture", int, int, int, int, str]:
         """
@@ -84,6 +91,17 @@ class VideoManager(AbstractContextManager):
         self.frame_time = self._calculate_video_time_from_frame_num(self.frame_num, self.fps)
         return frame
 
+    def seek(self, frame_num: int) -> None:
+        """
+        Positions the video so the next frame read is `frame_num + 1`.
+
+        Args:
+            frame_num (int): Number of frames to skip from the start.
+        """
+        self.video.set(cv2.CAP_PROP_POS_FRAMES, frame_num)
+        self.frame_num = frame_num
+        self.frame_time = self._calculate_video_time_from_frame_num(frame_num, self.fps)
+
     def has_more_frames(self) -> bool:
         """
         Checks if there are more frames to read in the video.
@@ -101,3 +119,101 @@ class VideoManager(AbstractContextManager):
 
     def __exit__(self, exc_type, exc_value, traceback):
         self.release()
+
+
+class LiveVideoManager(VideoManager):
+    """
+    Reads a live source (a V4L2 device index such as "0", or any URL OpenCV accepts) on a capture thread.
+
+    The capture thread keeps only the freshest frame: if processing is slower than the source, older
+    frames are dropped instead of queued, so capture holds at most one frame. The frames buffered while
+    processing are bounded separately, see `drop_stale` of `FramePipeline`. `frame_num` is the number of
+    the frame at the source, so it skips over dropped frames. A local video file is replayed at its
+    native frame rate as a stand-in camera.
+    """
+
+    def __init__(self, source: str, paced: Optional[bool] = None):
+        """
+        Args:
+            source (str): Device index, stream URL, or path of a video file to replay as a camera.
+            paced (Optional[bool]): Whether to release frames at the source frame rate. Defaults to True
+                for files, whose frames would otherwise all be available at once, and False otherwise.
+        """
+        self.video = cv2.VideoCapture(int(source) if source.isdigit() else source)
+        if not self.video.isOpened():
+            logger.error(f"Failed to open live source {source}")
+            sys.exit(1)
+        self.video_path = Path(source)
+        self.width = int(self.video.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.video.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        # Kept fractional (e.g. 29.97) so that pacing a stand-in file does not drift from its frame rate
+        self.fps = self.video.get(cv2.CAP_PROP_FPS) or LIVE_DEFAULT_FPS
+        self.max_frames = 0  # Unknown for a live source
+        self.frame_num = 0
+        self.frame_time = self._calculate_video_time_from_frame_num(0, self.fps)
+        self.paced = os.path.isfile(source) if paced is None else paced
+        self.captured_frames = 0
+        self.dropped_frames = 0
+        self._frame = None
+        self._frame_index = 0
+        self._ended = False
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        logger.info(
+            f"Live source information // Width: {self.width} - Height: {self.height} - FPS: {self.fps} - "
+            f"Paced: {self.paced}"
+        )
+        self._thread = threading.Thread(target=self._capture, name="batometer-capture", daemon=True)
+        self._thread.start()
+
+    def _capture(self) -> None:
+        start = time.perf_counter()
+        while not self._stop.is_set():
+            ret, frame = self.video.read()
+            if not ret:
+                break
+            if self.paced:
+                delay = start + self.captured_frames / self.fps - time.perf_counter()
+                if delay > 0:
+                    self._stop.wait(delay)
+            with self._condition:
+                if self._frame is not None:
+                    self.dropped_frames += 1
+                self.captured_frames += 1
+                self._frame = frame
+                self._frame_index = self.captured_frames
+                self._condition.notify_all()
+        with self._condition:
+            self._ended = True
+            self._condition.notify_all()
+
+    def read_frame(self):
+        with self._condition:
+            self._condition.wait_for(lambda: self._frame is not None or self._ended)
+            if self._frame is None:
+                raise Exception(f"Can't receive frame (stream end?). FrameNum: {self.frame_num}. Exiting ...")
+            frame, self.frame_num = self._frame, self._frame_index
+            self._frame = None
+        self.frame_time = self._calculate_video_time_from_frame_num(self.frame_num, self.fps)
+        return frame
+
+    def has_more_frames(self) -> bool:
+        """
+        Waits until the next frame has been captured or the source has ended.
+
+        Returns:
+            bool: True if a frame is ready to read, False once the source has ended.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._frame is not None or self._ended)
+            return self._frame is not None
+
+    def release(self):
+        self._stop.set()
+        self._thread.join(LIVE_STOP_TIMEOUT)
+        self.video.release()
+        dropped_percent = 100 * self.dropped_frames / self.captured_frames if self.captured_frames else 0
+        logger.info(
+            f"Live source captured {self.captured_frames} frames, dropped {self.dropped_frames} "
+            f"({dropped_percent:.1f}%)"
+        )
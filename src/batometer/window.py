@@ -1,5 +1,5 @@
+import functools
 import logging
-import tkinter as tk
 from enum import Enum
 
 import cv2
@@ -8,6 +8,25 @@ from cv2.typing import MatLike
 
 logger = logging.getLogger("Bat-O-Meter.window")
 
+SCREEN_MARGIN = 100  # Pixels left free around windows sized to the screen
+
+
+@functools.lru_cache(maxsize=None)
+def screen_size() -> tuple[int, int]:
+    """
+    Queries the screen size once; tkinter is only imported here, so headless runs never load it.
+
+    Returns:
+        tuple[int, int]: (width, height) of the screen in pixels.
+    """
+    import tkinter as tk
+
+    root = tk.Tk()
+    root.withdraw()
+    size = root.winfo_screenwidth(), root.winfo_screenheight()
+    root.destroy()
+    return size
+
 
 class OverlayMode(Enum):
     NONE = "none"
@@ -27,11 +46,13 @@ class ImageTransformer:
     TEXT_FONT_FACE: int = cv2.FONT_HERSHEY_COMPLEX
     TEXT_THICKNESS: int = 2
 
-    def __init__(self) -> None:
-        """
-        Initializes the ImageTransformer and computes window dimensions.
-        """
-        self.window_width, self.window_height = self._compute_dimensions()
+    @property
+    def window_width(self) -> int:
+        return screen_size()[0] - SCREEN_MARGIN
+
+    @property
+    def window_height(self) -> int:
+        return screen_size()[1] - SCREEN_MARGIN
 
     def show_frame(self, window_name: str, img: "MatLike") -> None:
         """
@@ -162,14 +183,6 @@ class ImageTransformer:
         new_height = int(height * scale_factor)
         frame = cv2.resize(frame, (new_width, new_height))
 
-    def _compute_dimensions(self):
-        root = tk.Tk()
-        root.withdraw()
-        screen_width = root.winfo_screenwidth()
-        screen_height = root.winfo_screenheight()
-        root.destroy()
-        return screen_width - 100, screen_height - 100
-
     def _match_dimensions_to_img1(self, img1: MatLike, img2: MatLike):
         img1 = cv2.resize(img1, (img2.shape[1], img2.shape[0]))
         if len(img1.shape) != len(img2.shape):
@@ -193,12 +206,7 @@ def resize_window_to_screen(window_name: str, width: int, height: int):
     """
     Resize the OpenCV window based on screen size and video aspect ratio.
     """
-    # Use tkinter to get screen size (cross-platform, no subprocess)
-    root = tk.Tk()
-    root.withdraw()
-    screen_width = root.winfo_screenwidth()
-    screen_height = root.winfo_screenheight()
-    root.destroy()
+    screen_width, screen_height = screen_size()
     scale = min(screen_width / width, screen_height / height, 0.8)
     window_w = int(width * scale)
     window_h = int(height * scale)
@@ -220,7 +228,10 @@ def draw_overlay_text(
         "cv2.typing.MatLike": The frame with the overlay text drawn on it.
     """
     status_text = "PAUSED" if not is_play else "PLAYING"
-    overlay_text = f"{status_text} | Space: Play/Pause | <-/->: Step | t: Toggle Tracks | a: Toggle Avg Heatmap | Esc: Quit | Frame: {current_frame_idx} / {max_frames}"
+    overlay_text = (
+        f"{status_text} | Space: Play/Pause | <-/->: Step | t: Toggle Tracks | a: Toggle Avg Heatmap | "
+        f"p: HUD | Esc: Quit | Frame: {current_frame_idx} / {max_frames}"
+    )
     cv2.rectangle(overlay_frame, (0, 0), (overlay_frame.shape[1], 40), (0, 0, 0), -1)
     cv2.putText(
         overlay_frame,
@@ -252,7 +263,7 @@ def draw_tracked_object(frame: "cv2.typing.MatLike", obj) -> None:
     """
     Draws tracked object prediction, history, and bounding box on the frame.
     """
-    color = ((obj.id * 70) % 256, (obj.id * 150) % 256, (obj.id * 230) % 256)
+    color = _object_colour(obj.id)
     overlay = frame.copy()
     cv2.circle(
         overlay,
@@ -304,7 +315,7 @@ def draw_predicted_object(frame: "cv2.typing.MatLike", obj) -> None:
     """
     Draws a circle for a predicted object on the frame.
     """
-    color = ((obj.id * 70) % 256, (obj.id * 150) % 256, (obj.id * 230) % 256)
+    color = _object_colour(obj.id)
     cv2.circle(
         frame,
         (obj.predicted_position.x, obj.predicted_position.y),
@@ -321,3 +332,97 @@ def draw_predicted_object(frame: "cv2.typing.MatLike", obj) -> None:
         color,
         2,
     )
+
+
+def draw_tracking(frame: "cv2.typing.MatLike", detections, tracked_objects, predicted_objects) -> None:
+    """
+    Draws detections, predicted objects and tracked objects on the frame in a single batch.
+
+    All translucent prediction circles are drawn into one overlay layer and blended once, over the
+    region they cover, instead of copying and blending the full frame per object. Track histories are
+    drawn with `cv2.polylines` over each object's array-backed history.
+
+    Args:
+        frame ("cv2.typing.MatLike"): The frame to draw on, modified in place.
+        detections (Iterable[Detection]): Raw detections, drawn as red rectangles.
+        tracked_objects (Iterable[IdentifiedObject]): Objects matched in this frame.
+        predicted_objects (Iterable[IdentifiedObject]): Live objects not matched in this frame.
+    """
+    for detection in detections:
+        draw_detection_rectangle(frame, detection)
+    for obj in predicted_objects:
+        draw_predicted_object(frame, obj)
+    tracked_objects = list(tracked_objects)
+    _blend_prediction_circles(frame, tracked_objects, alpha=0.5)
+    for obj in tracked_objects:
+        color = _object_colour(obj.id)
+        points = obj.history_points()
+        if len(points) > 1:
+            cv2.polylines(frame, [points], False, color, 2)
+        cv2.putText(
+            frame,
+            str(obj.id),
+            (obj.point.x, obj.point.y - 15),
+            cv2.FONT_HERSHEY_PLAIN,
+            2,
+            color,
+            2,
+        )
+        cv2.rectangle(
+            frame,
+            (obj.point.x, obj.point.y),
+            (obj.point.x + obj.width, obj.point.y + obj.height),
+            color,
+            3,
+        )
+
+
+def draw_gates(frame: "cv2.typing.MatLike", gates, totals: dict[str, tuple[int, int]]) -> None:
+    """
+    Draws the counting gates with their running in/out counts on the frame.
+
+    Args:
+        frame ("cv2.typing.MatLike"): The frame to draw on, modified in place.
+        gates (Iterable[Gate]): The counting gates.
+        totals (dict[str, tuple[int, int]]): (in, out) count of each gate, see `GateCounter.totals`.
+    """
+    for gate in gates:
+        cv2.line(frame, gate.start, gate.end, (0, 255, 0), 2)
+        count_in, count_out = totals[gate.name]
+        cv2.putText(
+            frame,
+            f"{gate.name}: {count_in} in / {count_out} out",
+            (min(gate.start[0], gate.end[0]), min(gate.start[1], gate.end[1]) - 10),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.6,
+            (0, 255, 0),
+            2,
+            cv2.LINE_AA,
+        )
+
+
+def _blend_prediction_circles(frame: "cv2.typing.MatLike", objs: list, alpha: float) -> None:
+    if not objs:
+        return
+    frame_h, frame_w = frame.shape[:2]
+    x0 = max(0, min(obj.predicted_position.x - obj.prediction_range for obj in objs))
+    y0 = max(0, min(obj.predicted_position.y - obj.prediction_range for obj in objs))
+    x1 = min(frame_w, max(obj.predicted_position.x + obj.prediction_range for obj in objs) + 1)
+    y1 = min(frame_h, max(obj.predicted_position.y + obj.prediction_range for obj in objs) + 1)
+    if x0 >= x1 or y0 >= y1:
+        return
+    region = frame[y0:y1, x0:x1]
+    overlay = region.copy()
+    for obj in objs:
+        cv2.circle(
+            overlay,
+            (obj.predicted_position.x - x0, obj.predicted_position.y - y0),
+            radius=obj.prediction_range,
+            color=_object_colour(obj.id),
+            thickness=-1,
+        )
+    frame[y0:y1, x0:x1] = cv2.addWeighted(overlay, alpha, region, 1 - alpha, 0)
+
+
+def _object_colour(obj_id: int) -> tuple[int, int, int]:
+    return ((obj_id * 70) % 256, (obj_id * 150) % 256, (obj_id * 230) % 256)
@@ -0,0 +1,82 @@
+"""
+Measures the cold import time of each entry point and checks that none of them loads a heavy optional
+module (pandas, tkinter) that only some code paths need.
+
+Every import runs in a fresh interpreter, so nothing is shared between measurements. Run from `src/`:
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --budget-ms 300
+
+The exit code is 1 if an entry point loads a forbidden module or is slower than `--budget-ms`.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+ENTRY_POINTS = [
+    "batometer.main",
+    "batometer.batometerApp",
+    "batometer.pipeline",
+    "batometer.replay",
+    "batometer.sweep",
+    "batometer.evaluation",
+]
+FORBIDDEN_MODULES = ["pandas", "tkinter"]
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1000, "loaded": [name for name in {forbidden!r} if name in sys.modules]}}))
+"""
+
+
+def measure(module: str, repeats: int) -> tuple[float, list[str]]:
+    """
+    Imports a module in `repeats` fresh interpreters.
+
+    Args:
+        module (str): Module to import.
+        repeats (int): Number of interpreters.
+
+    Returns:
+        tuple[float, list[str]]: Median import time in milliseconds and the forbidden modules it loaded.
+    """
+    times = []
+    loaded: list[str] = []
+    for _ in range(repeats):
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, forbidden=FORBIDDEN_MODULES)],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        times.append(result["ms"])
+        loaded = result["loaded"]
+    return statistics.median(times), loaded
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark cold import time of the batometer entry points")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=None, help="Fail if any import is slower")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'module':<24} {'median ms':>10}  heavy modules loaded")
+    for module in ENTRY_POINTS:
+        median_ms, loaded = measure(module, args.repeats)
+        over_budget = args.budget_ms is not None and median_ms > args.budget_ms
+        failed |= bool(loaded) or over_budget
+        flag = " (over budget)" if over_budget else ""
+        print(f"{module:<24} {median_ms:>10.1f}  {', '.join(loaded) or '-'}{flag}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Compares per-object drawing against the batched renderer for increasing tracked object counts.
+
+Run from `src/`:
+
+    python -m benchmarks.render_objects
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from batometer.detectionObject import Detection, IdentifiedObject, Point
+from batometer.window import draw_tracked_object, draw_tracking
+
+OBJECT_COUNTS = [1, 10, 50, 100, 200, 500]
+
+
+def make_objects(
+    count: int, width: int, height: int, history_len: int, seed: int = 0
+) -> list[IdentifiedObject]:
+    rng = np.random.default_rng(seed)
+    objs = []
+    for obj_id in range(count):
+        x, y = rng.integers(0, width), rng.integers(0, height)
+        obj = IdentifiedObject(obj_id, Detection(Point(int(x), int(y)), 8, 8))
+        for _ in range(history_len):
+            x = int(np.clip(x + rng.integers(-6, 7), 0, width - 1))
+            y = int(np.clip(y + rng.integers(-6, 7), 0, height - 1))
+            obj.update(Point(x, y), 8, 8)
+        objs.append(obj)
+    return objs
+
+
+def time_ms(fn, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark per-object vs batched track rendering")
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--history", type=int, default=100, help="History length of each object")
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+
+    frame = np.zeros((args.height, args.width, 3), dtype=np.uint8)
+    print(f"{'objects':>8} {'per-object ms':>14} {'batched ms':>11} {'speed-up':>9}")
+    for count in OBJECT_COUNTS:
+        objs = make_objects(count, args.width, args.height, args.history)
+
+        def per_object():
+            target = frame.copy()
+            for obj in objs:
+                draw_tracked_object(target, obj)
+
+        def batched():
+            draw_tracking(frame.copy(), [], objs, [])
+
+        per_object_ms = time_ms(per_object, args.repeats)
+        batched_ms = time_ms(batched, args.repeats)
+        print(f"{count:>8} {per_object_ms:>14.2f} {batched_ms:>11.2f} {per_object_ms / batched_ms:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+"""
+Throughput and memory benchmarks for the full pipeline and each stage, with regression gates.
+
+Every case runs in its own process so its peak RSS is isolated. Run from `src/`:
+
+    python -m benchmarks.suite --save baseline.json
+    python -m benchmarks.suite --compare baseline.json --tolerance 0.15
+
+With `--compare`, the exit code is 1 if any case lost more than `tolerance` of its baseline throughput
+or grew its peak RSS by more than `tolerance`. `benchmarks/baseline.json` is a reference run; its
+`machine` entry says where it was measured, so gate against a baseline saved on the same machine.
+"""
+
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import time
+from collections import deque
+from typing import Callable, Optional
+
+import numpy as np
+
+from batometer.detectionObject import Detection, Point
+from batometer.frameCache import FrameCacheEntry
+from batometer.heatmap import Heatmap
+from batometer.objectfinder import ObjectFinder
+from batometer.objectTracker import ObjectTracker
+from batometer.pipeline import FramePipeline, PipelineFrame
+from batometer.synthetic import SyntheticConfig, SyntheticScene
+from batometer.window import draw_tracking
+
+RESOLUTIONS = {
+    "480p": (854, 480),
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+    "4k": (3840, 2160),
+}
+TRACKER_OBJECT_COUNTS = [10, 100, 500]
+RENDERED_FRAMES = 16  # Distinct synthetic frames, cycled through for longer runs
+WARMUP_STEPS = 5
+SCENE_BATS = 20
+FRAME_CACHE_ENTRIES = 8  # Entries the frame cache case keeps, so it measures copying, not growth
+
+
+def _scene_frames(width: int, height: int) -> list[np.ndarray]:
+    config = SyntheticConfig(
+        width=width,
+        height=height,
+        num_frames=RENDERED_FRAMES,
+        warmup_frames=0,
+        num_bats=SCENE_BATS,
+        entry_spread=1,
+        noise_sigma=3,
+        speed=(width / 200, width / 100),
+        bat_size=(max(6, width // 120), max(8, width // 80)),
+    )
+    return [frame for frame, _ in SyntheticScene(config).frames()]
+
+
+class _SyntheticSource:
+    """
+    Stands in for a `VideoManager`, cycling through rendered frames without end.
+    """
+
+    def __init__(self, frames: list[np.ndarray]) -> None:
+        self.frames = frames
+        self.frame_num = 0
+        self.frame_time = ""
+
+    def has_more_frames(self) -> bool:
+        return True
+
+    def read_frame(self) -> np.ndarray:
+        frame = self.frames[self.frame_num % len(self.frames)].copy()  # A decoder returns a new buffer
+        self.frame_num += 1
+        return frame
+
+
+class _PipelineStep:
+    """
+    Takes one finished frame from a running pipeline per step.
+    """
+
+    def __init__(self, pipeline: FramePipeline) -> None:
+        self.pipeline = pipeline
+
+    def __call__(self, i: int) -> None:
+        self.pipeline.get()
+
+    def close(self) -> None:
+        self.pipeline.close()
+
+
+def _moving_detections(count: int, width: int, height: int, step: int) -> set[Detection]:
+    # Objects on a grid, each drifting right, spaced further apart than the prediction range
+    cols = max(1, int(np.sqrt(count * width / height)))
+    spacing_x, spacing_y = width / (cols + 1), height / (count // cols + 2)
+    return {
+        Detection(
+            Point(int((i % cols + 1) * spacing_x + 2 * step) % width, int((i // cols + 1) * spacing_y)), 8, 8
+        )
+        for i in range(count)
+    }
+
+
+def _warm_pipeline(width: int, height: int, frames: list[np.ndarray]):
+    finder = ObjectFinder()
+    tracker = ObjectTracker(width, height)
+    heatmap = Heatmap(width, height)
+    for frame in frames:
+        detections, _ = finder.update(frame)
+        tracked, _ = tracker.update(detections)
+        heatmap.update(tracked)
+    return finder, tracker, heatmap
+
+
+def case_objectfinder(width: int, height: int) -> Callable[[int], None]:
+    frames = _scene_frames(width, height)
+    finder = ObjectFinder()
+    return lambda i: finder.update(frames[i % len(frames)])
+
+
+def case_tracker(width: int, height: int, count: int) -> Callable[[int], None]:
+    tracker = ObjectTracker(width, height)
+    return lambda i: tracker.update(_moving_detections(count, width, height, i))
+
+
+def case_flow_heatmap(width: int, height: int) -> Callable[[int], None]:
+    frames = _scene_frames(width, height)
+    _, tracker, heatmap = _warm_pipeline(width, height, frames)
+    tracked = set(tracker.current_potential_objects)
+    return lambda i: heatmap.update(tracked)
+
+
+def case_overlay(width: int, height: int, overlay: str) -> Callable[[int], None]:
+    frames = _scene_frames(width, height)
+    _, tracker, heatmap = _warm_pipeline(width, height, frames)
+    tracked = list(tracker.current_potential_objects)
+    builders = {
+        "draw_tracking": lambda frame: draw_tracking(frame.copy(), [], tracked, []),
+        "tracks_overlay": tracker.create_overlay,
+        "heatmap_overlay": tracker.create_heatmap_overlay,
+        "flow_overlay": heatmap.create_flow_overlay,
+    }
+    build = builders[overlay]
+    return lambda i: build(frames[i % len(frames)])
+
+
+def case_frame_cache(width: int, height: int) -> Callable[[int], None]:
+    frames = _scene_frames(width, height)
+    mask = np.zeros((height, width), dtype=np.uint8)
+    cache: deque[FrameCacheEntry] = deque(maxlen=FRAME_CACHE_ENTRIES)
+
+    def step(i: int) -> None:
+        frame = frames[i % len(frames)]
+        cache.append(
+            FrameCacheEntry(
+                frame.copy(), mask.copy(), frame.copy(), frame.copy(), frame.copy(), i, "", set(), set()
+            )
+        )
+
+    return step
+
+
+def case_pipeline(width: int, height: int) -> Callable[[int], None]:
+    # The staged pipeline the app runs, so its throughput includes the overlap between stages
+    tracker = ObjectTracker(width, height)
+    heatmap = Heatmap(width, height)
+
+    def track(item: PipelineFrame) -> None:
+        item.tracked, item.predicted = tracker.update(item.detections)
+        heatmap.update(item.tracked)
+        draw_tracking(item.frame, item.detections, item.tracked, item.predicted)
+
+    renderers = {
+        "tracks_overlay": lambda item: tracker.create_overlay(item.frame),
+        "heatmap_overlay": lambda item: tracker.create_heatmap_overlay(item.original_frame),
+        "flow_overlay": lambda item: heatmap.create_flow_overlay(item.frame),
+    }
+    source = _SyntheticSource(_scene_frames(width, height))
+    return _PipelineStep(FramePipeline(source, ObjectFinder(), track, renderers))
+
+
+def build_cases() -> dict[str, Callable[..., Callable[[int], None]]]:
+    cases: dict[str, Callable[..., Callable[[int], None]]] = {
+        "pipeline": case_pipeline,
+        "objectfinder_update": case_objectfinder,
+        "flow_heatmap_update": case_flow_heatmap,
+        "frame_cache_append": case_frame_cache,
+    }
+    for count in TRACKER_OBJECT_COUNTS:
+        cases[f"tracker_update_{count}"] = lambda w, h, count=count: case_tracker(w, h, count)
+    for overlay in ("draw_tracking", "tracks_overlay", "heatmap_overlay", "flow_overlay"):
+        cases[overlay] = lambda w, h, overlay=overlay: case_overlay(w, h, overlay)
+    return cases
+
+
+def _run_case(task: tuple[str, str, int]) -> dict:
+    name, resolution, steps = task
+    width, height = RESOLUTIONS[resolution]
+    step = build_cases()[name](width, height)
+    for i in range(WARMUP_STEPS):
+        step(i)
+    start = time.perf_counter()
+    for i in range(WARMUP_STEPS, WARMUP_STEPS + steps):
+        step(i)
+    elapsed = time.perf_counter() - start
+    if hasattr(step, "close"):
+        step.close()  # Stops the threads of a pipeline case
+    peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak_rss_kb /= 1024  # macOS reports bytes
+    return {
+        "fps": steps / elapsed,
+        "ms_per_frame": 1000 * elapsed / steps,
+        "peak_rss_mb": peak_rss_kb / 1024,
+    }
+
+
+def run_suite(cases: list[str], resolutions: list[str], steps: int) -> dict:
+    """
+    Runs every case at every resolution, each in a fresh process.
+
+    Args:
+        cases (list[str]): Names of the cases to run.
+        resolutions (list[str]): Keys of `RESOLUTIONS` to run at.
+        steps (int): Timed steps (frames or calls) per case.
+
+    Returns:
+        dict: Machine info and per-`case@resolution` results.
+    """
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    for resolution in resolutions:
+        for name in cases:
+            with context.Pool(1) as pool:
+                result = pool.apply(_run_case, ((name, resolution, steps),))
+            key = f"{name}@{resolution}"
+            results[key] = result
+            print(
+                f"{key:<32}{result['fps']:>10.1f} fps{result['ms_per_frame']:>10.2f} ms"
+                f"{result['peak_rss_mb']:>9.0f} MB"
+            )
+    return {
+        "machine": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpus": multiprocessing.cpu_count(),
+        },
+        "steps": steps,
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Compares results against a baseline.
+
+    Args:
+        current (dict): Results of `run_suite`.
+        baseline (dict): Stored results of an earlier `run_suite`.
+        tolerance (float): Allowed relative throughput loss and peak RSS growth, e.g. 0.15.
+
+    Returns:
+        list[str]: One message per regression; empty if there are none.
+    """
+    regressions = []
+    for key, result in current["results"].items():
+        base = baseline["results"].get(key)
+        if base is None:
+            continue
+        if result["fps"] < base["fps"] * (1 - tolerance):
+            regressions.append(f"{key}: {result['fps']:.1f} fps vs baseline {base['fps']:.1f} fps")
+        if result["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(
+                f"{key}: {result['peak_rss_mb']:.0f} MB vs baseline {base['peak_rss_mb']:.0f} MB"
+            )
+    return regressions
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    all_cases = list(build_cases())
+    parser = argparse.ArgumentParser(description="Bat-O-Meter throughput benchmarks")
+    parser.add_argument("--cases", type=str, default=",".join(all_cases), help="Comma-separated cases to run")
+    parser.add_argument("--resolutions", type=str, default=",".join(RESOLUTIONS), help="e.g. 480p,1080p,4k")
+    parser.add_argument("--steps", type=int, default=50, help="Timed frames/calls per case")
+    parser.add_argument("--save", type=str, default=None, help="Write results as a JSON baseline")
+    parser.add_argument("--compare", type=str, default=None, help="Baseline JSON to gate against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative regression")
+    args = parser.parse_args(argv)
+
+    cases = [case for case in args.cases.split(",") if case]
+    unknown = set(cases) - set(all_cases)
+    if unknown:
+        parser.error(f"Unknown cases: {sorted(unknown)}. Available: {all_cases}")
+    current = run_suite(cases, args.resolutions.split(","), args.steps)
+    if args.save:
+        with open(args.save, "w") as baseline_file:
+            json.dump(current, baseline_file, indent=2)
+        print(f"Saved baseline to {args.save}")
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            regressions = compare(current, json.load(baseline_file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
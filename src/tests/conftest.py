@@ -1,3 +1,10 @@
+import cv2
+import pytest
+
+import batometer.batometerApp as batometer_app
+from batometer.synthetic import SyntheticConfig, write_synthetic_clip
+
+
 def pytest_addoption(parser):
     parser.addoption(
         "--debug-frames",
@@ -5,3 +12,37 @@ def pytest_addoption(parser):
         default=False,
         help="Show frame visualization during tests.",
     )
+
+
+@pytest.fixture
+def write_clip(tmp_path):
+    """
+    Writes a synthetic clip to `tmp_path` and returns its path. Keyword arguments override the
+    `SyntheticConfig` defaults.
+    """
+
+    def write(**config) -> str:
+        video_path = str(tmp_path / "clip.avi")
+        write_synthetic_clip(SyntheticConfig(**config), video_path, str(tmp_path / "truth.csv"))
+        return video_path
+
+    return write
+
+
+@pytest.fixture
+def clip(write_clip):
+    return write_clip(width=320, height=240, num_frames=60, warmup_frames=5, num_bats=6, entry_spread=20)
+
+
+@pytest.fixture
+def headless(tmp_path, monkeypatch):
+    """
+    Runs the app without a window, playing the video through without key presses. The end-of-run
+    outputs are written to `tmp_path`.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(cv2, "namedWindow", lambda *args, **kwargs: None)
+    monkeypatch.setattr(cv2, "imshow", lambda *args, **kwargs: None)
+    monkeypatch.setattr(cv2, "waitKey", lambda delay: -1)
+    monkeypatch.setattr(cv2, "destroyAllWindows", lambda: None)
+    monkeypatch.setattr(batometer_app, "resize_window_to_screen", lambda *args: None)
@@ -0,0 +1,63 @@
+import numpy as np
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte, value = value & 0x7F, value >> 7
+        out.append(byte | 0x80 if value else byte)
+        if not value:
+            return bytes(out)
+
+
+def _field(number: int, value) -> bytes:
+    # Protobuf wire format: varints for ints, length-delimited for strings and messages
+    if isinstance(value, int):
+        return _varint(number << 3) + _varint(value)
+    if isinstance(value, str):
+        value = value.encode()
+    return _varint(number << 3 | 2) + _varint(len(value)) + value
+
+
+def _tensor(name: str, array: np.ndarray) -> bytes:
+    dims = b"".join(_field(1, dim) for dim in array.shape)
+    return dims + _field(2, 1) + _field(8, name) + _field(9, array.astype(np.float32).tobytes())
+
+
+def _value_info(name: str, dims: list) -> bytes:
+    shape = b"".join(_field(1, _field(2, dim) if isinstance(dim, str) else _field(1, dim)) for dim in dims)
+    return _field(1, name) + _field(2, _field(1, _field(1, 1) + _field(2, shape)))
+
+
+def write_conv_model(path: str, weight: np.ndarray, bias: np.ndarray, input_size: int) -> None:
+    """
+    Writes an ONNX model made of a single convolution whose stride is its kernel size, without needing
+    the onnx package. Each output position sees one kernel-sized cell of the input.
+
+    Args:
+        path (str): Output `.onnx` path.
+        weight (np.ndarray): Kernel of shape (outputs, 3, size, size).
+        bias (np.ndarray): Bias of shape (outputs,).
+        input_size (int): Side of the square input, a multiple of the kernel size.
+    """
+    outputs, _, kernel, _ = weight.shape
+    ints = b"".join(_field(8, kernel) for _ in range(2))
+    node = b"".join(_field(1, name) for name in ("images", "weight", "bias"))
+    node += _field(2, "output") + _field(4, "Conv")
+    node += _field(5, _field(1, "strides") + _field(20, 7) + ints)
+    node += _field(5, _field(1, "kernel_shape") + _field(20, 7) + ints)
+    grid = input_size // kernel
+    graph = _field(1, node) + _field(2, "tiny")
+    graph += _field(5, _tensor("weight", weight)) + _field(5, _tensor("bias", bias))
+    graph += _field(11, _value_info("images", ["batch", 3, input_size, input_size]))
+    graph += _field(12, _value_info("output", ["batch", outputs, grid, grid]))
+    with open(path, "wb") as model_file:
+        model_file.write(_field(1, 7) + _field(8, _field(2, 13)) + _field(7, graph))
+
+
+def write_brightness_classifier(path: str, input_size: int) -> None:
+    """
+    Writes a classifier scoring each input by its mean brightness in [0, 1].
+    """
+    weight = np.full((1, 3, input_size, input_size), 1 / (3 * input_size * input_size))
+    write_conv_model(path, weight, np.zeros(1), input_size)
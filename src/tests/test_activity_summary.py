@@ -0,0 +1,94 @@
+import csv
+import pickle
+from collections import Counter
+
+import pytest
+
+from batometer.activitySummary import ACTIVITY_COLUMNS, ActivitySummaryWriter
+from batometer.analysis import summarise_tracks
+from batometer.detectionObject import Detection, Point
+from batometer.objectTracker import ObjectTracker
+
+FPS = 10
+NUM_FRAMES = 95
+
+
+def bat_detections(frame_num: int) -> set[Detection]:
+    """
+    Bats flying right along rows, one starting every 7 frames and visible for 25 frames, plus a short
+    flicker every 20 frames that never becomes a confirmed track.
+    """
+    detections = set()
+    for start in range(1, frame_num + 1, 7):
+        if frame_num - start < 25:
+            detections.add(Detection(Point(10 + 12 * (frame_num - start), 40 + 30 * (start // 7 % 5)), 6, 4))
+    if frame_num % 20 < 3:
+        detections.add(Detection(Point(600, 400), 4, 4))
+    return detections
+
+
+def feed(summary: ActivitySummaryWriter, tracker: ObjectTracker, frames: range) -> None:
+    for frame_num in frames:
+        detections = bat_detections(frame_num)
+        num_detections = len(detections)
+        tracked, predicted = tracker.update(detections)
+        summary.update(frame_num, num_detections, tracked, predicted)
+
+
+def read_rows(path) -> list[dict]:
+    with open(path) as summary_file:
+        return list(csv.DictReader(summary_file))
+
+
+def test_bins_are_flushed_as_they_close_and_agree_with_the_final_summary(tmp_path):
+    """
+    Test that each bin reaches the file when it closes, and that the bins add up to the end-of-run totals.
+    """
+    path = tmp_path / "activity.csv"
+    tracker = ObjectTracker(640, 480)
+    summary = ActivitySummaryWriter(str(path), tracker, FPS, bin_seconds=2)
+    feed(summary, tracker, range(1, 41))
+    # Two 20-frame bins are closed and readable while the run goes on
+    assert [row["bin"] for row in read_rows(path)] == ["0", "1"]
+    feed(summary, tracker, range(41, NUM_FRAMES + 1))
+    summary.close()
+
+    rows = read_rows(path)
+    assert list(rows[0]) == ACTIVITY_COLUMNS
+    assert [row["frames"] for row in rows] == ["20", "20", "20", "20", "15"]
+    all_detections = sum(len(bat_detections(frame_num)) for frame_num in range(1, NUM_FRAMES + 1))
+    assert sum(int(row["detections"]) for row in rows) == all_detections
+    assert sum(int(row["new_tracks"]) for row in rows) == tracker.id_count
+
+    tracks = summarise_tracks(tracker)
+    assert sum(int(row["confirmed_tracks"]) for row in rows) == len(tracks)
+    assert sum(int(row["finished_tracks"]) for row in rows) == len(tracks)
+    directions = Counter(track["Incoming Direction"] for track in tracks)
+    for direction in ("right", "left", "down", "up"):
+        assert sum(int(row[direction]) for row in rows) == directions[direction]
+    finished = [int(row["finished_tracks"]) for row in rows]
+    likelihood_sum = sum(float(row["mean_bat_likelihood"]) * n for row, n in zip(rows, finished))
+    assert likelihood_sum == pytest.approx(sum(track["Likelihood of Bat"] for track in tracks), abs=1e-3)
+
+
+def test_resume_from_checkpoint_rewrites_later_bins(tmp_path):
+    """
+    Test that resuming from a checkpoint in the middle of a bin gives the same file as an uninterrupted run.
+    """
+    full_path, resumed_path = tmp_path / "full.csv", tmp_path / "resumed.csv"
+    tracker = ObjectTracker(640, 480)
+    summary = ActivitySummaryWriter(str(full_path), tracker, FPS, bin_seconds=2)
+    feed(summary, tracker, range(1, NUM_FRAMES + 1))
+    summary.close()
+
+    tracker = ObjectTracker(640, 480)
+    summary = ActivitySummaryWriter(str(resumed_path), tracker, FPS, bin_seconds=2)
+    feed(summary, tracker, range(1, 51))
+    state, tracker_state = summary.checkpoint(), pickle.dumps(tracker)
+    feed(summary, tracker, range(51, 71))  # Written, then lost when the run dies
+
+    tracker = pickle.loads(tracker_state)
+    summary = ActivitySummaryWriter(str(resumed_path), tracker, FPS, bin_seconds=2, resume=state)
+    feed(summary, tracker, range(51, NUM_FRAMES + 1))
+    summary.close()
+    assert resumed_path.read_text() == full_path.read_text()
@@ -0,0 +1,43 @@
+import cv2
+import numpy as np
+
+from batometer.annotatedVideo import AnnotatedVideoWriter
+
+
+def _read_frames(path: str) -> list[np.ndarray]:
+    capture = cv2.VideoCapture(path)
+    frames = []
+    while (frame := capture.read()[1]) is not None:
+        frames.append(frame)
+    capture.release()
+    return frames
+
+
+def test_writer_encodes_every_stride_frame_scaled_beside_the_mask(tmp_path):
+    """
+    Test that the writer keeps every `stride`-th frame, places the mask beside it and downscales.
+    """
+    path = str(tmp_path / "annotated.avi")
+    writer = AnnotatedVideoWriter(
+        path, 30.0, scale=0.5, stride=3, side_by_side=True, queue_size=2, fourcc="MJPG"
+    )
+    with writer:
+        for i in range(10):
+            writer.write(np.full((64, 80, 3), i * 20, dtype=np.uint8), np.full((64, 80), 255, dtype=np.uint8))
+    assert writer.frames_written == 4 and writer.fps == 10.0
+
+    frames = _read_frames(path)
+    assert len(frames) == 4
+    assert frames[0].shape == (32, 80, 3)
+    assert abs(int(frames[1][:, :40].mean()) - 60) < 8
+    assert frames[1][:, 40:].mean() > 240
+
+
+def test_writer_ignores_mask_without_side_by_side(tmp_path):
+    """
+    Test that the mask is left out unless side-by-side output is requested.
+    """
+    path = str(tmp_path / "annotated.avi")
+    with AnnotatedVideoWriter(path, 25.0, fourcc="MJPG") as writer:
+        writer.write(np.zeros((48, 64, 3), dtype=np.uint8), np.zeros((48, 64), dtype=np.uint8))
+    assert [frame.shape for frame in _read_frames(path)] == [(48, 64, 3)]
@@ -0,0 +1,38 @@
+from batometer.batometerApp import BatometerApp
+from batometer.detectionCache import DetectionCache
+from batometer.objectfinder import ObjectFinder
+from batometer.videoManager import VideoManager
+
+
+def test_detection_cache_stores_the_detector_output(clip, tmp_path, headless):
+    """
+    Test that the cache holds every detection of each frame, not only those the tracker left unmatched.
+    """
+    cache_dir = str(tmp_path / "cache")
+    BatometerApp(clip, detection_cache_dir=cache_dir).run()
+
+    expected = []
+    finder = ObjectFinder()
+    with VideoManager(clip) as video_manager:
+        while video_manager.has_more_frames():
+            detections, _ = finder.update(video_manager.read_frame())
+            expected.append((video_manager.frame_num, detections))
+    cache = DetectionCache.find(cache_dir, clip, finder.params())
+    assert cache is not None
+    assert sum(len(detections) for _, detections in expected) > 60
+    assert list(cache.frames()) == expected
+
+
+def test_frame_cache_is_bounded_in_live_mode(clip, headless):
+    """
+    Test that a live run drops the oldest cached frames beyond its budget, keeping the newest.
+    """
+    entry_bytes = 4 * 320 * 240 * 3 + 320 * 240  # The frame and its three overlays, and the mask
+    app = BatometerApp(clip, live=True, frame_cache_mb=10 * entry_bytes / 2**20)
+    app.run()
+    assert len(app.frame_cache) == 10
+    assert app.frame_cache_bytes == sum(entry.nbytes() for entry in app.frame_cache)
+    assert app.frame_cache_bytes <= app.frame_cache_max_bytes
+    frame_nums = [entry.frame_num for entry in app.frame_cache]
+    assert frame_nums == sorted(frame_nums)
+    assert app.input_handler.current_paused_frame_idx == len(app.frame_cache) - 1
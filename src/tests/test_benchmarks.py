@@ -0,0 +1,36 @@
+from benchmarks.suite import case_pipeline, compare
+
+
+def _results(**results) -> dict:
+    return {"results": {key: {"fps": fps, "peak_rss_mb": rss} for key, (fps, rss) in results.items()}}
+
+
+def test_compare_flags_throughput_and_memory_regressions_beyond_tolerance():
+    """
+    Test that only cases slower or larger than the baseline by more than the tolerance are reported, and
+    cases missing from the baseline are ignored.
+    """
+    baseline = _results(**{"pipeline@480p": (100.0, 200.0), "tracker@480p": (50.0, 100.0)})
+    within = _results(
+        **{"pipeline@480p": (86.0, 229.0), "tracker@480p": (60.0, 90.0), "new@480p": (1.0, 1e6)}
+    )
+    assert compare(within, baseline, tolerance=0.15) == []
+
+    regressed = _results(**{"pipeline@480p": (84.0, 200.0), "tracker@480p": (50.0, 116.0)})
+    regressions = compare(regressed, baseline, tolerance=0.15)
+    assert len(regressions) == 2
+    assert regressions[0].startswith("pipeline@480p: 84.0 fps")
+    assert regressions[1].startswith("tracker@480p: 116 MB")
+
+
+
+def test_pipeline_case_runs_the_staged_pipeline():
+    """
+    Test that the pipeline case takes finished frames from a running `FramePipeline` and stops its threads.
+    """
+    step = case_pipeline(160, 120)
+    for i in range(5):
+        step(i)
+    step.close()
+    assert step.pipeline.stats["track"].items >= 5
+    assert step.pipeline.stats["render"].items >= 5
@@ -0,0 +1,113 @@
+import numpy as np
+
+from batometer.blobMerging import merge_detections
+from batometer.detectionObject import Detection, Point
+from batometer.objectfinder import ObjectFinder
+from batometer.objectTracker import ObjectTracker
+
+
+def boxes(detections) -> set[tuple]:
+    return {(det.point.x, det.point.y, det.width, det.height) for det in detections}
+
+
+def split_bat(x: int, y: int) -> set[Detection]:
+    """
+    A bat whose body and wings came out of the mask as three contours a few pixels apart.
+    """
+    return {
+        Detection(Point(x, y), 6, 5, 0.5),  # Left wing
+        Detection(Point(x + 9, y + 1), 4, 4, 0.9),  # Body
+        Detection(Point(x + 16, y), 6, 5, 0.4),  # Right wing
+    }
+
+
+def test_merges_split_wings_into_one_detection():
+    """
+    Test that the contours of one bat become a single detection covering them, keeping the highest score,
+    while a blob further away than the gap is returned unchanged.
+    """
+    far = Detection(Point(200, 50), 8, 6, 0.3)
+    merged = merge_detections(split_bat(10, 20) | {far}, max_gap=5)
+    assert boxes(merged) == {(10, 20, 22, 5), (200, 50, 8, 6)}
+    assert far in merged
+    assert {det.score for det in merged} == {0.9, 0.3}
+    # The gap between the wings and the body is 3 pixels
+    assert len(merge_detections(split_bat(10, 20), max_gap=2)) == 3
+
+
+def test_merges_by_overlap_only():
+    """
+    Test that with only `min_iou` set, overlapping boxes are merged and separate ones are not, however
+    close.
+    """
+    detections = {
+        Detection(Point(0, 0), 10, 10),
+        Detection(Point(5, 0), 10, 10),  # IoU 1/3 with the first
+        Detection(Point(16, 0), 10, 10),  # 1 pixel from the second
+    }
+    assert boxes(merge_detections(detections, max_gap=None, min_iou=0.3)) == {(0, 0, 15, 10), (16, 0, 10, 10)}
+    assert len(merge_detections(detections, max_gap=None, min_iou=0.5)) == 3
+
+
+def test_matches_comparing_every_pair():
+    """
+    Test that the grid finds the same groups as comparing every pair of boxes, boxes of very different
+    sizes included.
+    """
+    rng = np.random.default_rng(0)
+    sizes = rng.integers(2, 12, size=(400, 2))
+    sizes[:10] *= 8
+    detections = [
+        Detection(Point(int(x), int(y)), int(w), int(h))
+        for (x, y), (w, h) in zip(rng.integers(0, 400, size=(400, 2)), sizes)
+    ]
+    max_gap = 4
+    parent = list(range(len(detections)))
+
+    def find(node):
+        while parent[node] != node:
+            node = parent[node]
+        return node
+
+    for i, a in enumerate(detections):
+        for j, b in enumerate(detections[:i]):
+            gap_x = max(a.point.x, b.point.x) - min(a.point.x + a.width, b.point.x + b.width)
+            gap_y = max(a.point.y, b.point.y) - min(a.point.y + a.height, b.point.y + b.height)
+            if max(gap_x, gap_y) <= max_gap:
+                parent[find(i)] = find(j)
+    groups = {}
+    for i, det in enumerate(detections):
+        groups.setdefault(find(i), []).append(det)
+    expected = {
+        (
+            min(det.point.x for det in group),
+            min(det.point.y for det in group),
+            max(det.point.x + det.width for det in group) - min(det.point.x for det in group),
+            max(det.point.y + det.height for det in group) - min(det.point.y for det in group),
+        )
+        for group in groups.values()
+    }
+    assert boxes(merge_detections(detections, max_gap=max_gap)) == expected
+
+
+def test_merging_stops_split_blobs_spawning_tracks():
+    """
+    Test that a bat detected as three contours gets a single track once its blobs are merged.
+    """
+    unmerged, merged = ObjectTracker(640, 480), ObjectTracker(640, 480)
+    for frame in range(30):
+        unmerged.update(split_bat(20 + 10 * frame, 200))
+        merged.update(merge_detections(split_bat(20 + 10 * frame, 200)))
+    assert unmerged.id_count > 1
+    assert merged.id_count == 1
+
+
+def test_finder_params_include_merging_only_when_set():
+    """
+    Test that merging options are part of the detector parameters only when set, so existing detection
+    caches keep their keys.
+    """
+    assert "merge_gap" not in ObjectFinder().params()
+    params = ObjectFinder(merge_gap=8, merge_iou=0.5).params()
+    assert params["merge_gap"] == 8
+    assert params["merge_iou"] == 0.5
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from batometer.cascadeDetector import CascadeDetector
+from batometer.detectionCache import DetectionCache, DetectionCacheWriter
+from batometer.detectionObject import Detection, Point
+from batometer.objectfinder import ObjectFinder
+from batometer.objectTracker import ObjectTracker
+from tests.onnx_models import write_brightness_classifier
+
+CROP_SIZE = 16
+
+
+@pytest.fixture
+def classifier(tmp_path):
+    path = str(tmp_path / "classifier.onnx")
+    write_brightness_classifier(path, CROP_SIZE)
+    return path
+
+
+def _frame_with_blobs(blobs: list[tuple[int, int, int]]) -> np.ndarray:
+    frame = np.zeros((120, 160, 3), dtype=np.uint8)
+    for x, y, value in blobs:
+        frame[y : y + 10, x : x + 10] = value
+    return frame
+
+
+def test_cascade_scores_each_blob_and_tracker_ignores_low_scores(classifier):
+    """
+    Test that every motion blob is classified, in batches, and low-scoring blobs never become tracks.
+    """
+    detector = CascadeDetector(ObjectFinder(), classifier, crop_size=CROP_SIZE, crop_padding=0, batch_size=2)
+    for _ in range(20):
+        detector.warm_up(_frame_with_blobs([]))
+    # A bright bat and two dim insects
+    detections, _ = detector.update(_frame_with_blobs([(20, 20, 255), (80, 30, 60), (120, 90, 60)]))
+    detector.close()
+
+    scores = {det.point: det.score for det in detections}
+    assert set(scores) == {Point(20, 20), Point(80, 30), Point(120, 90)}
+    assert scores[Point(20, 20)] == pytest.approx(1.0, abs=1e-4)
+    assert scores[Point(80, 30)] == pytest.approx(60 / 255, abs=0.01)
+    assert (detector.crops, detector.batches) == (3, 2)
+    assert detector.params()["detector"] == "cascade"
+
+    tracker = ObjectTracker(160, 120, min_score=0.5)
+    tracked, _ = tracker.update(detections)
+    assert [obj.point for obj in tracked] == [Point(20, 20)]
+    assert tracker.id_count == 1
+
+
+def test_detection_cache_keeps_scores(tmp_path):
+    """
+    Test that cached detections are replayed with their classifier scores.
+    """
+    video = tmp_path / "video.avi"
+    video.write_bytes(b"not really a video")
+    writer = DetectionCacheWriter(str(tmp_path / "cache"), str(video), {"detector": "cascade"}, 160, 120, 25)
+    writer.append(1, {Detection(Point(1, 2), 3, 4, 0.25), Detection(Point(5, 6), 7, 8)})
+    writer.close()
+
+    cache = DetectionCache.find(str(tmp_path / "cache"), str(video), {"detector": "cascade"})
+    [(frame_num, detections)] = list(cache.frames())
+    assert frame_num == 1
+    assert {(det.point.x, det.score) for det in detections} == {(1, 0.25), (5, 1.0)}
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from batometer.analysis import summarise_tracks
+from batometer.checkpoint import (
+    Checkpoint,
+    load_checkpoint,
+    restore_tracking,
+    resume_video,
+    save_checkpoint,
+    tracking_state,
+)
+from batometer.detectionCache import video_fingerprint
+from batometer.heatmap import Heatmap
+from batometer.objectfinder import ObjectFinder
+from batometer.objectTracker import ObjectTracker
+from batometer.resultsLog import ResultsLogWriter, load_results_log
+from batometer.videoManager import VideoManager
+
+CHECKPOINT_FRAME = 40
+
+
+@pytest.fixture
+def clip(write_clip):
+    # Longer and busier than the shared clip, so tracks are alive across the checkpoint
+    return write_clip(width=320, height=240, num_frames=90, warmup_frames=5, num_bats=8, entry_spread=40)
+
+
+def _process(video_manager, finder, tracker, heatmap, results_log, stop_after=None):
+    while video_manager.has_more_frames() and video_manager.frame_num != stop_after:
+        detections, _ = finder.update(video_manager.read_frame())
+        tracked, predicted = tracker.update(detections)
+        heatmap.update(tracked)
+        results_log.append_frame(video_manager.frame_num, tracked, predicted)
+
+
+def test_resumed_run_matches_uninterrupted_run(clip, tmp_path):
+    """
+    Test that resuming from a checkpoint, after outputs were written past it, reproduces an uninterrupted run.
+    """
+    with VideoManager(clip) as video_manager:
+        tracker, heatmap = ObjectTracker(320, 240), Heatmap(320, 240)
+        with ResultsLogWriter(str(tmp_path / "full"), chunk_rows=16) as results_log:
+            _process(video_manager, ObjectFinder(), tracker, heatmap, results_log)
+    expected_tracks = summarise_tracks(tracker)
+    assert expected_tracks
+
+    checkpoint_path = str(tmp_path / "run.ckpt")
+    with VideoManager(clip) as video_manager:
+        tracker, heatmap = ObjectTracker(320, 240), Heatmap(320, 240)
+        finder = ObjectFinder()
+        results_log = ResultsLogWriter(str(tmp_path / "resumed"), chunk_rows=16)
+        _process(video_manager, finder, tracker, heatmap, results_log, stop_after=CHECKPOINT_FRAME)
+        checkpoint = Checkpoint(
+            CHECKPOINT_FRAME, video_fingerprint(clip), finder.params(), tracking_state(tracker, heatmap)
+        )
+        checkpoint.outputs["results_log"] = results_log.checkpoint()
+        save_checkpoint(checkpoint_path, checkpoint)
+        # Keep going past the checkpoint before "crashing"
+        _process(video_manager, finder, tracker, heatmap, results_log, stop_after=70)
+        results_log.close()
+
+    finder = ObjectFinder()
+    checkpoint = load_checkpoint(checkpoint_path, clip, finder.params())
+    with VideoManager(clip) as video_manager:
+        tracker, heatmap = ObjectTracker(320, 240), Heatmap(320, 240)
+        restore_tracking(checkpoint.tracking, tracker, heatmap)
+        resume_video(video_manager, finder, checkpoint.frame_num, warmup_frames=None)
+        assert video_manager.frame_num == CHECKPOINT_FRAME
+        resume = checkpoint.outputs["results_log"]
+        with ResultsLogWriter(str(tmp_path / "resumed"), chunk_rows=16, resume=resume) as results_log:
+            _process(video_manager, finder, tracker, heatmap, results_log)
+
+    assert summarise_tracks(tracker) == expected_tracks
+    expected, actual = load_results_log(str(tmp_path / "full")), load_results_log(str(tmp_path / "resumed"))
+    assert all(np.array_equal(expected[name], actual[name]) for name in expected)
+
+
+def test_checkpoint_rejects_other_detector_parameters(clip, tmp_path):
+    """
+    Test that a checkpoint is only loaded for the video and detector it was written for.
+    """
+    checkpoint_path = str(tmp_path / "run.ckpt")
+    tracking = tracking_state(ObjectTracker(320, 240), Heatmap(320, 240))
+    checkpoint = Checkpoint(10, video_fingerprint(clip), ObjectFinder().params(), tracking)
+    save_checkpoint(checkpoint_path, checkpoint)
+    assert load_checkpoint(checkpoint_path, clip, ObjectFinder().params()).frame_num == 10
+    with pytest.raises(ValueError):
+        load_checkpoint(checkpoint_path, clip, ObjectFinder(var_threshold=50).params())
+    with pytest.raises(FileNotFoundError):
+        load_checkpoint(str(tmp_path / "missing.ckpt"), clip, ObjectFinder().params())
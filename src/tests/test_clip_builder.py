@@ -0,0 +1,82 @@
+import itertools
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from batometer.clipBuilder import frame_number, iter_frames, ordered_map, write_gif, write_mp4
+from batometer.datasetExport import DatasetExporter, ExportConfig
+
+
+def _frame(i: int) -> np.ndarray:
+    frame = np.zeros((40, 60, 3), dtype=np.uint8)
+    frame[:, :, 2] = 200  # Red background
+    frame[10:20, i : i + 10] = (255, 255, 255)
+    return frame
+
+
+def test_ordered_map_keeps_order_with_a_bounded_window():
+    """
+    Test that results come back in input order and no more than `window` items are taken ahead.
+    """
+    taken = []
+
+    def items():
+        for i in range(50):
+            taken.append(i)
+            yield i
+
+    results = ordered_map(lambda i: i * i, items(), workers=4, window=3)
+    assert next(results) == 0 and len(taken) == 3
+    assert list(results) == [i * i for i in range(1, 50)]
+
+
+def test_folder_frames_sort_numerically_and_stream_to_mp4_and_gif(tmp_path):
+    """
+    Test that numbered images are read in frame order, downscaled, and encoded to a video and a GIF.
+    """
+    frames_dir = tmp_path / "frames"
+    frames_dir.mkdir()
+    for i in range(12):
+        cv2.imwrite(str(frames_dir / f"frame-{i}.png"), _frame(i * 4))
+    assert sorted(["frame-10.png", "frame-9.png"], key=frame_number) == ["frame-9.png", "frame-10.png"]
+
+    frames = list(iter_frames(str(frames_dir), scale=0.5, workers=3, window=2))
+    assert len(frames) == 12 and frames[0].shape == (20, 30, 3)
+    assert frames[11][7, 23].min() > 200  # The white box has moved right
+
+    assert write_mp4(iter_frames(str(frames_dir)), str(tmp_path / "clip.avi"), 10, fourcc="MJPG") == 12
+    assert cv2.VideoCapture(str(tmp_path / "clip.avi")).get(cv2.CAP_PROP_FRAME_COUNT) == 12
+
+    gif_path = str(tmp_path / "clip.gif")
+    assert write_gif(iter_frames(str(frames_dir)), gif_path, duration=100, palette_frames=4, workers=2) == 12
+    with Image.open(gif_path) as gif:
+        assert gif.n_frames == 12 and gif.size == (60, 40) and gif.info["duration"] == 100
+        gif.seek(11)
+        rgb = np.asarray(gif.convert("RGB"))
+    assert tuple(rgb[0, 0]) == (200, 0, 0) and rgb[15, 50].min() == 255
+
+
+def test_sharded_export_is_a_frame_source(tmp_path, monkeypatch):
+    """
+    Test that a sharded dataset export can be read as a clip without unpacking it, in frame order however
+    many workers wrote it.
+    """
+    encode = cv2.imencode
+    calls = itertools.count()
+
+    def slow_encode(*args):
+        # Earlier frames of each group of four take longest, so the workers finish them out of order
+        time.sleep((3 - next(calls) % 4) * 0.005)
+        return encode(*args)
+
+    monkeypatch.setattr(cv2, "imencode", slow_encode)
+    config = ExportConfig(str(tmp_path), split="none", shard_size=4, workers=4, max_pending=8)
+    with DatasetExporter(config) as exporter:
+        for i in range(1, 41):
+            exporter.export(i, _frame(i), ["0 0.5 0.5 0.1 0.1"])
+    frames = list(iter_frames(str(tmp_path), split="train", workers=3))
+    assert len(frames) == 40
+    # The white box starts one pixel further right in each frame
+    assert [int(np.argmax(frame[15, :, 0] > 200)) for frame in frames] == list(range(1, 41))
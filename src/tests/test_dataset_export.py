@@ -0,0 +1,84 @@
+import cv2
+import numpy as np
+import pytest
+
+from batometer.datasetExport import (
+    DatasetExporter,
+    ExportConfig,
+    iter_shard_samples,
+    parse_split_policy,
+    yolo_labels,
+)
+from batometer.detectionObject import Detection, IdentifiedObject, Point
+
+
+def test_split_policies():
+    """
+    Test the fixed, frame-threshold and hashed-block split policies.
+    """
+    assert parse_split_policy("none")(5) == "train"
+    before = parse_split_policy("before:554")
+    assert before(553) == "val" and before(554) == "train"
+
+    ratio = parse_split_policy("ratio:0.2:100")
+    splits = [ratio(frame_num) for frame_num in range(100_000)]
+    assert 0.15 < splits.count("val") / len(splits) < 0.25
+    assert all(len(set(splits[i : i + 100])) == 1 for i in range(0, 100_000, 100))
+    with pytest.raises(ValueError):
+        parse_split_policy("random")
+
+
+def test_yolo_labels_only_long_tracks_normalised_by_frame_size():
+    """
+    Test that labels hold the normalised box centre and size of objects tracked long enough.
+    """
+    short = IdentifiedObject(0, Detection(Point(0, 0), 4, 4))
+    long = IdentifiedObject(1, Detection(Point(0, 0), 20, 10))
+    for i in range(11):
+        long.update(Point(i, i), 20, 10)
+    assert yolo_labels([short, long], 200, 100) == ["0 0.100000 0.150000 0.100000 0.100000"]
+
+
+def test_exporter_writes_samples_in_background_and_skips_empty_frames(tmp_path):
+    """
+    Test that samples land in their split folders, empty frames are skipped and JPEG is supported.
+    """
+    frame = np.full((48, 64, 3), 90, dtype=np.uint8)
+    config = ExportConfig(str(tmp_path), split="before:4", image_format="jpg", workers=2, max_pending=2)
+    with DatasetExporter(config) as exporter:
+        for frame_num in range(1, 9):
+            exporter.export(frame_num, frame, ["0 0.5 0.5 0.1 0.1"] if frame_num % 2 else [])
+    assert exporter.exported == {"train": 2, "val": 2} and exporter.skipped == 4
+    assert sorted(p.name for p in (tmp_path / "images" / "val").iterdir()) == ["frame_1.jpg", "frame_3.jpg"]
+    assert (tmp_path / "labels" / "train" / "frame_5.txt").read_text() == "0 0.5 0.5 0.1 0.1"
+    assert cv2.imread(str(tmp_path / "images" / "train" / "frame_7.jpg")).shape == (48, 64, 3)
+    assert sorted((tmp_path / "val.txt").read_text().splitlines()) == [
+        "images/val/frame_1.jpg",
+        "images/val/frame_3.jpg",
+    ]
+
+
+def test_sharded_export_round_trips_with_split_index_files(tmp_path):
+    """
+    Test that sharded export packs samples into tar shards whose index and split lists read back intact.
+    """
+    config = ExportConfig(str(tmp_path), split="before:3", shard_size=2, workers=3)
+    with DatasetExporter(config) as exporter:
+        for frame_num in range(1, 6):
+            frame = np.full((12, 16, 3), frame_num * 20, dtype=np.uint8)
+            exporter.export(frame_num, frame, [f"0 {frame_num}"])
+    assert sorted(p.name for p in (tmp_path / "shards").iterdir()) == [
+        "shard_000000.tar",
+        "shard_000001.tar",
+        "shard_000002.tar",
+    ]
+    assert not (tmp_path / "images").exists()
+    assert len((tmp_path / "val.txt").read_text().splitlines()) == 2
+
+    samples = list(iter_shard_samples(str(tmp_path), "train"))
+    assert [(frame_num, labels) for frame_num, _, labels in samples] == [
+        (3, ["0 3"]),
+        (4, ["0 4"]),
+        (5, ["0 5"]),
+    ]
+    assert (samples[0][1] == 60).all()
@@ -0,0 +1,84 @@
+import csv
+import json
+
+from batometer.detectionObject import Detection, Point
+from batometer.gateCounter import Gate, GateCounter, GateIndex, load_gates
+from batometer.objectTracker import ObjectTracker
+
+GATE = Gate("roost", (0, 50), (100, 50))  # Drawn left to right, so flying down the frame goes in
+
+
+def run_tracks(counter: GateCounter, tracks: list[list[tuple[int, int]]], first_frame: int = 1) -> None:
+    """
+    Tracks objects moving along the given per-frame positions and counts their crossings.
+    """
+    tracker = ObjectTracker(200, 200)
+    for offset in range(max(map(len, tracks))):
+        detections = {Detection(Point(*track[offset]), 4, 4) for track in tracks if offset < len(track)}
+        tracked, _ = tracker.update(detections)
+        counter.update(first_frame + offset, tracked)
+
+
+def test_counts_crossings_by_direction():
+    """
+    Test that tracks crossing the gate are counted by direction, and tracks that turn back on the line
+    or pass beyond its end are not.
+    """
+    counter = GateCounter([GATE], fps=25)
+    run_tracks(
+        counter,
+        [
+            [(10, 30), (10, 40), (10, 50), (10, 60)],  # Down through the line: in
+            [(40, 70), (40, 60), (40, 45), (40, 35)],  # Up: out
+            [(70, 40), (70, 50), (70, 40), (70, 30)],  # Touches the line and turns back
+            [(150, 30), (150, 40), (150, 60), (150, 70)],  # Passes beyond the end of the gate
+        ],
+    )
+    assert counter.totals() == {"roost": (1, 1)}
+
+
+def test_index_only_returns_gates_near_a_segment():
+    """
+    Test that the grid index skips gates far from a segment.
+    """
+    gates = [GATE, Gate("far", (500, 500), (600, 600))]
+    index = GateIndex(gates, cell_size=32)
+    assert index.candidates(10, 40, 10, 60) == {0}
+    assert index.candidates(550, 540, 560, 560) == {1}
+    assert index.candidates(300, 300, 310, 310) == set()
+
+
+def test_bins_are_written_as_they_close_and_resume_from_checkpoint(tmp_path):
+    """
+    Test that each bin's counts reach the CSV when the bin closes, and that resuming from a checkpoint
+    rewrites the bins after it.
+    """
+    counts_path = tmp_path / "counts.csv"
+    counter = GateCounter([GATE], fps=5, bin_seconds=1, output_path=str(counts_path))
+    run_tracks(counter, [[(10, 30), (10, 45), (10, 55), (10, 65), (10, 75)]])
+    # The first bin (frames 1-5) closed with its last frame, before the counter is closed
+    with open(counts_path) as counts_file:
+        (row,) = csv.DictReader(counts_file)
+    assert row == {
+        "bin": "0", "start_seconds": "0.000", "end_seconds": "1.000", "gate": "roost", "in": "1", "out": "0"
+    }
+    state = counter.checkpoint()
+    run_tracks(counter, [[(40, 70), (40, 55), (40, 45)]], first_frame=6)
+    counter.close()
+
+    resumed = GateCounter([GATE], fps=5, bin_seconds=1, output_path=str(counts_path), resume=state)
+    run_tracks(resumed, [[(40, 70), (40, 55), (40, 45)], [(60, 70), (60, 55), (60, 45)]], first_frame=6)
+    resumed.close()
+    with open(counts_path) as counts_file:
+        rows = list(csv.DictReader(counts_file))
+    assert [(row["bin"], row["in"], row["out"]) for row in rows] == [("0", "1", "0"), ("1", "0", "2")]
+    assert resumed.totals() == {"roost": (1, 2)}
+
+
+def test_load_gates(tmp_path):
+    """
+    Test reading gates from a JSON config file.
+    """
+    config_path = tmp_path / "gates.json"
+    config_path.write_text(json.dumps({"gates": [{"name": "roost", "start": [0, 50], "end": [100, 50]}]}))
+    assert load_gates(str(config_path)) == [GATE]
@@ -0,0 +1,49 @@
+import numpy as np
+
+from batometer.heatmap import PixelHeatmap
+
+
+def test_pixel_heatmap_accumulates_at_reduced_resolution():
+    """
+    Test that track paths are accumulated into a downscaled integer grid with a running maximum.
+    """
+    heatmap = PixelHeatmap(400, 200, scale=0.25)
+    assert heatmap.accumulator.shape == (50, 100)
+    assert heatmap.accumulator.dtype == np.int32
+
+    history = np.array([(20, 20), (200, 20)])
+    heatmap.add_track(history)
+    heatmap.add_track(history)
+    assert heatmap.max_value == 2
+    assert heatmap.accumulator[5, 25] == 2
+    assert heatmap.accumulator.max() == heatmap.max_value
+
+
+def test_pixel_heatmap_colour_image_is_cached_until_refresh():
+    """
+    Test that the colour map is only rebuilt when the accumulator changed and the interval elapsed.
+    """
+    heatmap = PixelHeatmap(400, 200, scale=0.5, refresh_interval=2)
+    first = heatmap.colour_image()
+    heatmap.add_track(np.array([(10, 10), (100, 100)]))
+    heatmap.tick()
+    assert heatmap.colour_image() is first
+    heatmap.tick()
+    rebuilt = heatmap.colour_image()
+    assert rebuilt is not first
+    heatmap.tick()
+    heatmap.tick()
+    assert heatmap.colour_image() is rebuilt
+
+
+def test_pixel_heatmap_render_upscales_to_frame():
+    """
+    Test that the rendered heatmap and overlay match the full video resolution.
+    """
+    heatmap = PixelHeatmap(320, 240, scale=0.25)
+    heatmap.add_track(np.array([(0, 0), (319, 239)]))
+    heatmap.tick()
+    assert heatmap.colour_image().shape == (60, 80, 3)
+    assert heatmap.render().shape == (240, 320, 3)
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+    assert heatmap.create_overlay(frame).shape == frame.shape
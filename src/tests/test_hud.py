@@ -0,0 +1,43 @@
+import time
+
+import numpy as np
+
+from batometer.hud import HUD_TOP, PipelineHud
+from batometer.profiler import StageProfiler
+
+
+def test_hud_lag_excludes_paused_time():
+    """
+    Test that slow processing builds up lag while time spent paused does not.
+    """
+    hud = PipelineHud(source_fps=1000, profiler=StageProfiler())
+    for _ in range(3):
+        hud.frame_processed(live_tracks=2, cache_bytes=0)
+        time.sleep(0.01)
+    lag = hud.lag_seconds()
+    assert lag > 0.01
+    assert 0 < hud.processing_fps() < 1000
+
+    hud.idle()
+    time.sleep(0.05)
+    hud.frame_processed(live_tracks=2, cache_bytes=0)
+    assert hud.lag_seconds() == lag
+
+
+def test_hud_draws_stages_below_status_bar():
+    """
+    Test that the HUD lists the profiled stages and only draws below the status bar.
+    """
+    profiler = StageProfiler(enabled=True)
+    with profiler.stage("track"):
+        pass
+    profiler.end_frame(1)
+    hud = PipelineHud(source_fps=25, profiler=profiler)
+    hud.frame_processed(live_tracks=7, cache_bytes=3 * 2**20)
+    assert "Tracks: 7" in hud.lines()[0] and "Cache: 3 MB" in hud.lines()[0]
+    assert "track" in hud.lines()[1]
+
+    frame = np.full((200, 400, 3), 100, dtype=np.uint8)
+    hud.draw(frame)
+    assert (frame[:HUD_TOP] == 100).all()
+    assert (frame[HUD_TOP : HUD_TOP + 5] == 0).all()
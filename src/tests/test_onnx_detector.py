@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from batometer.detectionObject import Detection, Point
+from batometer.onnxDetector import OnnxDetector
+from batometer.pipeline import FramePipeline
+from batometer.videoManager import VideoManager
+from tests.onnx_models import write_conv_model
+
+INPUT_SIZE = 32
+CELL = 8
+
+
+def write_tiny_model(path: str) -> None:
+    """
+    Writes a detector whose every 8x8 cell is one candidate: the box (12, 12)-(20, 20) in input pixels,
+    scored by the cell's brightness.
+    """
+    weight = np.zeros((5, 3, CELL, CELL))
+    weight[4] = 1 / (3 * CELL * CELL)
+    write_conv_model(path, weight, np.array([16, 16, 8, 8, 0]), INPUT_SIZE)
+
+
+@pytest.fixture
+def model(tmp_path):
+    path = str(tmp_path / "tiny.onnx")
+    write_tiny_model(path)
+    return path
+
+
+def test_detector_batches_frames_and_maps_boxes_back(model):
+    """
+    Test that queued frames run as one batch and each frame gets its own boxes, in frame coordinates.
+    """
+    detector = OnnxDetector(model, input_size=INPUT_SIZE, batch_size=2, max_latency=10, score_threshold=0.5)
+    bright = np.full((64, 64, 3), 255, dtype=np.uint8)
+    dark = np.zeros((64, 64, 3), dtype=np.uint8)
+    pending = [detector.submit(bright), detector.submit(dark)]
+    (bright_detections, mask), (dark_detections, _) = [detector.collect(p) for p in pending]
+    detector.close()
+
+    # Overlapping candidates are merged, and the 32 px input is scaled back to the 64 px frame
+    assert bright_detections == {Detection(Point(24, 24), 16, 16)}
+    assert next(iter(bright_detections)).score == pytest.approx(1.0, abs=1e-4)
+    assert mask[24:40, 24:40].all() and mask.sum() == 255 * 16 * 16
+    assert dark_detections == set()
+    assert (detector.batches, detector.frames) == (1, 2)
+    assert detector.params()["detector"] == "onnx"
+
+
+def test_detector_runs_partial_batch_after_max_latency(model):
+    """
+    Test that a frame does not wait for a batch that never fills.
+    """
+    detector = OnnxDetector(model, input_size=INPUT_SIZE, batch_size=8, max_latency=0.01, score_threshold=0.5)
+    detections, _ = detector.update(np.full((48, 64, 3), 255, dtype=np.uint8))
+    detector.close()
+    assert len(detections) == 1
+    assert (detector.batches, detector.frames) == (1, 1)
+
+
+def test_pipeline_runs_batched_detector(model, write_clip):
+    """
+    Test that the pipeline drives a batched detector, delivering every frame in order.
+    """
+    clip = write_clip(width=64, height=48, num_frames=20, warmup_frames=0, num_bats=1)
+    detector = OnnxDetector(model, input_size=INPUT_SIZE, batch_size=4, max_latency=0.05)
+
+    frame_nums = []
+    with VideoManager(clip) as video_manager:
+        with FramePipeline(video_manager, detector, lambda item: None, {}, queue_size=4) as pipeline:
+            while (items := pipeline.get_available()):
+                frame_nums.extend(item.frame_num for item in items)
+    detector.close()
+    assert frame_nums == list(range(1, 21))
+    assert detector.frames == 20
+    assert detector.batches < 20
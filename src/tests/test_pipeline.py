@@ -0,0 +1,131 @@
+import time
+
+import pytest
+
+from batometer.objectfinder import ObjectFinder
+from batometer.objectTracker import ObjectTracker
+from batometer.pipeline import FramePipeline, PipelineFrame
+from batometer.profiler import StageProfiler
+from batometer.videoManager import LiveVideoManager, VideoManager
+
+
+def _tracked_boxes(tracked) -> list[tuple[int, int, int, int, int]]:
+    return sorted((obj.id, obj.point.x, obj.point.y, obj.width, obj.height) for obj in tracked)
+
+
+def test_pipeline_matches_sequential_processing(clip):
+    """
+    Test that the staged pipeline, with detection on a pool, tracks exactly like the sequential loop.
+    """
+    expected = []
+    finder, tracker = ObjectFinder(), ObjectTracker(320, 240)
+    with VideoManager(clip) as video_manager:
+        while video_manager.has_more_frames():
+            detections, _ = finder.update(video_manager.read_frame())
+            tracked, _ = tracker.update(detections)
+            expected.append((video_manager.frame_num, [str(box) for box in _tracked_boxes(tracked)]))
+
+    tracker = ObjectTracker(320, 240)
+    written = []
+
+    def track(item: PipelineFrame) -> None:
+        item.tracked, item.predicted = tracker.update(item.detections)
+        # Tracked objects keep changing on the track thread, so snapshot their boxes now
+        item.labels = [str(box) for box in _tracked_boxes(item.tracked)]
+
+    actual = []
+    with VideoManager(clip) as video_manager:
+        with FramePipeline(
+            video_manager,
+            ObjectFinder(),
+            track,
+            {"count": lambda item: len(tracker.current_potential_objects)},
+            lambda item: written.append(item.frame_num),
+            detect_workers=3,
+            queue_size=2,
+        ) as pipeline:
+            while (items := pipeline.get_available()):
+                actual.extend((item.frame_num, item.labels) for item in items)
+                stages = {"decode", "subtract", "extract", "track", "count"}
+                assert all(stages <= set(item.timings) for item in items)
+    assert actual == expected
+    assert pipeline.completed
+    assert written == list(range(1, 61))
+    assert pipeline.stats["track"].items == 60
+    assert "extract" in pipeline.report()
+
+
+def test_pipeline_raises_stage_errors_and_stops_early(clip):
+    """
+    Test that an error in a stage reaches the consumer, and closing early does not hang.
+    """
+
+    def track(item: PipelineFrame) -> None:
+        if item.frame_num == 3:
+            raise RuntimeError("tracking failed")
+
+    with VideoManager(clip) as video_manager:
+        with FramePipeline(video_manager, ObjectFinder(), track, {}) as pipeline:
+            assert pipeline.get().frame_num == 1
+            with pytest.raises(RuntimeError, match="tracking failed"):
+                while pipeline.get() is not None:
+                    pass
+        assert not pipeline.completed
+
+    with VideoManager(clip) as video_manager:
+        with FramePipeline(video_manager, ObjectFinder(), lambda item: None, {}, queue_size=1) as pipeline:
+            assert pipeline.get().frame_num == 1
+    assert not pipeline.completed
+
+
+def test_pipeline_collects_detector_and_tracker_steps_per_frame(clip):
+    """
+    Test that the steps the detector and tracker time on pipeline threads arrive with each frame, and
+    reach the profiler once the consumer records them.
+    """
+    profiler = StageProfiler(enabled=True)
+    tracker = ObjectTracker(320, 240, profiler=profiler)
+
+    def track(item: PipelineFrame) -> None:
+        item.tracked, item.predicted = tracker.update(item.detections)
+
+    with VideoManager(clip) as video_manager:
+        with FramePipeline(
+            video_manager, ObjectFinder(profiler=profiler), track, {}, detect_workers=3, profiler=profiler
+        ) as pipeline:
+            while (item := pipeline.get()) is not None:
+                assert {"mog2", "morphology", "contours", "update_heatmap"} <= set(item.timings)
+                for name, (wall, cpu) in item.timings.items():
+                    profiler.record(name, wall, cpu)
+                profiler.end_frame(item.frame_num)
+    assert {"subtract", "mog2", "extract", "morphology", "contours", "update_heatmap"} <= set(
+        profiler.stage_names()
+    )
+    assert profiler.recent_ms("mog2") <= profiler.recent_ms("subtract")
+
+
+def _max_lag(video_path: str, **pipeline_options) -> tuple[int, FramePipeline]:
+    lags, consumed = [], 0
+    with LiveVideoManager(video_path) as video_manager:
+        pipeline = FramePipeline(video_manager, ObjectFinder(), lambda item: None, {}, **pipeline_options)
+        with pipeline:
+            while pipeline.get() is not None:
+                consumed += 1
+                # Frames decoded after this one and still waiting; the consumer is slower than the source
+                lags.append(pipeline.stats["decode"].items - pipeline.dropped_frames - consumed)
+                time.sleep(0.02)
+    return max(lags), pipeline
+
+
+def test_live_pipeline_bounds_latency_in_frames(write_clip):
+    """
+    Test that dropping stale decoded frames keeps at most `3 * queue_size + 3` frames waiting behind the
+    one a slow consumer takes, where blocking lets every queue fill up.
+    """
+    video_path = write_clip(width=160, height=120, fps=200, num_frames=200, warmup_frames=0, num_bats=2)
+    lag, pipeline = _max_lag(video_path, queue_size=1, drop_stale=True)
+    assert lag <= 3 * 1 + 3
+    assert pipeline.dropped_frames > 0
+    blocking_lag, blocking = _max_lag(video_path, queue_size=8)
+    assert blocking.dropped_frames == 0
+    assert blocking_lag > 3 * 1 + 3
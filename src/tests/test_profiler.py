@@ -0,0 +1,44 @@
+import csv
+import time
+
+from batometer.profiler import StageProfiler
+
+
+def test_disabled_profiler_records_nothing():
+    """
+    Test that a disabled profiler reuses one no-op context and keeps no timings.
+    """
+    profiler = StageProfiler()
+    assert profiler.stage("a") is profiler.stage("b")
+    with profiler.stage("a"):
+        pass
+    profiler.end_frame(1)
+    assert profiler.stage_names() == []
+
+
+def test_profiler_sums_stages_per_frame_and_writes_csv(tmp_path):
+    """
+    Test that repeated stages within a frame are summed and reported per frame.
+    """
+    csv_path = tmp_path / "timings.csv"
+    profiler = StageProfiler(enabled=True, csv_path=str(csv_path))
+    for frame_num in (1, 2):
+        for _ in range(2):
+            with profiler.stage("sleep"):
+                time.sleep(0.002)
+        with profiler.stage("noop"):
+            pass
+        profiler.end_frame(frame_num)
+    assert profiler.stage_names() == ["sleep", "noop"]
+    assert profiler.recent_ms("sleep") >= 4
+    assert "sleep" in profiler.report()
+    profiler.close()
+
+    with open(csv_path) as timing_file:
+        rows = list(csv.DictReader(timing_file))
+    assert [(row["frame"], row["stage"]) for row in rows] == [
+        ("1", "sleep"),
+        ("1", "noop"),
+        ("2", "sleep"),
+        ("2", "noop"),
+    ]
@@ -0,0 +1,112 @@
+import runpy
+import sys
+
+import numpy as np
+import pytest
+
+from batometer.batometerApp import BatometerApp
+from batometer.cascadeDetector import CASCADE_CROP_SIZE
+from batometer.detectionCache import DetectionCache, DetectionCacheWriter, cache_key
+from batometer.detectionObject import Detection, Point
+from batometer.objectTracker import ObjectTracker
+from batometer.replay import replay_detections
+from tests.onnx_models import write_brightness_classifier
+
+DETECTOR_PARAMS = {"detector": "mog2", "history": 500, "var_threshold": 100, "kernel_size": 5}
+
+
+def make_detections(num_frames: int) -> list[set[Detection]]:
+    detections_per_frame = []
+    for frame_idx in range(num_frames):
+        detections = {Detection(Point(10 + 4 * frame_idx, 20 + i * 60), 5, 5) for i in range(3)}
+        if frame_idx % 7 == 3:
+            detections = set()  # Frames without detections must survive the cache
+        detections_per_frame.append(detections)
+    return detections_per_frame
+
+
+def test_detection_cache_key_depends_on_video_and_params(tmp_path):
+    """
+    Test that the cache key changes with the video content and with the detector parameters.
+    """
+    video_a, video_b = tmp_path / "a.mp4", tmp_path / "b.mp4"
+    video_a.write_bytes(b"a" * 100)
+    video_b.write_bytes(b"b" * 100)
+    key = cache_key(str(video_a), DETECTOR_PARAMS)
+    assert key == cache_key(str(video_a), dict(DETECTOR_PARAMS))
+    assert key != cache_key(str(video_b), DETECTOR_PARAMS)
+    assert key != cache_key(str(video_a), {**DETECTOR_PARAMS, "var_threshold": 50})
+
+
+def test_replay_matches_live_tracking(tmp_path):
+    """
+    Test that replaying cached detections produces the same tracks as tracking them live.
+    """
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"fake video")
+    cache_dir = tmp_path / "cache"
+    detections_per_frame = make_detections(30)
+
+    live_tracker = ObjectTracker(320, 240)
+    writer = DetectionCacheWriter(str(cache_dir), str(video), DETECTOR_PARAMS, 320, 240, 25)
+    for frame_num, detections in enumerate(detections_per_frame, start=1):
+        writer.append(frame_num, detections)
+        live_tracker.update(set(detections))
+    assert DetectionCache.find(str(cache_dir), str(video), DETECTOR_PARAMS) is None
+    writer.close(np.zeros((240, 320, 3), dtype=np.uint8))
+
+    cache = DetectionCache.find(str(cache_dir), str(video), DETECTOR_PARAMS)
+    assert cache is not None
+    assert cache.num_frames == 30
+    assert [dets for _, dets in cache.frames()] == detections_per_frame
+
+    heatmap_path = tmp_path / "heatmap.png"
+    replayed = replay_detections(
+        cache, analysis_path=str(tmp_path / "analysis.csv"), heatmap_path=str(heatmap_path)
+    )
+    assert heatmap_path.is_file()
+    assert replayed.id_count == live_tracker.id_count
+    live_histories = sorted((obj.id, obj.history) for obj in live_tracker.all_objects)
+    replayed_histories = sorted((obj.id, obj.history) for obj in replayed.all_objects)
+    assert replayed_histories == live_histories
+
+
+def test_replay_cli_finds_the_cache_of_the_detector_used(clip, headless, tmp_path, monkeypatch):
+    """
+    Test that the replay entry point rebuilds the cache key of a run with a model-based detector.
+    """
+    classifier = str(tmp_path / "classifier.onnx")
+    write_brightness_classifier(classifier, CASCADE_CROP_SIZE)
+    cache_dir = str(tmp_path / "cache")
+    BatometerApp(
+        clip, detection_cache_dir=cache_dir, detector="cascade", detector_model_path=classifier
+    ).run()
+
+    heatmap_path = tmp_path / "replayed.png"
+    argv = ["replay", "--video-path", clip, "--detection-cache", cache_dir]
+    argv += ["--heatmap-path", str(heatmap_path)]
+    monkeypatch.setattr(sys, "argv", argv)
+    with pytest.raises(SystemExit):  # The default mog2 parameters key another cache
+        runpy.run_module("batometer.replay", run_name="__main__")
+    monkeypatch.setattr(sys, "argv", argv + ["--detector", "cascade", "--detector-model", classifier])
+    runpy.run_module("batometer.replay", run_name="__main__")
+    assert heatmap_path.is_file()
+
+
+def test_replay_cli_finds_the_cache_of_a_merging_run(clip, headless, tmp_path, monkeypatch):
+    """
+    Test that the merge options of the run are part of the cache key replay rebuilds, while replay's own
+    merge options only apply to the cached blobs.
+    """
+    cache_dir = str(tmp_path / "cache")
+    BatometerApp(clip, detection_cache_dir=cache_dir, merge_gap=8).run()
+
+    heatmap_path = tmp_path / "replayed.png"
+    argv = ["replay", "--video-path", clip, "--detection-cache", cache_dir]
+    argv += ["--heatmap-path", str(heatmap_path)]
+    monkeypatch.setattr(sys, "argv", argv + ["--merge-gap", "8"])
+    with pytest.raises(SystemExit):
+        runpy.run_module("batometer.replay", run_name="__main__")
+    monkeypatch.setattr(sys, "argv", argv + ["--cache-merge-gap", "8"])
+    runpy.run_module("batometer.replay", run_name="__main__")
+    assert heatmap_path.is_file()
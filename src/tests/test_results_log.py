@@ -0,0 +1,39 @@
+import numpy as np
+
+from batometer.detectionObject import Detection, IdentifiedObject, Point
+from batometer.resultsLog import ResultsLogWriter, load_results_log
+
+
+def test_results_log_streams_chunks_readable_mid_run(tmp_path):
+    """
+    Test that full chunks are readable before the writer is closed and all rows after.
+    """
+    log_dir = tmp_path / "log"
+    tracked = IdentifiedObject(1, Detection(Point(10, 20), 4, 6))
+    predicted = IdentifiedObject(2, Detection(Point(50, 60), 3, 3))
+    predicted.update(None)
+
+    writer = ResultsLogWriter(str(log_dir), chunk_rows=4)
+    for frame_num in range(1, 4):
+        writer.append_frame(frame_num, [tracked], [predicted])
+
+    partial = load_results_log(str(log_dir))
+    assert len(partial["frame"]) == 4
+
+    writer.close()
+    log = load_results_log(str(log_dir))
+    np.testing.assert_array_equal(log["frame"], [1, 1, 2, 2, 3, 3])
+    np.testing.assert_array_equal(log["track_id"], [1, 2, 1, 2, 1, 2])
+    np.testing.assert_array_equal(log["matched"], [True, False] * 3)
+    assert (log["x"][0], log["y"][0], log["w"][0], log["h"][0]) == (10, 20, 4, 6)
+    assert (log["x"][1], log["y"][1]) == (predicted.predicted_position.x, predicted.predicted_position.y)
+
+
+def test_results_log_empty(tmp_path):
+    """
+    Test that loading a log without chunks returns empty columns.
+    """
+    with ResultsLogWriter(str(tmp_path / "log")):
+        pass
+    log = load_results_log(str(tmp_path / "log"))
+    assert all(len(column) == 0 for column in log.values())
@@ -0,0 +1,21 @@
+import subprocess
+import sys
+
+from batometer.window import ImageTransformer
+
+
+def test_entry_points_do_not_import_pandas_or_tkinter():
+    """
+    Test that importing the app and CLI leaves pandas and tkinter unloaded, keeping startup fast.
+    """
+    probe = "import sys, batometer.main; print(sorted({'pandas', 'tkinter'} & set(sys.modules)))"
+    output = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True, check=True).stdout
+    assert output.strip().splitlines()[-1] == "[]"
+
+
+def test_image_transformer_does_not_query_the_screen_until_needed():
+    """
+    Test that creating an ImageTransformer, as every headless run does, never touches Tk.
+    """
+    ImageTransformer()
+    assert "tkinter" not in sys.modules
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from batometer.detectionCache import DetectionCacheWriter
+from batometer.detectionObject import Detection, Point
+from batometer.evaluation import evaluate_tracks
+from batometer.sweep import detector_params, expand_grid, run_sweep
+
+
+def rows(*table):
+    array = np.array(table, dtype=np.int32)
+    return {name: array[:, i] for i, name in enumerate(("frame", "track_id", "x", "y", "w", "h"))}
+
+
+def test_evaluate_tracks_counts_switches_misses_and_false_positives():
+    """
+    Test the CLEAR-MOT style counts on a hand-made example.
+    """
+    ground_truth = rows((1, 7, 0, 0, 4, 4), (2, 7, 5, 0, 4, 4), (3, 7, 10, 0, 4, 4))
+    predicted = rows((1, 1, 1, 0, 4, 4), (2, 2, 6, 1, 4, 4), (3, 9, 200, 200, 4, 4))
+    scores = evaluate_tracks(predicted, ground_truth)
+    counts = (scores["matches"], scores["misses"], scores["false_positives"], scores["id_switches"])
+    assert counts == (2, 1, 1, 1)
+    assert scores["mota"] == pytest.approx(0.0)
+
+
+def test_expand_grid_rejects_unknown_parameters():
+    """
+    Test that the grid is expanded with defaults and typos are rejected.
+    """
+    configs = expand_grid({"max_missed_frames": [5, 10], "prediction_range": [20, 30, 40]})
+    assert len(configs) == 6
+    assert all(config["min_area"] == 0 for config in configs)
+    with pytest.raises(ValueError):
+        expand_grid({"max_mised_frames": [5]})
+
+
+def test_run_sweep_over_cached_detections(tmp_path):
+    """
+    Test that a sweep over a process pool reports one row of metrics per configuration.
+    """
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"fake video")
+    config = expand_grid({})[0]
+    writer = DetectionCacheWriter(str(tmp_path / "cache"), str(video), detector_params(config), 320, 240, 25)
+    gt_lines = ["frame,track_id,x,y,w,h"]
+    for frame_num in range(1, 41):
+        detections = set()
+        for bat in range(2):
+            x, y = 5 + 6 * frame_num, 30 + 100 * bat
+            gt_lines.append(f"{frame_num},{bat},{x},{y},5,5")
+            if frame_num % 5 != 0:  # Drop every fifth detection
+                detections.add(Detection(Point(x, y), 5, 5))
+        writer.append(frame_num, detections)
+    writer.close()
+    gt_path = tmp_path / "gt.csv"
+    gt_path.write_text("\n".join(gt_lines))
+
+    results = run_sweep(
+        str(video),
+        str(tmp_path / "cache"),
+        {"max_missed_frames": [0, 10]},
+        processes=2,
+        ground_truth_path=str(gt_path),
+    )
+    assert list(results["max_missed_frames"]) == [0, 10]
+    impatient, patient = results.iloc[0], results.iloc[1]
+    assert patient["track_count"] == 2
+    assert patient["id_switches"] == 0
+    assert impatient["track_count"] > patient["track_count"]
+    assert patient["mota"] > impatient["mota"]
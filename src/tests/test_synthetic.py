@@ -0,0 +1,62 @@
+import numpy as np
+
+from batometer.evaluation import TRACK_COLUMNS, evaluate_tracks, load_ground_truth
+from batometer.objectfinder import ObjectFinder
+from batometer.objectTracker import ObjectTracker
+from batometer.synthetic import SyntheticConfig, SyntheticScene, write_synthetic_clip
+from batometer.videoManager import VideoManager
+
+
+def track_scene(config: SyntheticConfig) -> tuple[dict, dict]:
+    finder = ObjectFinder()
+    tracker = ObjectTracker(config.width, config.height, enable_heatmap=False)
+    predicted, truth = [], []
+    for frame_num, (frame, rows) in enumerate(SyntheticScene(config).frames(), start=1):
+        detections, _ = finder.update(frame)
+        tracked, _ = tracker.update(detections)
+        truth.extend(rows)
+        predicted.extend(
+            (frame_num, obj.id, obj.point.x, obj.point.y, obj.width, obj.height) for obj in tracked
+        )
+    return as_columns(predicted), as_columns(truth)
+
+
+def as_columns(rows: list[tuple]) -> dict:
+    return dict(zip(TRACK_COLUMNS, np.array(rows, dtype=np.int32).reshape(-1, len(TRACK_COLUMNS)).T))
+
+
+def test_synthetic_scene_is_deterministic():
+    """
+    Test that the same config always renders the same frames and ground truth.
+    """
+    config = SyntheticConfig(
+        num_frames=40, warmup_frames=0, entry_spread=5, noise_sigma=4, trajectory="erratic"
+    )
+    first = list(SyntheticScene(config).frames())
+    second = list(SyntheticScene(config).frames())
+    assert all(np.array_equal(a[0], b[0]) and a[1] == b[1] for a, b in zip(first, second))
+    assert sum(len(rows) for _, rows in first) > 0
+
+
+def test_synthetic_clip_round_trips_through_video_file(tmp_path):
+    """
+    Test that a written clip can be read back by the VideoManager with its ground truth.
+    """
+    config = SyntheticConfig(width=160, height=120, num_frames=30, warmup_frames=0, entry_spread=1)
+    video_path, gt_path = tmp_path / "clip.avi", tmp_path / "truth.csv"
+    write_synthetic_clip(config, str(video_path), str(gt_path))
+    with VideoManager(str(video_path)) as video_manager:
+        assert (video_manager.width, video_manager.height, video_manager.max_frames) == (160, 120, 30)
+    truth = load_ground_truth(str(gt_path))
+    assert truth["frame"].min() >= 1 and truth["frame"].max() <= 30
+
+
+def test_detection_and_tracking_accuracy_on_synthetic_clip():
+    """
+    Accuracy regression test: ObjectFinder + ObjectTracker on a noisy clip with an occluder.
+    """
+    config = SyntheticConfig(num_bats=6, noise_sigma=6, occluders=1, seed=1)
+    predicted, truth = track_scene(config)
+    scores = evaluate_tracks(predicted, truth)
+    assert scores["recall"] > 0.95
+    assert scores["mota"] > 0.85
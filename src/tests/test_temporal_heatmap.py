@@ -0,0 +1,46 @@
+import numpy as np
+
+from batometer.temporalHeatmap import TemporalHeatmapCube, TemporalHeatmapWriter
+
+
+def test_temporal_heatmap_bins_cumulative_grid(tmp_path):
+    """
+    Test that the writer stores per-bin activity deltas and the loader sums arbitrary windows.
+    """
+    cube_path = tmp_path / "cube.npy"
+    grid = np.zeros((4, 6), dtype=np.int32)
+    # 2 fps, 1 second bins -> 2 frames per bin; preallocate too few bins to force growth
+    writer = TemporalHeatmapWriter(str(cube_path), grid.shape, fps=2, bin_seconds=1, expected_frames=2)
+    for frame_num in range(1, 8):
+        grid[0, 0] += 1
+        grid[1, frame_num % 6] += frame_num
+        writer.update(frame_num, grid)
+
+    partial = TemporalHeatmapCube(str(cube_path))
+    assert partial.bins == 3
+
+    writer.close()
+    cube = TemporalHeatmapCube(str(cube_path))
+    assert cube.bins == 4
+    assert cube.data.shape == (4, 4, 6)
+    np.testing.assert_array_equal(cube.data[:, 0, 0], [2, 2, 2, 1])
+    np.testing.assert_array_equal(cube.activity_per_bin(), [5, 9, 13, 8])
+    np.testing.assert_array_equal(cube.window(0, 100), grid)
+    assert cube.window(1, 2).sum() == 9
+    np.testing.assert_array_equal(cube.bin_start_times(), [0, 1, 2, 3])
+
+
+def test_temporal_heatmap_skipped_frames_close_empty_bins(tmp_path):
+    """
+    Test that jumping over whole bins (e.g. dropped live frames) leaves them empty, and the activity
+    after the jump goes into the bin of the frame it was recorded in.
+    """
+    cube_path = tmp_path / "cube.npy"
+    grid = np.zeros((2, 2), dtype=np.int32)
+    with TemporalHeatmapWriter(str(cube_path), grid.shape, fps=1, bin_seconds=2) as writer:
+        grid += 1
+        writer.update(1, grid)
+        grid += 1
+        writer.update(7, grid)
+    cube = TemporalHeatmapCube(str(cube_path))
+    np.testing.assert_array_equal(cube.activity_per_bin(), [4, 0, 0, 4])
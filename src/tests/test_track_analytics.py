@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+from batometer.analysis import get_direction, summarise_tracks
+from batometer.detectionObject import Detection, IdentifiedObject, Point
+from batometer.objectTracker import ObjectTracker
+from batometer.trackAnalytics import TRACK_FEATURE_COLUMNS, save_track_features, track_features
+
+
+def make_track(obj_id: int, positions: list, sizes: list = None) -> IdentifiedObject:
+    """
+    Builds a track from one (x, y) per frame, None for a missed frame.
+    """
+    sizes = sizes or [(4, 4)] * len(positions)
+    obj = IdentifiedObject(obj_id, Detection(Point(*positions[0]), *sizes[0]))
+    for position, size in zip(positions[1:], sizes[1:]):
+        obj.update(Point(*position) if position else None, *size)
+    return obj
+
+
+def test_features_of_hand_built_tracks():
+    """
+    Test the motion features of a straight track with a missed frame and of an L-shaped track.
+    """
+    straight = make_track(
+        7,
+        [(0, 0), (3, 4), None, (9, 12), (12, 16)],
+        [(4, 4), (6, 6), (0, 0), (4, 4), (6, 6)],
+    )
+    corner = make_track(3, [(0, 0), (10, 0), (10, 10)])
+    features = track_features([straight, corner])
+
+    assert list(features) == list(TRACK_FEATURE_COLUMNS)
+    assert features["id"].tolist() == [3, 7]
+    assert features["points"].tolist() == [3, 4]
+    assert features["duration"].tolist() == [3, 5]
+    assert features["path_length"] == pytest.approx([20, 20])
+    assert features["net_displacement"] == pytest.approx([np.hypot(10, 10), 20])
+    assert features["tortuosity"] == pytest.approx([20 / np.hypot(10, 10), 1])
+    # The step over the missed frame is twice as long but spans two frames
+    assert features["mean_step"] == pytest.approx([10, 20 / 3])
+    assert features["mean_speed"] == pytest.approx([10, 5])
+    assert features["max_speed"] == pytest.approx([10, 5])
+    assert features["speed_std"] == pytest.approx([0, 0], abs=1e-9)
+    assert features["mean_heading_change"] == pytest.approx([np.pi / 2, 0])
+    assert features["size_mean"] == pytest.approx([16, 26])
+    # Small, large, small, large: three crossings of the mean area over five frames
+    assert features["wingbeat_frequency"] == pytest.approx([0, 3 / 10])
+    # Both tracks are shorter than the END_POINTS averaged at each end, so their ends coincide
+    assert features["incoming_x"].tolist() == features["outgoing_x"].tolist() == [20 / 3, 6]
+    assert features["bat_likelihood"] == pytest.approx([1, 2 / 3])
+
+
+def test_features_of_no_tracks_are_empty_columns():
+    """
+    Test that an empty tracker still yields every column.
+    """
+    features = track_features([])
+    assert list(features) == list(TRACK_FEATURE_COLUMNS)
+    assert all(len(column) == 0 for column in features.values())
+
+
+def test_summary_matches_per_track_computation(tmp_path):
+    """
+    Test that the vectorised summary agrees with averaging the end positions of each track in Python.
+    """
+    rng = np.random.default_rng(0)
+    tracker = ObjectTracker(640, 480)
+    for obj_id in range(50):
+        length = int(rng.integers(2, 60))
+        steps = rng.integers(-8, 9, size=(length, 2))
+        positions = [tuple(p) for p in (rng.integers(0, 500, size=2) + np.cumsum(steps, axis=0)).tolist()]
+        tracker.all_objects.add(make_track(obj_id, positions))
+
+    expected = []
+    for obj in sorted(tracker.all_objects, key=lambda obj: obj.id):
+        history = [tuple(p) for p in obj.history_points().tolist()]
+        if len(history) <= 10:
+            continue
+        incoming = tuple(sum(c) / len(history[:20]) for c in zip(*history[:20]))
+        outgoing = tuple(sum(c) / len(history[-20:]) for c in zip(*history[-20:]))
+        distances = [np.hypot(b[0] - a[0], b[1] - a[1]) for a, b in zip(history, history[1:])]
+        expected.append(
+            {
+                "Object ID": obj.id,
+                "Incoming Direction": get_direction(incoming, outgoing),
+                "Outgoing Direction": get_direction(outgoing, incoming),
+                "Likelihood of Bat": pytest.approx(min(1.0, sum(distances) / len(distances) / 10)),
+            }
+        )
+    assert summarise_tracks(tracker) == expected
+
+    features_path = tmp_path / "features.csv"
+    save_track_features(track_features(tracker.all_objects), str(features_path))
+    lines = features_path.read_text().splitlines()
+    assert lines[0].split(",") == list(TRACK_FEATURE_COLUMNS)
+    assert len(lines) == 51
@@ -0,0 +1,82 @@
+import numpy as np
+
+from batometer.detectionObject import Detection, IdentifiedObject, Point
+from batometer.objectTracker import ObjectTracker
+from batometer.trackStitching import link_fragments, stitch_tracks
+
+
+def make_fragment(obj_id: int, first_frame: int, start: tuple, velocity: tuple, length: int):
+    """
+    Builds a track moving at constant velocity, starting at `first_frame` at `start`.
+    """
+    obj = IdentifiedObject(obj_id, Detection(Point(*start), 5, 5))
+    obj.first_frame = first_frame
+    for step in range(1, length):
+        obj.update(Point(round(start[0] + velocity[0] * step), round(start[1] + velocity[1] * step)), 5, 5)
+    return obj
+
+
+def test_stitches_a_bat_the_tracker_lost():
+    """
+    Test that a bat undetected for longer than `max_missed_frames` gets two tracks, and stitching joins
+    them into one spanning the gap.
+    """
+    tracker = ObjectTracker(640, 480, max_missed_frames=5)
+    for frame in range(60):
+        hidden = 20 <= frame < 35  # e.g. behind a branch
+        tracker.update(set() if hidden else {Detection(Point(10 + 8 * frame, 200), 6, 4)})
+    assert tracker.id_count == 2
+
+    (track,) = stitch_tracks(tracker.all_objects)
+    assert track.id == 0
+    assert track.first_frame == 0
+    assert len(track.history) == 60
+    assert track.history[20:35] == [None] * 15
+    visible = [frame for frame in range(60) if not 20 <= frame < 35]
+    assert track.history_points()[:, 0].tolist() == [10 + 8 * frame for frame in visible]
+    assert track.history_boxes()[-1, 2] == 59
+    assert track.point == Point(10 + 8 * 59, 200)
+    # The fragments themselves are left as they were
+    fragments = sorted(tracker.all_objects, key=lambda obj: obj.id)
+    assert [len(obj.history_points()) for obj in fragments] == [20, 25]
+
+
+def test_links_only_fragments_the_extrapolation_reaches():
+    """
+    Test that a fragment is linked to the start that matches its extrapolated path, not to one behind it,
+    too far away, too late or starting before it ended, and that each fragment is linked at most once.
+    """
+    first = make_fragment(0, 0, (100, 100), (10, 0), 10)  # Ends at frame 9 at (190, 100)
+    candidates = [
+        make_fragment(1, 29, (385, 105), (10, 0), 10),  # On the extrapolated path 20 frames later
+        make_fragment(2, 29, (300, 100), (10, 0), 10),  # Further from the extrapolation, loses to 1
+        make_fragment(3, 14, (100, 100), (-10, 0), 10),  # Behind the fragment
+        make_fragment(4, 100, (1090, 100), (10, 0), 10),  # Too late
+        make_fragment(5, 5, (150, 100), (10, 0), 10),  # Starts before the fragment ends
+    ]
+    assert link_fragments([first, *candidates]) == [(0, 1)]
+    assert link_fragments([first, *candidates], max_gap=100) == [(0, 1), (1, 4)]
+
+
+def test_recovers_fragments_of_many_bats():
+    """
+    Test that most splits among thousands of fragments are found, linking few unrelated fragments.
+    """
+    rng = np.random.default_rng(0)
+    fragments, truth = [], set()
+    for bat in range(2000):
+        start = rng.uniform(0, [1920, 1080])
+        velocity = tuple(rng.uniform(-10, 10, size=2))
+        first_frame = int(rng.integers(0, 20000))
+        length, gap = int(rng.integers(8, 30)), int(rng.integers(12, 40))
+        later_frame = first_frame + length - 1 + gap
+        later_start = start + np.array(velocity) * (length - 1 + gap)
+        start, later_start = tuple(start.round().astype(int)), tuple(later_start.round().astype(int))
+        fragments.append(make_fragment(2 * bat, first_frame, start, velocity, length))
+        fragments.append(make_fragment(2 * bat + 1, later_frame, later_start, velocity, 10))
+        truth.add((2 * bat, 2 * bat + 1))
+
+    links = set(link_fragments(fragments))
+    assert len(links & truth) >= 0.98 * len(truth)
+    assert len(links - truth) <= 0.05 * len(truth)
+    assert len(stitch_tracks(fragments)) == len(fragments) - len(links)
@@ -0,0 +1,40 @@
+import time
+
+from batometer.videoManager import LiveVideoManager, VideoManager
+
+
+def test_live_source_replays_file_at_native_fps(write_clip):
+    """
+    Test that a file used as a stand-in camera is paced at its frame rate and fully read by a fast consumer.
+    """
+    video_path = write_clip(width=160, height=120, fps=50, num_frames=10, warmup_frames=0, num_bats=2)
+    start = time.perf_counter()
+    frame_nums = []
+    with LiveVideoManager(video_path) as video_manager:
+        assert video_manager.paced and video_manager.fps == 50
+        while video_manager.has_more_frames():
+            frame = video_manager.read_frame()
+            assert frame.shape == (120, 160, 3)
+            frame_nums.append(video_manager.frame_num)
+    assert time.perf_counter() - start >= 9 / 50
+    assert frame_nums == sorted(frame_nums)
+    assert len(frame_nums) + video_manager.dropped_frames == video_manager.captured_frames == 10
+
+
+def test_live_source_drops_stale_frames_for_slow_consumer(write_clip):
+    """
+    Test that a slow consumer always gets the freshest frame and the skipped frames are counted as dropped.
+    """
+    video_path = write_clip(width=160, height=120, fps=100, num_frames=20, warmup_frames=0, num_bats=2)
+    frame_nums = []
+    with LiveVideoManager(video_path) as video_manager:
+        while video_manager.has_more_frames():
+            video_manager.read_frame()
+            frame_nums.append(video_manager.frame_num)
+            time.sleep(0.05)
+    assert video_manager.dropped_frames > 0
+    assert len(frame_nums) + video_manager.dropped_frames == video_manager.captured_frames == 20
+    assert max(b - a for a, b in zip(frame_nums, frame_nums[1:])) > 1
+
+    with VideoManager(video_path) as file_manager:
+        assert file_manager.max_frames == 20 and file_manager.dropped_frames == 0
@@ -0,0 +1,42 @@
+import numpy as np
+
+from batometer.detectionObject import Detection, IdentifiedObject, Point
+from batometer.window import draw_tracked_object, draw_tracking
+
+
+def test_history_points_skip_missed_frames_and_grow():
+    """
+    Test that the array-backed history holds only detected positions and grows past its capacity.
+    """
+    obj = IdentifiedObject(0, Detection(Point(0, 0), 5, 5))
+    for i in range(1, 100):
+        obj.update(Point(i, 2 * i) if i % 3 else None, 5, 5)
+    expected = [(p.x, p.y) for p in obj.history if p is not None]
+    np.testing.assert_array_equal(obj.history_points(), expected)
+
+
+def test_draw_tracking_matches_per_object_drawing_for_one_object():
+    """
+    Test that the batched renderer draws the same pixels as the per-object renderer.
+    """
+    obj = IdentifiedObject(3, Detection(Point(50, 50), 10, 10))
+    obj.update(Point(60, 55), 10, 10)
+    obj.update(None)
+    obj.update(Point(80, 65), 10, 10)
+    frame = np.full((200, 200, 3), 40, dtype=np.uint8)
+
+    expected = frame.copy()
+    draw_tracked_object(expected, obj)
+    batched = frame.copy()
+    draw_tracking(batched, [], [obj], [])
+    np.testing.assert_array_equal(batched, expected)
+
+
+def test_draw_tracking_clips_circles_at_frame_edge():
+    """
+    Test that prediction circles partly outside the frame are blended without errors.
+    """
+    objs = [IdentifiedObject(i, Detection(Point(x, y), 5, 5)) for i, (x, y) in [(1, (0, 0)), (2, (99, 99))]]
+    frame = np.zeros((100, 100, 3), dtype=np.uint8)
+    draw_tracking(frame, [Detection(Point(40, 40), 5, 5)], objs, [])
+    assert frame[0, 0].any() and frame[99, 99].any()